@@ -0,0 +1,360 @@
+import calendar
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Wartości globalnego filtra 'type-filter'
+TYPES = ['All', 'Movie', 'TV Show']
+
+DURATION_BINS = [0, 90, 120, 150, 9999]
+DURATION_LABELS = ['< 90 min', '90-119 min', '120-149 min', '150+ min']
+SEASON_ORDER = ['1', '2', '3', '4', '5+']
+MONTHS = list(calendar.month_name)[1:]
+
+# Bufory wielokrotnego użytku dla ścieżki filtrów krzyżowych (patrz buffer / gather)
+_buffers = threading.local()
+GATHER_CHUNK = 1 << 16
+
+
+def _frame(counts, key):
+    # Ramka (klucz, count) na tablicach z counts - rename_axis + reset_index kopiowały indeks i liczniki
+    return pd.DataFrame({key: counts.index, 'count': counts.to_numpy()}, copy=False)
+
+
+def _empty_counts(key):
+    return pd.DataFrame({key: pd.Series(dtype=object), 'count': pd.Series(dtype=np.int64)})
+
+
+def buffer(name, size, dtype=bool):
+    # Bufor wielokrotnego użytku per wątek (rośnie do największego żądania) - widok o długości size
+    arrays = _buffers.__dict__
+    array = arrays.get(name)
+    if array is None or len(array) < size or array.dtype != dtype:
+        array = arrays[name] = np.empty(size, dtype=dtype)
+    return array[:size]
+
+
+def gather(mask, rows, name='gather'):
+    # mask[rows] w buforze zamiast nowej tablicy; wynik ważny do następnego gather w tym wątku.
+    # Porcjami: take zamienia indeksy int32 na intp (8 B na wpis); mode='clip' - przy mode='raise'
+    # numpy i tak kopiuje wynik przez bufor pośredni
+    out = buffer(name, len(rows))
+    for start in range(0, len(rows), GATHER_CHUNK):
+        end = start + GATHER_CHUNK
+        np.take(mask, rows[start:end], out=out[start:end], mode='clip')
+    return out
+
+
+def _select(codes, mask):
+    return codes if mask is None else codes[mask]
+
+
+def build_row_codes(data):
+    # Kolumny całkowite liczone raz na zbiór danych - wycinek z filtrem krzyżowym to bincount po masce
+    # zamiast kopii df[mask], .dt.month, pd.cut i groupby przy każdym wywołaniu.
+    # Kod 0 = wiersz nie wchodzi do licznika (np. serial w przedziałach długości filmów)
+    df = data.df
+    if df.empty:
+        return {}
+    groups = df.groupby(['rating', 'type'], observed=True)
+    is_movie = (df['type'] == 'Movie').to_numpy(dtype=bool)
+    is_show = (df['type'] == 'TV Show').to_numpy(dtype=bool)
+
+    # Przedziały jak pd.cut(DURATION_BINS, right=False): 1-4, poza przedziałami 5
+    minutes = df['duration_min'].to_numpy(dtype=np.float64, na_value=np.nan)
+    movies = is_movie & ~np.isnan(minutes)
+    bins = np.searchsorted(DURATION_BINS, minutes[movies], side='right')
+    duration = np.zeros(len(df), dtype=np.uint8)
+    duration[movies] = np.where((bins > 0) & (bins < len(DURATION_BINS)), bins, len(DURATION_BINS))
+
+    # Sezony: min(sezony, 5) + 1, etykiety '0'..'4', '5+'
+    seasons = df['seasons_count'].to_numpy(dtype=np.float64, na_value=np.nan)
+    shows = is_show & ~np.isnan(seasons)
+    season = np.zeros(len(df), dtype=np.uint8)
+    season[shows] = np.minimum(seasons[shows], 5).astype(np.uint8) + 1
+
+    codes = {
+        'month': df['date_added'].dt.month.fillna(0).to_numpy(dtype=np.uint8),
+        # ngroup numeruje grupy w kolejności groupby (posortowane) - klucze z size() w tej samej kolejności
+        'rating': (groups.ngroup().to_numpy() + 1).astype(np.int32),
+        'rating_keys': groups.size().index.to_frame(index=False).astype(object),
+        'duration': duration,
+        'season': season,
+        'season_labels': np.array([''] + [str(s) for s in range(5)] + ['5+'], dtype=object),
+    }
+    if 'country' in data.bridges:
+        # (rok, kraj) jako jeden klucz na wpis tabeli pomostowej; kraje w kolejności alfabetycznej jak groupby
+        bridge = data.bridges['country']
+        countries = np.asarray(data.categories('country'), dtype=object)
+        order = np.argsort(countries, kind='stable')
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        years, year_codes = np.unique(df['year_added'].to_numpy(), return_inverse=True)
+        rows = bridge['row'].to_numpy()
+        codes['country_year'] = (year_codes[rows] * len(countries)
+                                 + rank[bridge['value'].cat.codes.to_numpy()]).astype(np.int32)
+        codes['country_year_labels'] = (years, countries[order])
+    return codes
+
+
+def _country_year(data, mask):
+    codes = data.row_codes
+    keys = codes['country_year']
+    if mask is not None:
+        keys = keys[gather(mask, data.bridges['country']['row'].to_numpy())]
+    years, countries = codes['country_year_labels']
+    counts = np.bincount(keys, minlength=len(years) * len(countries))
+    present = np.flatnonzero(counts)
+    index = pd.MultiIndex.from_arrays([years[present // len(countries)].astype(data.df['year_added'].dtype),
+                                       countries[present % len(countries)]], names=['year_added', 'country'])
+    return pd.Series(counts[present].astype(np.int64), index=index, name='count')
+
+
+def _rating(codes, mask):
+    keys = codes['rating_keys']
+    counts = np.bincount(_select(codes['rating'], mask), minlength=len(keys) + 1)[1:]
+    present = counts > 0
+    rat_counts = keys[present].reset_index(drop=True)
+    rat_counts['count'] = counts[present].astype(np.int64)
+    return rat_counts
+
+
+def _duration(codes, mask):
+    counts = np.bincount(_select(codes['duration'], mask), minlength=len(DURATION_BINS) + 1)
+    if not counts[1:].any():
+        return _empty_counts('category')
+    return duration_frame(counts[1:len(DURATION_BINS)])
+
+
+def duration_frame(bin_counts):
+    # Wszystkie przedziały DURATION_LABELS w stałej kolejności (także puste), np. z zapytania SQL
+    index = pd.CategoricalIndex(DURATION_LABELS, categories=DURATION_LABELS, ordered=True)
+    return _frame(pd.Series(np.asarray(bin_counts, dtype=np.int64), index=index), 'category')
+
+
+def _seasons(codes, mask):
+    selected = _select(codes['season'], mask)
+    counts = np.bincount(selected, minlength=len(codes['season_labels']))
+    # Jak value_counts: malejąco, remisy w kolejności pierwszego wystąpienia
+    seen = pd.unique(selected)
+    seen = seen[seen > 0]
+    if not len(seen):
+        return _empty_counts('category')
+    seen = seen[np.argsort(-counts[seen], kind='stable')]
+    return _frame(pd.Series(counts[seen].astype(np.int64), index=pd.Index(codes['season_labels'][seen])),
+                  'category')
+
+
+def build_slice(data, mask):
+    # Tylko operacje na masce i gotowych kodach (data.row_codes) - bez kopii wierszy katalogu
+    codes = data.row_codes
+    rat_counts = _rating(codes, mask)
+    months = np.bincount(_select(codes['month'], mask), minlength=13)[1:]
+
+    return {
+        'total': len(data.df) if mask is None else int(np.count_nonzero(mask)),
+        'country': _frame(data.count_values('country', mask), 'country'),
+        'genre': _frame(data.count_values('genre', mask), 'genre'),
+        'director': _frame(data.count_values('director', mask), 'director'),
+        'cast': _frame(data.count_values('cast', mask), 'actor'),
+        'country_year': _country_year(data, mask),
+        'rating': rat_counts,
+        'rating_order': rating_order(rat_counts),
+        'duration': _duration(codes, mask),
+        'seasons': _seasons(codes, mask),
+        'month': month_frame(months),
+    }
+
+
+def rating_order(rat_counts):
+    return rat_counts.groupby('rating', observed=True)['count'].sum().sort_values(ascending=True).index.tolist()
+
+
+def month_frame(months):
+    # Liczniki dla miesięcy 1-12 -> niezerowe, malejąco
+    month_counts = pd.Series(months, index=MONTHS)
+    return _frame(month_counts[month_counts > 0].sort_values(ascending=False, kind='stable'), 'month')
+
+
+def build_aggregate_cube(data):
+    # Wszystkie agregaty dla trzech wartości filtra typu - callbacki tylko wycinają head(n)
+    if data.df.empty:
+        return {}
+    return {selected_type: build_slice(data, data.type_mask(selected_type)) for selected_type in TYPES}
+
+
+# Tabele liczników w wycinku kostki: nazwa -> kolumna klucza
+COUNT_TABLES = {'country': 'country', 'genre': 'genre', 'director': 'director', 'cast': 'actor',
+                'month': 'month', 'duration': 'category', 'seasons': 'category'}
+
+
+def _merge_counts(old, added, removed, keys):
+    frames = [old, added, removed.assign(count=-removed['count'])]
+    frames = [f.astype({k: object for k in keys}) for f in frames if not f.empty]
+    if not frames:
+        return old
+    merged = pd.concat(frames, ignore_index=True).groupby(keys, sort=False)['count'].sum()
+    return merged[merged > 0].reset_index()
+
+
+def merge_slices(old, added, removed):
+    # Przyrostowa aktualizacja wycinka: stare liczniki + nowe wiersze - usunięte wiersze
+    added = added or {}
+    removed = removed or {}
+    merged = {'total': old['total'] + added.get('total', 0) - removed.get('total', 0)}
+
+    for name, key in COUNT_TABLES.items():
+        counts = _merge_counts(old[name], added.get(name, old[name][:0]), removed.get(name, old[name][:0]), [key])
+        if name == 'duration' and not counts.empty:
+            # Jak pd.cut w _duration: wszystkie przedziały (także puste) w stałej kolejności
+            counts = counts.set_index(key)['count'].reindex(DURATION_LABELS, fill_value=0)
+            counts.index = pd.CategoricalIndex(counts.index, categories=DURATION_LABELS, ordered=True)
+            counts = _frame(counts, key)
+        elif counts.empty:
+            counts = _empty_counts(key)
+        else:
+            counts = counts.sort_values('count', ascending=False, kind='stable').reset_index(drop=True)
+        merged[name] = counts
+
+    rating = _merge_counts(old['rating'], added.get('rating', old['rating'][:0]),
+                           removed.get('rating', old['rating'][:0]), ['rating', 'type'])
+    merged['rating'] = rating
+    merged['rating_order'] = rating.groupby('rating')['count'].sum().sort_values(ascending=True).index.tolist()
+
+    empty = old['country_year'][:0]
+    country_year = old['country_year'].add(added.get('country_year', empty), fill_value=0)
+    country_year = country_year.sub(removed.get('country_year', empty), fill_value=0)
+    merged['country_year'] = country_year[country_year > 0].astype(np.int64).sort_index()
+    return merged
+
+
+def country_comparison(cube_slice, countries):
+    counts = cube_slice['country_year']
+    selected = counts[counts.index.get_level_values('country').isin(countries)]
+    return selected.reset_index()
+
+
+# --- SZEREGI CZASOWE: dzienne liczniki per typ, z których liczymy M/Q/Y ---
+
+TREND_INTERVALS = ['M', 'Q', 'Y']
+CONTENT_TYPES = ['Movie', 'TV Show']
+
+
+def _periods(start, n_days):
+    # Granice okresów w osi dni - reduceat sumuje ciągłe przedziały dni
+    days = pd.date_range(start, periods=n_days, freq='D')
+    periods = {}
+    for interval in TREND_INTERVALS:
+        keys = days.to_period(interval).asi8
+        starts = np.r_[0, np.flatnonzero(keys[1:] != keys[:-1]) + 1]
+        labels = days[starts].to_period(interval).to_timestamp(how='end').normalize()
+        periods[interval] = (starts, labels)
+    return periods
+
+
+def _type_codes(df):
+    # Kody typu (indeks w CONTENT_TYPES, -1 dla innych) zamiast tablicy napisów
+    types = df['type'].to_numpy()
+    type_codes = np.full(len(df), -1, dtype=np.int8)
+    for code, content_type in enumerate(CONTENT_TYPES):
+        type_codes[types == content_type] = code
+    return type_codes
+
+
+def _daily(day_index, type_codes, n_days):
+    return {t: np.bincount(day_index[type_codes == code], minlength=n_days)
+            for code, t in enumerate(CONTENT_TYPES)}
+
+
+def build_timeline(df):
+    if df.empty:
+        return None
+    dates = df['date_added'].dt.normalize()
+    start = dates.min()
+    day_index = ((dates - start) // pd.Timedelta(days=1)).to_numpy(dtype=np.int32)
+    n_days = int(day_index.max()) + 1
+    type_codes = _type_codes(df)
+
+    return {
+        'start': start,
+        'day_index': day_index,
+        'n_days': n_days,
+        'periods': _periods(start, n_days),
+        'daily': _daily(day_index, type_codes, n_days),
+        'type_codes': type_codes,
+    }
+
+
+def update_timeline(timeline, keep, added):
+    # Przyrostowo: odejmujemy usunięte wiersze, dodajemy nowe; oś dni rośnie tylko w przód
+    if timeline is None or added.empty and keep.all():
+        return timeline
+    start = timeline['start']
+    added_days = ((added['date_added'].dt.normalize() - start) // pd.Timedelta(days=1)).to_numpy(dtype=np.int32)
+    if len(added_days) and added_days.min() < 0:
+        return None
+
+    n_days = max(timeline['n_days'], int(added_days.max()) + 1 if len(added_days) else 0)
+    added_codes = _type_codes(added)
+    removed = ~keep
+    removed_daily = _daily(timeline['day_index'][removed], timeline['type_codes'][removed], n_days)
+    added_daily = _daily(added_days, added_codes, n_days)
+
+    daily = {}
+    for t in CONTENT_TYPES:
+        old = np.zeros(n_days, dtype=np.int64)
+        old[:timeline['n_days']] = timeline['daily'][t]
+        daily[t] = old - removed_daily[t] + added_daily[t]
+
+    return {
+        'start': start,
+        'day_index': np.concatenate([timeline['day_index'][keep], added_days]),
+        'n_days': n_days,
+        'periods': timeline['periods'] if n_days == timeline['n_days'] else _periods(start, n_days),
+        'daily': daily,
+        'type_codes': np.concatenate([timeline['type_codes'][keep], added_codes]),
+    }
+
+
+def daily_counts(timeline, mask):
+    # Z filtrem krzyżowym liczymy dzienne liczniki po zbiorze wierszy (jeden bincount na typ)
+    if mask is None:
+        return timeline['daily']
+    day_index = timeline['day_index']
+    type_codes = timeline['type_codes']
+    selected = buffer('daily', len(day_index))
+    daily = {}
+    for code, t in enumerate(CONTENT_TYPES):
+        np.equal(type_codes, code, out=selected)
+        selected &= mask
+        daily[t] = np.bincount(day_index[selected], minlength=timeline['n_days'])
+    return daily
+
+
+def trend_counts(timeline, daily, selected_type, interval, view, agg):
+    if timeline is None:
+        return pd.DataFrame({'date_added': pd.Series(dtype='datetime64[ns]'), 'count': pd.Series(dtype=np.int64)})
+
+    starts, labels = timeline['periods'][interval]
+    types = CONTENT_TYPES if selected_type == 'All' else [selected_type]
+    per_type = {t: np.add.reduceat(daily[t], starts) for t in types}
+
+    if view == 'split':
+        frames = []
+        for t in types:
+            counts = per_type[t]
+            present = counts > 0
+            values = np.cumsum(counts)[present] if agg == 'cumsum' else counts[present]
+            frames.append(pd.DataFrame({'date_added': labels[present], 'type': t, 'count': values}))
+        grouped = pd.concat(frames, ignore_index=True)
+        return grouped.sort_values(['date_added', 'type'], kind='stable').reset_index(drop=True)
+
+    counts = sum(per_type.values())
+    nonzero = np.flatnonzero(counts)
+    if len(nonzero) == 0:
+        return pd.DataFrame({'date_added': labels[:0], 'count': counts[:0]})
+    window = slice(nonzero[0], nonzero[-1] + 1)
+    counts = counts[window]
+    return pd.DataFrame({'date_added': labels[window],
+                         'count': np.cumsum(counts) if agg == 'cumsum' else counts})
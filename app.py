@@ -1,16 +1,127 @@
-import dash
-import dash_bootstrap_components as dbc
-from data import load_and_process_data
-from layout import create_layout
-from callbacks import register_callbacks
+import time
 
-app = dash.Dash(__name__, title="Netflix Dashboard PL", suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.DARKLY])
-server = app.server
+# Początek startu procesu - punkt odniesienia raportu startu (startup.py)
+STARTED = time.perf_counter()
+
+import threading  # noqa: E402
+
+import dash  # noqa: E402
+import dash_bootstrap_components as dbc  # noqa: E402
+from config import (BACKGROUND_CALLBACKS, CLIENT_SIDE, METRICS_ENABLED, RELOAD_INTERVAL,  # noqa: E402
+                    SHARED_DATASET_DIR, WARMUP)
+from data import load_and_process_data  # noqa: E402
+from reload import DatasetStore, start_watcher  # noqa: E402
+from layout import create_layout, create_placeholder_layout  # noqa: E402
+from callbacks import register_callbacks  # noqa: E402
+from figure_cache import create_figure_cache  # noqa: E402
+from startup import StartupReport, format_report  # noqa: E402
+
+
+def load_data():
+    if SHARED_DATASET_DIR:
+        # Worker podpina migawkę opublikowaną przez proces ładujący (bez kopii i parsowania CSV)
+        from shared import load_shared_dataset
+        return load_shared_dataset(SHARED_DATASET_DIR)
+    return load_and_process_data()
+
+
+def load_initial(store, report, load=load_data):
+    # Pierwsze dane; po błędzie store.fail (callbacki dostają wyjątek zamiast czekać), ponowną próbę
+    # robi wątek obserwatora (start_watcher z retry)
+    try:
+        with report.phase('data'):
+            data = load()
+    except Exception as e:
+        report.error = repr(e)
+        store.fail(report.error)
+        print(f"BŁĄD ładowania danych: {e}")
+        return None
+    report.error = None
+    # swap uruchamia słuchaczy (czyszczenie cache wykresów, rozgrzewanie) jak przy przeładowaniu
+    store.swap(data)
+    report.checkpoint('ready')
+    print(format_report(report))
+    return data
+
+
+def start_loading(store, report, load=load_data):
+    # Dane w tle: serwer od razu odpowiada na /health i pokazuje układ zastępczy
+    thread = threading.Thread(target=load_initial, args=(store, report, load), name='dataset-loader', daemon=True)
+    thread.start()
+    return thread
+
+
+def register_health(server, store, report):
+    from flask import jsonify
 
+    @server.route('/health')
+    def health():
+        # Żywotność: proces odpowiada także w trakcie ładowania danych
+        return jsonify(status='ok', ready=store.ready.is_set(), startup=report.as_dict())
 
-df = load_and_process_data()
-app.layout = create_layout(df)
-register_callbacks(app, df)
+    @server.route('/ready')
+    def ready():
+        # Gotowość: 503, dopóki dane się nie załadowały (balanser nie kieruje jeszcze ruchu do workera)
+        if not store.ready.is_set():
+            return jsonify(status='loading', error=report.error), 503
+        return jsonify(status='ready', version=store.get().version)
+
+
+def create_app(data=None):
+    # Bez data - ładowanie w tle (start_loading); z data (np. benchmarki) - aplikacja gotowa od razu
+    report = StartupReport(STARTED)
+    report.checkpoint('imports')
+
+    app = dash.Dash(__name__, title="Netflix Dashboard PL", suppress_callback_exceptions=True,
+                    external_stylesheets=[dbc.themes.DARKLY])
+    store = DatasetStore(data)
+
+    # Ciężkie callbacki w tle (osobne procesy z lokalnej kolejki zadań), pozostałe synchronicznie
+    background_manager = None
+    if BACKGROUND_CALLBACKS and not CLIENT_SIDE:
+        from jobs import create_background_manager
+        background_manager = create_background_manager(store)
+
+    # Layout jako funkcja: każde wejście na stronę widzi aktualną wersję danych (lista krajów, data);
+    # do załadowania danych - lekki układ zastępczy
+    def layout():
+        if not store.ready.is_set():
+            return create_placeholder_layout(report.error)
+        return create_layout(store.get(), client_side=CLIENT_SIDE, background=background_manager is not None)
+    app.layout = layout
+
+    figure_cache = create_figure_cache()
+    if METRICS_ENABLED:
+        # Przed register_callbacks: pomiar obejmuje każdy rejestrowany callback
+        from metrics import init_app
+        init_app(app)
+    register_callbacks(app, store, figure_cache, client_side=CLIENT_SIDE, background_manager=background_manager)
+    register_health(app.server, store, report)
+
+    store.listeners.append(lambda fresh: figure_cache.clear())
+    # Procesy puli rozgrzewającej importują główny moduł jako __mp_main__ - tam nie ładujemy danych
+    # i nie startujemy kolejnej puli. Pierwsze rozgrzewanie po załadowaniu danych (swap w start_loading),
+    # kolejne po przeładowaniach
+    if WARMUP and __name__ != '__mp_main__':
+        from warmup import start_warmup
+        store.listeners.append(lambda fresh: start_warmup(store, figure_cache, client_side=CLIENT_SIDE))
+        if data is not None:
+            start_warmup(store, figure_cache, client_side=CLIENT_SIDE)
+    if RELOAD_INTERVAL > 0:
+        # Wątek obserwatora czeka na pierwsze dane (store.get); gdy ładowanie w tle się nie powiodło - ponawia je
+        start_watcher(store, RELOAD_INTERVAL, shared_root=SHARED_DATASET_DIR,
+                      retry=lambda: load_initial(store, report))
+
+    report.checkpoint('app')
+    if data is not None:
+        report.checkpoint('ready')
+    elif __name__ != '__mp_main__':
+        start_loading(store, report)
+    return app
+
+
+app = create_app()
+server = app.server
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,163 @@
+// Tryb kliencki (NETFLIX_CLIENT_SIDE=1): serwer wysyła jedną paczkę agregatów na zmianę filtra
+// (dcc.Store 'client-aggregates'), a wszystkie przełączniki poniżej działają lokalnie w przeglądarce.
+// pollReady działa w obu trybach - układ zastępczy przy starcie serwera.
+
+(function () {
+    var noUpdate = function () {
+        return window.dash_clientside.no_update;
+    };
+
+    // Kopia figury z paczki + wspólny szablon (w paczce jest tylko raz)
+    function figure(payload, name) {
+        var fig = JSON.parse(JSON.stringify(payload.figures[name]));
+        fig.layout.template = payload.template;
+        return fig;
+    }
+
+    // Top-N: figury są zbudowane dla maksimum kontrolki i posortowane malejąco - wystarczy przyciąć tablice
+    function topBars(payload, name, n) {
+        var fig = figure(payload, name);
+        n = parseInt(n, 10);
+        fig.data.forEach(function (trace) {
+            ['x', 'y', 'text'].forEach(function (key) {
+                if (Array.isArray(trace[key])) {
+                    trace[key] = trace[key].slice(0, n);
+                }
+            });
+            // Tryb przybliżony: wąsy błędu szkicu (sketches.py) przycinamy razem ze słupkami
+            if (trace.error_x) {
+                ['array', 'arrayminus'].forEach(function (key) {
+                    if (Array.isArray(trace.error_x[key])) {
+                        trace.error_x[key] = trace.error_x[key].slice(0, n);
+                    }
+                });
+            }
+        });
+        return fig;
+    }
+
+    function cumulative(values) {
+        var total = 0;
+        return values.map(function (v) {
+            total += v;
+            return total;
+        });
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        netflix: {
+            kpi: function (payload) {
+                if (!payload) {
+                    return [noUpdate(), noUpdate(), noUpdate(), noUpdate(), noUpdate()];
+                }
+                return payload.kpi;
+            },
+
+            map: function (payload, mapType) {
+                if (!payload) {
+                    return noUpdate();
+                }
+                return figure(payload, mapType === 'area' ? 'map_area' : 'map_bubble');
+            },
+
+            trend: function (payload, interval, view, agg) {
+                if (!payload) {
+                    return noUpdate();
+                }
+                var fig = figure(payload, 'trend_' + interval + '_' + view);
+                if (agg === 'cumsum') {
+                    // Narastająco: suma bieżąca po punktach każdej serii (jak np.cumsum w aggregates.trend_counts)
+                    fig.data.forEach(function (trace) {
+                        trace.y = cumulative(trace.y || []);
+                    });
+                }
+                return fig;
+            },
+
+            month: function (payload) {
+                return payload ? figure(payload, 'month') : noUpdate();
+            },
+
+            genreBar: function (payload, n) {
+                return payload ? topBars(payload, 'genre_bar', n) : noUpdate();
+            },
+
+            hierarchy: function (payload, hierType, n) {
+                if (!payload) {
+                    return noUpdate();
+                }
+                // Treemap i sunburst z px (path=['genre']) różnią się tylko typem śladu
+                // px układa węzły alfabetycznie, więc top-N wybieramy po rankingu z paczki (genre_rank)
+                var fig = figure(payload, 'hierarchy');
+                var top = payload.genre_rank.slice(0, parseInt(n, 10) || 0);
+                var pick = function (values) {
+                    return values.filter(function (_, i) {
+                        return top.indexOf(fig.data[0].ids[i]) >= 0;
+                    });
+                };
+                fig.data.forEach(function (trace) {
+                    trace.type = hierType === 'sunburst' ? 'sunburst' : 'treemap';
+                    ['labels', 'parents', 'values', 'customdata'].forEach(function (key) {
+                        if (Array.isArray(trace[key])) {
+                            trace[key] = pick(trace[key]);
+                        }
+                    });
+                    if (trace.marker && Array.isArray(trace.marker.colors)) {
+                        trace.marker.colors = pick(trace.marker.colors);
+                    }
+                    trace.ids = pick(trace.ids);
+                });
+                return fig;
+            },
+
+            durationSeasons: function (payload) {
+                if (!payload) {
+                    return [noUpdate(), noUpdate()];
+                }
+                return [figure(payload, 'duration'), figure(payload, 'seasons')];
+            },
+
+            director: function (payload, n) {
+                return payload ? topBars(payload, 'director', n) : noUpdate();
+            },
+
+            rating: function (payload) {
+                return payload ? figure(payload, 'rating') : noUpdate();
+            },
+
+            cast: function (payload, n) {
+                return payload ? topBars(payload, 'cast', n) : noUpdate();
+            },
+
+            toggleModals: function () {
+                // Argumenty: 22 x n_clicks (otwórz/zamknij), potem 11 x is_open
+                var states = Array.prototype.slice.call(arguments, arguments.length - 11);
+                var triggered = window.dash_clientside.callback_context.triggered;
+                if (!triggered || !triggered.length || triggered[0].prop_id === '.') {
+                    return states.map(function () {
+                        return false;
+                    });
+                }
+                var id = triggered[0].prop_id.split('.')[0];
+                var uid = id.replace(/^(open|close)-modal-/, '');
+                var ids = ['map', 'trend', 'month', 'country', 'genre', 'hierarchy', 'duration', 'seasons',
+                           'director', 'rating', 'cast'];
+                var i = ids.indexOf(uid);
+                if (i >= 0) {
+                    states[i] = !states[i];
+                }
+                return states;
+            },
+
+            // Układ zastępczy (dane ładują się w tle): gdy /ready odpowie 200, przeładowujemy stronę
+            pollReady: function (n) {
+                fetch('/ready', {cache: 'no-store'}).then(function (response) {
+                    if (response.ok) {
+                        window.location.reload();
+                    }
+                });
+                return noUpdate();
+            }
+        }
+    });
+})();
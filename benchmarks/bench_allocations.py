@@ -0,0 +1,106 @@
+# Uruchomienie (z katalogu głównego repozytorium):
+#   python -m benchmarks.bench_allocations --scales 1 10
+# Szczytowa alokacja (tracemalloc) ścieżki danych callbacków przy filtrach krzyżowych (zimny cache wycinków
+# i wykresów) względem budżetu. Budżet ścieżki danych liczony jest w bajtach na wiersz wejścia (wiersze
+# katalogu + wpisy tabel pomostowych), budżet callbacku to ten sam limit plus stały narzut na figurę Plotly.
+# Kod wyjścia 1 przy przekroczeniu budżetu - regresje w kopiowaniu ramek widać przed wdrożeniem.
+# Te same budżety jako testy: tests/test_allocations.py.
+import argparse
+import sys
+import tracemalloc
+
+from aggregates import TYPES, daily_counts
+from benchmarks.synthetic import generate_catalog, scaled_size
+from data import Dataset, parse_catalog
+from figure_cache import FigureCache
+from reload import DatasetStore
+
+# Bajty na wiersz wejścia dla wycinka kostki i dziennych liczników trendu
+DATA_BUDGET_PER_ROW = 8.0
+# Stały narzut budowania figury (Plotly Express + odchudzanie), niezależny od rozmiaru katalogu
+FIGURE_BUDGET_BYTES = 6 * 2 ** 20
+BUILDERS = {
+    'map_figure': ('area',), 'trend_figure': ('M', 'split', 'cumsum'), 'month_figure': (),
+    'country_figure': None, 'genre_bar_figure': (20,), 'genre_hierarchy_figure': ('treemap', 50),
+    'duration_figure': (), 'seasons_figure': (), 'director_figure': (30,), 'rating_figure': (),
+    'cast_figure': (30,), 'kpi_values': (),
+}
+
+
+def input_rows(data):
+    # Wiersze katalogu + wpisy tabel pomostowych - podstawa budżetu w bajtach na wiersz
+    return len(data.df) + sum(len(bridge) for bridge in data.bridges.values())
+
+
+def selections(data):
+    first = lambda name: data.count_values(name).index[0]
+    year = int(data.df['year_added'].max())
+    return [{'country': [first('country')]}, {'genre': [first('genre')], 'year_added': [year]},
+            {'text': ['love']}]
+
+
+def peak(fn, *args):
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    fn(*args)
+    return tracemalloc.get_traced_memory()[1] - before
+
+
+def data_path(data, selected_type, selection):
+    # To, co liczy callback przed figurą: wycinek kostki i (dla trendu) dzienne liczniki
+    data._slices.clear()
+    data.slice(selected_type, selection)
+    daily_counts(data.timeline, data.selection_mask(selected_type, selection))
+
+
+def measure(data):
+    # Dash (callbacks, layout) dopiero tutaj - ścieżka danych i budżety bez niego (patrz tests/test_allocations.py)
+    from benchmarks.bench_callbacks import RecordingApp
+    from callbacks import register_callbacks
+    figure_cache = FigureCache(64 * 2 ** 20)
+    builders = register_callbacks(RecordingApp(), DatasetStore(data), figure_cache)
+    countries = data.count_values('country').index[:2].tolist()
+    calls = lambda selected_type, selection: [('data_path', data_path, (data, selected_type, selection))] + [
+        (name, builders[name], (selected_type,) + (tuple(countries) if controls is None else controls) + (selection,))
+        for name, controls in BUILDERS.items()]
+    # Jednorazowe koszty (kody wierszy zbioru, bufory wątku, leniwy import plotly.express i szablon figur)
+    # poza pomiarem - mierzymy stan ustalony
+    for _, fn, args in calls('All', selections(data)[0]):
+        fn(*args)
+
+    results = {}
+    for selected_type in TYPES:
+        for selection in selections(data):
+            for name, fn, args in calls(selected_type, selection):
+                data._slices.clear()
+                figure_cache.clear()
+                results[name] = max(results.get(name, 0), peak(fn, *args))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Budżety alokacji callbacków (tracemalloc)")
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10])
+    args = parser.parse_args()
+
+    failures = 0
+    for scale in args.scales:
+        data = Dataset(parse_catalog(generate_catalog(scaled_size(scale))))
+        rows = input_rows(data)
+        data_budget = DATA_BUDGET_PER_ROW * rows
+        tracemalloc.start()
+        results = measure(data)
+        tracemalloc.stop()
+
+        print(f"skala {scale:g}: {len(data.df)} tytułów, {rows} wierszy wejścia")
+        print(f"  {'callback':<24} {'szczyt KB':>10} {'budżet KB':>10} {'B/wiersz':>9}")
+        for name, size in results.items():
+            budget = data_budget if name == 'data_path' else data_budget + FIGURE_BUDGET_BYTES
+            status = '' if size <= budget else '  PRZEKROCZONY'
+            failures += size > budget
+            print(f"  {name:<24} {size / 1024:>10.0f} {budget / 1024:>10.0f} {size / rows:>9.2f}{status}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# Uruchomienie (z katalogu głównego repozytorium):
+#   python -m benchmarks.bench_backends --scales 1 10 --backends duckdb sqlite
+# Zgodność i czas silników agregacji (query_backend.py) względem pandas: dla każdego typu i zestawu filtrów
+# krzyżowych porównuje cały wycinek kostki z Dataset.slice. Kod wyjścia 1 przy jakiejkolwiek różnicy.
+# Zgodność w CI: tests/test_query_backend.py (te same zestawy filtrów, mniejszy katalog).
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregates import TYPES
+from benchmarks.synthetic import generate_catalog, scaled_size
+from data import load_and_process_data
+from query_backend import create_query_backend
+
+
+def selections(data):
+    # Po jednej wartości z każdej fasety, kombinacje i zapytanie pełnotekstowe
+    first = lambda name: data.count_values(name).index[0]
+    country, genre, director = first('country'), first('genre'), first('director')
+    rating = data.df['rating'].value_counts().index[0]
+    year = int(data.df['year_added'].max())
+    return [
+        {},
+        {'country': [country]},
+        {'country': sorted([country, data.count_values('country').index[1]])},
+        {'genre': [genre]},
+        {'director': [director]},
+        {'rating': [rating]},
+        {'year_added': [year]},
+        {'country': [country], 'genre': [genre], 'year_added': [year - 1, year]},
+        {'text': ['love']},
+        {'genre': [genre], 'text': ['the']},
+        {'country': ['Nie istnieje']},
+    ]
+
+
+def _plain(value):
+    # Porównanie wartości, nie typów (kategorie / szerokość liczb całkowitych różnią się między silnikami)
+    if isinstance(value, pd.DataFrame):
+        return value.astype({c: object for c in value.columns if c != 'count'}).astype({'count': np.int64})
+    if isinstance(value, pd.Series):
+        return value.astype(np.int64).set_axis(pd.MultiIndex.from_arrays(
+            [value.index.get_level_values(i).astype(object) for i in range(value.index.nlevels)],
+            names=value.index.names))
+    return value
+
+
+def differences(expected, actual):
+    found = []
+    for key, value in expected.items():
+        try:
+            if isinstance(value, pd.DataFrame):
+                pd.testing.assert_frame_equal(_plain(value), _plain(actual[key]), check_dtype=False)
+            elif isinstance(value, pd.Series):
+                pd.testing.assert_series_equal(_plain(value), _plain(actual[key]), check_dtype=False)
+            elif value != actual[key]:
+                found.append(f'{key}: {value!r} != {actual[key]!r}')
+        except AssertionError as e:
+            found.append(f'{key}: {str(e).splitlines()[0]}')
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zgodność i czas silników agregacji względem pandas")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--backends', nargs='+', default=['duckdb', 'sqlite'])
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'scale':>6} {'backend':>8} {'queries':>8} {'pandas ms':>10} {'backend ms':>11} {'diffs':>6}")
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'catalog.csv')
+            generate_catalog(scaled_size(scale)).to_csv(path, index=False)
+            # Cache Parquet w katalogu tymczasowym - z niego czytają silniki SQL
+            data = load_and_process_data(path, cache_dir=tmp)
+            queries = [(t, s) for t in TYPES for s in selections(data)]
+
+            start = time.perf_counter()
+            expected = [data.slice(t, s) for t, s in queries]
+            pandas_ms = (time.perf_counter() - start) * 1000
+
+            for name in args.backends:
+                backend = create_query_backend(name, cache_dir=tmp)
+                start = time.perf_counter()
+                actual = [backend.slice(data, t, s) for t, s in queries]
+                backend_ms = (time.perf_counter() - start) * 1000
+                diffs = 0
+                for (t, s), want, got in zip(queries, expected, actual):
+                    for diff in differences(want, got):
+                        diffs += 1
+                        print(f"  {name} {t} {s}: {diff}")
+                failures += diffs
+                print(f"{scale:>6} {name:>8} {len(queries):>8} {pandas_ms:>10.0f} {backend_ms:>11.0f} {diffs:>6}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+# Uruchomienie (z katalogu głównego repozytorium):
+#   python -m benchmarks.bench_callbacks --scales 1 10 100 --output wyniki.json
+#   python -m benchmarks.bench_callbacks --scales 10 --baseline wyniki.json   # kod wyjścia 1 przy regresji
+# Mierzy load_and_process_data, create_layout i każdy callback dla wszystkich kombinacji kontrolek
+# (zimny cache wykresów, potem ciepły). Wynik w JSON, do porównania z poprzednim przebiegiem.
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregates import TYPES
+from benchmarks.synthetic import generate_catalog, scaled_size
+from config import CACHE_DIR
+from data import load_and_process_data
+from figure_cache import FigureCache
+from layout import create_layout
+from reload import DatasetStore
+
+TOP_N = {'genre': [10, 15, 20], 'hierarchy': list(range(5, 51, 5)), 'slider': list(range(5, 31, 5))}
+MODAL_IDS = ["map", "trend", "month", "country", "genre", "hierarchy", "duration", "seasons", "director", "rating",
+             "cast"]
+
+
+class RecordingApp:
+    # Zamiast dash.Dash przy rejestracji: zbiera funkcje callbacków, żeby wołać je bezpośrednio
+
+    def __init__(self):
+        self.callbacks = {}
+
+    def callback(self, *args, **kwargs):
+        def decorator(fn):
+            self.callbacks[fn.__name__] = fn
+            return fn
+        return decorator
+
+    def clientside_callback(self, *args, **kwargs):
+        pass
+
+
+def set_trigger(prop_id):
+    # ctx.triggered_id poza żądaniem - ustawiamy kontekst tak jak dispatcher Dash
+    from dash._callback_context import context_value
+    from dash._utils import AttributeDict
+    context_value.set(AttributeDict(triggered_inputs=[{'prop_id': prop_id, 'value': None}] if prop_id else []))
+
+
+def scenarios(data, client_side=False):
+    # (callback, wyzwalacz, argumenty) - wszystkie kombinacje kontrolek dla kilku filtrów krzyżowych
+    countries = data.count_values('country', None).index[:4].tolist()
+    genres = data.count_values('genre', None).index[:1].tolist()
+    year = int(data.df['year_added'].max())
+    selections = [{}, {'country': countries[:1]}, {'genre': genres, 'year_added': [year]}, {'text': ['love']}]
+
+    calls = []
+    for selection, selected_type in itertools.product(selections, TYPES):
+        base = (selected_type,)
+        if client_side:
+            calls.append(('update_client_aggregates', 'type-filter.value', base + (selection,)))
+        else:
+            calls.append(('update_kpi', 'type-filter.value', base + (selection,)))
+            for map_type in ['area', 'bubble']:
+                calls.append(('update_map', 'map-type.value', base + (map_type, selection)))
+            for combo in itertools.product(['M', 'Q', 'Y'], ['total', 'split'], ['count', 'cumsum']):
+                calls.append(('update_trend', 'trend-interval.value', base + combo + (selection,)))
+            calls.append(('update_month', 'type-filter.value', base + (selection,)))
+            for n in TOP_N['genre']:
+                calls.append(('update_genre_bar', 'type-filter.value', base + (n, selection)))
+                calls.append(('update_genre_bar', 'genre-top-n.value', base + (n, selection)))
+            for hier_type, n in itertools.product(['treemap', 'sunburst'], TOP_N['hierarchy']):
+                calls.append(('update_genre_hierarchy', 'hierarchy-type.value', base + (hier_type, n, selection)))
+                calls.append(('update_genre_hierarchy', 'hierarchy-n.value', base + (hier_type, n, selection)))
+            calls.append(('update_duration_seasons', 'type-filter.value', base + (selection,)))
+            for n in TOP_N['slider']:
+                calls.append(('update_directors', 'type-filter.value', base + (n, selection)))
+                calls.append(('update_directors', 'director-slider.value', base + (n, selection)))
+                calls.append(('update_cast', 'type-filter.value', base + (n, selection)))
+                calls.append(('update_cast', 'cast-slider.value', base + (n, selection)))
+            calls.append(('update_ratings', 'type-filter.value', base + (selection,)))
+        for c1, c2 in itertools.combinations(countries, 2):
+            calls.append(('update_country_comparison', 'country-1.value', base + (c1, c2, selection)))
+
+    for prefix in ['', 'u', 'ind', 'south k', 'zz']:
+        calls.append(('update_country_1_options', 'country-1.search_value', (prefix, countries[0])))
+
+    for selection in selections:
+        calls.append(('update_cross_filter_summary', 'cross-filter.data', (selection,)))
+    click = {'points': [{'location': countries[0]}]}
+    calls.append(('update_cross_filter', 'map-graph.clickData', (click, None, None, 0, '', {})))
+    for query in ['l', 'lo', 'love', 'love st', 'love story']:
+        calls.append(('update_cross_filter', 'text-search.value', (None, None, None, 0, query, {})))
+    if not client_side:
+        for uid, action in itertools.product(MODAL_IDS, ['open', 'close']):
+            calls.append(('toggle_modals', f'{action}-modal-{uid}.n_clicks', (0,) * 22 + (False,) * 11))
+    return calls
+
+
+def stats(durations):
+    values = np.array(durations) * 1000
+    return {
+        'n': len(values),
+        'total_s': round(float(values.sum()) / 1000, 6),
+        'mean_ms': round(float(values.mean()), 3),
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'max_ms': round(float(values.max()), 3),
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run_callbacks(data, client_side=False):
+    from callbacks import register_callbacks
+
+    app = RecordingApp()
+    register_callbacks(app, DatasetStore(data), FigureCache(512 * 2 ** 20), client_side=client_side)
+    calls = scenarios(data, client_side)
+
+    results = {}
+    for phase in ['cold', 'warm']:
+        durations = {}
+        for name, trigger, args in calls:
+            set_trigger(trigger)
+            _, seconds = timed(app.callbacks[name], *args)
+            durations.setdefault(name, []).append(seconds)
+        for name, values in durations.items():
+            results.setdefault(name, {})[phase] = stats(values)
+    set_trigger(None)
+    return results
+
+
+def run_scale(scale, client_side=False, seed=0):
+    n_rows = scaled_size(scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'catalog.csv')
+        cache_dir = os.path.join(tmp, 'cache')
+        generate_catalog(n_rows, seed=seed).to_csv(path, index=False)
+
+        _, parse_s = timed(load_and_process_data, path, cache_dir, False)
+        load_and_process_data(path, cache_dir)
+        data, cached_s = timed(load_and_process_data, path, cache_dir)
+
+    _, layout_s = timed(create_layout, data)
+    return {
+        'scale': scale,
+        'rows': len(data.df),
+        'load': {'parse_s': round(parse_s, 4), 'cached_s': round(cached_s, 4)},
+        'layout_s': round(layout_s, 4),
+        'callbacks': run_callbacks(data, client_side),
+    }
+
+
+def environment():
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = ''
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_rev': rev,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    # Regresja: p50 na zimnym cache (lub czas ładowania) wolniejszy o więcej niż tolerancja i > 1 ms
+    previous = {r['scale']: r for r in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        old = previous.get(result['scale'])
+        if old is None:
+            continue
+        pairs = [('load.parse_s', old['load']['parse_s'] * 1000, result['load']['parse_s'] * 1000),
+                 ('layout_s', old['layout_s'] * 1000, result['layout_s'] * 1000)]
+        for name, phases in result['callbacks'].items():
+            if name in old['callbacks']:
+                pairs.append((name, old['callbacks'][name]['cold']['p50_ms'], phases['cold']['p50_ms']))
+        for name, before, after in pairs:
+            if after > before * tolerance and after - before > 1:
+                regressions.append((result['scale'], name, before, after))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark callbacków dashboardu")
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10])
+    parser.add_argument('--client-side', action='store_true', help="tryb kliencki (jedna paczka agregatów)")
+    parser.add_argument('--output', default=os.path.join(CACHE_DIR, 'benchmarks',
+                                                         f'callbacks-{time.strftime("%Y%m%d-%H%M%S")}.json'))
+    parser.add_argument('--baseline', help="poprzedni wynik JSON do porównania")
+    parser.add_argument('--tolerance', type=float, default=1.25)
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {'meta': dict(environment(), client_side=args.client_side), 'results': []}
+    for scale in args.scales:
+        result = run_scale(scale, args.client_side)
+        results['results'].append(result)
+        print(f"skala {scale:g}: {result['rows']} tytułów, parsowanie {result['load']['parse_s']:.2f}s, "
+              f"cache {result['load']['cached_s']:.2f}s, layout {result['layout_s'] * 1000:.1f} ms")
+        print(f"  {'callback':<28} {'n':>5} {'zimny p50':>10} {'p95':>10} {'ciepły p50':>11}")
+        for name, phases in sorted(result['callbacks'].items()):
+            cold, warm = phases['cold'], phases['warm']
+            print(f"  {name:<28} {cold['n']:>5} {cold['p50_ms']:>10.2f} {cold['p95_ms']:>10.2f} "
+                  f"{warm['p50_ms']:>11.2f}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Zapisano {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for scale, name, before, after in regressions:
+            print(f"REGRESJA skala {scale:g} {name}: {before:.2f} ms -> {after:.2f} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# Uruchomienie (z katalogu głównego repozytorium):
+#   python -m benchmarks.bench_ingest --sizes 10000 1000000 10000000 --legacy
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_catalog
+from data import process_catalog
+
+
+def legacy_parse(df):
+    # Poprzednia implementacja (apply wiersz po wierszu + format='mixed') - punkt odniesienia
+    df['date_added'] = pd.to_datetime(df['date_added'].str.strip(), format='mixed', errors='coerce')
+    df = df.dropna(subset=['date_added'])
+
+    def extract_minutes(x):
+        if isinstance(x, str) and 'min' in x:
+            return int(x.split(' ')[0])
+        return None
+
+    def extract_seasons(x):
+        if isinstance(x, str) and 'Season' in x:
+            return int(x.split(' ')[0])
+        return None
+
+    df['duration_min'] = df['duration'].apply(extract_minutes)
+    df['seasons_count'] = df['duration'].apply(extract_seasons)
+    return df
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark wczytywania katalogu")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument('--legacy', action='store_true', help="zmierz też starą ścieżkę parsowania")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'read_csv':>10} {'process':>10} {'legacy':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = os.path.join(tmp, f'catalog_{n}.csv')
+            generate_catalog(n).to_csv(path, index=False)
+
+            start = time.perf_counter()
+            raw = pd.read_csv(path)
+            read_s = time.perf_counter() - start
+
+            process_s = timed(process_catalog, raw.copy())
+            legacy_s = timed(legacy_parse, raw.copy()) if args.legacy else float('nan')
+            print(f"{n:>10} {read_s:>10.2f} {process_s:>10.2f} {legacy_s:>10.2f}")
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# Uruchomienie (z katalogu głównego repozytorium):
+#   python -m benchmarks.bench_payload [--scale 10]
+# Rozmiar odpowiedzi (JSON i gzip) każdego wykresu: pełne figury plotly_dark vs odchudzone (figure_payload.py),
+# oraz czas serializacji silnikiem 'json' i 'orjson'.
+import argparse
+import gzip
+import time
+
+import plotly.io as pio
+
+from benchmarks.bench_callbacks import RecordingApp, set_trigger
+from benchmarks.synthetic import generate_catalog, scaled_size
+from data import load_and_process_data, process_catalog
+from figure_cache import FigureCache
+from reload import DatasetStore
+
+# (callback, wyzwalacz, argumenty) - po jednym wywołaniu na wykres, wartości domyślne kontrolek
+FIGURES = [
+    ('update_map', 'map-type.value', ('All', 'area', {})),
+    ('update_map', 'map-type.value', ('All', 'bubble', {})),
+    ('update_trend', 'trend-interval.value', ('All', 'M', 'split', 'count', {})),
+    ('update_month', 'type-filter.value', ('All', {})),
+    ('update_country_comparison', 'country-1.value', ('All', 'United States', 'India', {})),
+    ('update_genre_bar', 'type-filter.value', ('All', 10, {})),
+    ('update_genre_hierarchy', 'type-filter.value', ('All', 'treemap', 20, {})),
+    ('update_duration_seasons', 'type-filter.value', ('All', {})),
+    ('update_directors', 'type-filter.value', ('All', 10, {})),
+    ('update_ratings', 'type-filter.value', ('All', {})),
+    ('update_cast', 'type-filter.value', ('All', 10, {})),
+]
+
+
+def build(data, slim_figures):
+    from callbacks import register_callbacks
+
+    app = RecordingApp()
+    register_callbacks(app, DatasetStore(data), FigureCache(256 * 2 ** 20), slim_figures=slim_figures)
+    outputs = []
+    for name, trigger, args in FIGURES:
+        set_trigger(trigger)
+        result = app.callbacks[name](*args)
+        label = f'{name}({args[1]})' if name in ('update_map', 'update_trend') else name
+        outputs.append((label, result))
+    set_trigger(None)
+    return outputs
+
+
+def encode(value, engine):
+    return pio.json.to_json_plotly(value, engine=engine).encode('utf-8')
+
+
+def timed_encode(value, engine, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode(value, engine)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rozmiar i serializacja figur")
+    parser.add_argument('--scale', type=float, default=0, help="syntetyczny katalog (0 = prawdziwy CSV)")
+    args = parser.parse_args()
+
+    data = process_catalog(generate_catalog(scaled_size(args.scale))) if args.scale else load_and_process_data()
+    full = build(data, slim_figures=False)
+    slim = build(data, slim_figures=True)
+
+    print(f"{'wykres':<34} {'pełna B':>9} {'odch. B':>9} {'gzip pełna':>11} {'gzip odch.':>11} {'json ms':>8} "
+          f"{'orjson ms':>10}")
+    totals = [0, 0, 0, 0]
+    for (label, before), (_, after) in zip(full, slim):
+        raw_before, raw_after = encode(before, 'json'), encode(after, 'orjson')
+        sizes = [len(raw_before), len(raw_after), len(gzip.compress(raw_before)), len(gzip.compress(raw_after))]
+        totals = [t + s for t, s in zip(totals, sizes)]
+        print(f"{label:<34} {sizes[0]:>9} {sizes[1]:>9} {sizes[2]:>11} {sizes[3]:>11} "
+              f"{timed_encode(before, 'json') * 1000:>8.2f} {timed_encode(after, 'orjson') * 1000:>10.2f}")
+    print(f"{'RAZEM':<34} {totals[0]:>9} {totals[1]:>9} {totals[2]:>11} {totals[3]:>11}")
+    print(f"Odchudzenie: {totals[1] / totals[0]:.0%} rozmiaru JSON, {totals[3] / totals[2]:.0%} po gzip")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# Uruchomienie (z katalogu głównego repozytorium):
+#   python -m benchmarks.bench_sketches --sizes 10000 1000000 --capacity 256 1024 --chunk-rows 65536 1000000
+# Porównuje tryb przybliżony (sketches.py) z dokładnymi licznikami: czas budowy szkiców vs count_values,
+# pamięć, trafność top-N, czy prawdziwe liczby mieszczą się w granicach błędu i błąd HyperLogLog.
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from aggregates import TYPES
+from benchmarks.synthetic import generate_catalog
+from config import SKETCH_CHUNK_ROWS
+from data import Dataset, parse_catalog
+from sketches import DISTINCT, HEAVY_HITTERS, build_sketches
+
+TOP_N = 30
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def exact_counts(data):
+    return {(t, name): data.count_values(name, data.type_mask(t)) for t in TYPES
+            for name in dict.fromkeys(list(HEAVY_HITTERS) + DISTINCT)}
+
+
+def accuracy(data, sketches, exact):
+    recall, bounds_ok, max_error, hll_error = [], True, 0, 0.0
+    for t in TYPES:
+        for name, key in HEAVY_HITTERS.items():
+            counts = exact[(t, name)]
+            approx = sketches.top(name, t, TOP_N)
+            true = counts.reindex(approx[key]).fillna(0).to_numpy()
+            estimate = approx['count'].to_numpy()
+            bounds_ok &= bool(np.all((estimate - approx['error'].to_numpy() <= true) & (true <= estimate)))
+            max_error = max(max_error, int((estimate - true).max(initial=0)))
+            # Top-N bez remisów na granicy (wartości ściśle większe od (N+1)-ej)
+            threshold = counts.iloc[TOP_N] if len(counts) > TOP_N else 0
+            heavy = set(counts.index[counts.to_numpy() > threshold])
+            recall.append(len(heavy & set(approx[key])) / max(len(heavy), 1))
+        for name in DISTINCT:
+            estimate, _ = sketches.distinct_count(name, t)
+            distinct = len(exact[(t, name)])
+            hll_error = max(hll_error, abs(estimate - distinct) / max(distinct, 1))
+    return min(recall), bounds_ok, max_error, hll_error
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark trybu przybliżonego (szkice strumieniowe)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--capacity', type=int, nargs='+', default=[256, 1024])
+    parser.add_argument('--chunk-rows', type=int, nargs='+', default=[SKETCH_CHUNK_ROWS])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'capacity':>9} {'chunk':>8} {'exact s':>8} {'sketch s':>9} {'sketch KB':>10} "
+          f"{'recall':>7} {'bounds':>7} {'max err':>8} {'hll err':>8}")
+    for n in args.sizes:
+        data = Dataset(parse_catalog(generate_catalog(n)), approximate=False)
+        exact, exact_s = timed(exact_counts, data)
+        for capacity, chunk_rows in itertools.product(args.capacity, args.chunk_rows):
+            sketches, sketch_s = timed(build_sketches, data, chunk_rows=chunk_rows, capacity=capacity)
+            recall, bounds_ok, max_error, hll_error = accuracy(data, sketches, exact)
+            print(f"{n:>10} {capacity:>9} {chunk_rows:>8} {exact_s:>8.2f} {sketch_s:>9.2f} {sketches.memory_bytes() / 1024:>10.0f} "
+                  f"{recall:>7.0%} {str(bounds_ok):>7} {max_error:>8} {hll_error:>8.2%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+# Uruchomienie (z katalogu głównego repozytorium):
+#   python -m benchmarks.bench_startup --runs 3 --output wyniki.json
+#   python -m benchmarks.bench_startup --baseline wyniki.json   # kod wyjścia 1 przy regresji
+# Zimny start workera w osobnym procesie (python -X importtime): po jakim czasie odpowiada /health,
+# kiedy /ready zwraca 200 (dane załadowane w tle), raport etapów z /health i najdroższe pakiety przy imporcie.
+# Pierwszy przebieg bez cache Parquet (parsowanie CSV), kolejne z cache. Ciężkie moduły z LAZY_MODULES
+# nie mogą być zaimportowane przy starcie - import ich z powrotem na starcie to też regresja.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_callbacks import environment
+
+LAZY_MODULES = ['plotly.express']
+TOP_PACKAGES = 12
+# Wiersz wyniku sondy (na stdout trafia też log aplikacji, np. raport startu z wątku ładującego)
+MARKER = 'STARTUP_RESULT '
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import app
+client = app.server.test_client()
+health = client.get('/health')
+health_s = time.perf_counter() - start
+while client.get('/ready').status_code != 200:
+    if client.get('/health').get_json()['startup']['error'] or time.perf_counter() - start > {timeout}:
+        break
+    time.sleep(0.01)
+ready_s = time.perf_counter() - start
+print({marker!r} + json.dumps({{'health_status': health.status_code, 'health_s': health_s, 'ready_s': ready_s,
+                  'startup': client.get('/health').get_json()['startup'],
+                  'lazy_loaded': [name for name in {lazy!r} if name in sys.modules]}}))
+'''
+
+
+def parse_importtime(stderr):
+    # "import time: self [us] | cumulative | pakiet" -> łączny czas własny per pakiet najwyższego poziomu
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+    return {name: round(us / 1e6, 4) for name, us in sorted(packages.items(), key=lambda item: -item[1])}
+
+
+def run_once(cache_dir, timeout):
+    env = dict(os.environ, NETFLIX_CACHE_DIR=cache_dir, NETFLIX_WARMUP='0', NETFLIX_RELOAD_INTERVAL='0')
+    probe = PROBE.format(timeout=timeout, lazy=LAZY_MODULES, marker=MARKER)
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe], env=env,
+                               capture_output=True, text=True, timeout=timeout + 60)
+    wall_s = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'probe failed')
+    line = next(line for line in completed.stdout.splitlines() if line.startswith(MARKER))
+    result = json.loads(line[len(MARKER):])
+    result['process_s'] = wall_s
+    result['imports'] = parse_importtime(completed.stderr)
+    return result
+
+
+def summarize(runs):
+    median = lambda key: round(statistics.median(run[key] for run in runs), 4)
+    return {'n': len(runs), 'health_s': median('health_s'), 'ready_s': median('ready_s'),
+            'process_s': median('process_s')}
+
+
+def compare(results, baseline, tolerance):
+    # Regresja: mediana czasu do /health lub /ready wolniejsza o więcej niż tolerancja i > 50 ms
+    regressions = []
+    for phase in ['cold', 'cached']:
+        old, new = baseline['results'].get(phase), results['results'].get(phase)
+        if not old or not new:
+            continue
+        for key in ['health_s', 'ready_s']:
+            if new[key] > old[key] * tolerance and new[key] - old[key] > 0.05:
+                regressions.append((phase, key, old[key], new[key]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark startu aplikacji (czas do /health i /ready, importy)")
+    parser.add_argument('--runs', type=int, default=3, help="przebiegi z cache Parquet (po jednym zimnym)")
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--output', help="zapis wyniku JSON")
+    parser.add_argument('--baseline', help="poprzedni wynik JSON do porównania")
+    parser.add_argument('--tolerance', type=float, default=1.25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold = run_once(cache_dir, args.timeout)
+        cached = [run_once(cache_dir, args.timeout) for _ in range(args.runs)]
+
+    results = {'meta': environment(), 'results': {'cold': summarize([cold]), 'cached': summarize(cached)},
+               'startup': cached[-1]['startup'], 'imports': cached[-1]['imports'],
+               'lazy_loaded': sorted({name for run in [cold] + cached for name in run['lazy_loaded']})}
+
+    for phase, summary in results['results'].items():
+        print(f"{phase:>7}: /health po {summary['health_s']:.2f} s, /ready po {summary['ready_s']:.2f} s, "
+              f"proces {summary['process_s']:.2f} s (mediana z {summary['n']})")
+    checkpoints, phases = results['startup']['checkpoints'], results['startup']['phases']
+    print(f"  etapy: importy {checkpoints.get('imports', 0):.2f} s, aplikacja {checkpoints.get('app', 0):.2f} s, "
+          f"dane {phases.get('data', 0):.2f} s")
+    print(f"  {'pakiet':<28} {'import s':>9}")
+    for name, seconds in list(results['imports'].items())[:TOP_PACKAGES]:
+        print(f"  {name:<28} {seconds:>9.3f}")
+
+    failures = 0
+    if results['lazy_loaded']:
+        failures += 1
+        print(f"REGRESJA: zaimportowane przy starcie: {', '.join(results['lazy_loaded'])}")
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Zapisano {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        for phase, key, before, after in compare(results, baseline, args.tolerance):
+            failures += 1
+            print(f"REGRESJA {phase} {key}: {before:.2f} s -> {after:.2f} s")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,409 @@
+# Test obciążeniowy serwera Dash (z katalogu głównego repozytorium):
+#   python -m benchmarks.load_test --modes single threaded gunicorn --sessions 50 --duration 60
+#   python -m benchmarks.load_test --modes gunicorn --workers 4 --scale 10 --output wyniki.json
+# Uruchamia aplikację lokalnie w wybranej konfiguracji i odtwarza sesje użytkowników przeciwko
+# /_dash-update-component: ładowanie strony, zmiany filtra typu (rozchodzą się do kilku callbacków),
+# suwaki top-N, przełączniki wykresów i kliknięcia filtra krzyżowego. Raport: p50/p95/p99, przepustowość,
+# CPU i pamięć procesów serwera (z /proc, tylko Linux).
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.synthetic import generate_catalog, scaled_size
+
+UPDATE_PATH = '/_dash-update-component'
+# Przeglądarka wysyła równolegle najwyżej tyle żądań do jednego hosta
+BROWSER_CONNECTIONS = 6
+SERVER_MODES = {
+    'single': "from app import app; app.run(host='127.0.0.1', port={port}, threaded=False, debug=False)",
+    'threaded': "from app import app; app.run(host='127.0.0.1', port={port}, threaded=True, debug=False)",
+}
+# Interakcje: (waga, zmieniana właściwość, generator wartości)
+INTERACTIONS = [
+    (0.35, 'type-filter.value', lambda rng, ctx: rng.choice(['All', 'Movie', 'TV Show'])),
+    (0.10, 'map-type.value', lambda rng, ctx: rng.choice(['area', 'bubble'])),
+    (0.10, 'trend-interval.value', lambda rng, ctx: rng.choice(['M', 'Q', 'Y'])),
+    (0.05, 'trend-agg.value', lambda rng, ctx: rng.choice(['count', 'cumsum'])),
+    (0.10, 'genre-top-n.value', lambda rng, ctx: rng.choice([10, 15, 20])),
+    (0.05, 'hierarchy-type.value', lambda rng, ctx: rng.choice(['treemap', 'sunburst'])),
+    (0.05, 'director-slider.value', lambda rng, ctx: rng.choice([5, 10, 15, 20, 25, 30])),
+    (0.05, 'cast-slider.value', lambda rng, ctx: rng.choice([5, 10, 15, 20, 25, 30])),
+    (0.05, 'country-1.value', lambda rng, ctx: rng.choice(ctx['countries'])),
+    (0.05, 'country-1.search_value', lambda rng, ctx: rng.choice(ctx['countries'])[:rng.randint(1, 3)]),
+    (0.10, 'map-graph.clickData', lambda rng, ctx: {'points': [{'location': rng.choice(ctx['countries'][:20])}]}),
+    (0.05, 'text-search.value', lambda rng, ctx: rng.choice(['', 'love', 'christmas', 'war', 'family', 'crime'])),
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, port, env, workers, threads):
+    if mode == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-b', f'127.0.0.1:{port}', '-w', str(workers),
+                   '--threads', str(threads), '-c', 'gunicorn.conf.py', 'app:server']
+    else:
+        command = [sys.executable, '-c', SERVER_MODES[mode].format(port=port)]
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def wait_ready(port, process, timeout=300, confirmations=1):
+    # /ready zwraca 503, dopóki worker nie załaduje danych (do tego czasu /_dash-layout to układ zastępczy).
+    # Przy kilku workerach gunicorna żądania trafiają do różnych procesów - czekamy na kilka odpowiedzi 200 z rzędu
+    deadline = time.time() + timeout
+    ready = 0
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Serwer zakończył działanie: {process.stderr.read().decode(errors='replace')[-2000:]}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/ready')
+            response = conn.getresponse()
+            response.read()
+            ready = ready + 1 if response.status == 200 else 0
+            if ready >= confirmations:
+                return
+        except OSError:
+            ready = 0
+        time.sleep(0.5 if not ready else 0.05)
+    raise TimeoutError("Serwer nie wystartował")
+
+
+def get_json(port, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    conn.request('GET', path)
+    return json.loads(conn.getresponse().read())
+
+
+def initial_state(node, state):
+    # Początkowe wartości właściwości wszystkich komponentów z id (z /_dash-layout)
+    if isinstance(node, list):
+        for child in node:
+            initial_state(child, state)
+    elif isinstance(node, dict) and 'props' in node:
+        props = node['props']
+        if isinstance(props.get('id'), str):
+            for key, value in props.items():
+                if key not in ('id', 'children'):
+                    state[f"{props['id']}.{key}"] = value
+        initial_state(props.get('children'), state)
+
+
+def has_component(node, component_id):
+    if isinstance(node, list):
+        return any(has_component(child, component_id) for child in node)
+    if isinstance(node, dict) and 'props' in node:
+        props = node['props']
+        return props.get('id') == component_id or has_component(props.get('children'), component_id)
+    return False
+
+
+def parse_outputs(output):
+    # '..a.children...b.children..' (wiele wyjść) albo 'a.figure'
+    if output.startswith('..'):
+        specs = output[2:-2].split('...')
+        return [dict(zip(['id', 'property'], s.rsplit('.', 1))) for s in specs], True
+    return dict(zip(['id', 'property'], output.rsplit('.', 1))), False
+
+
+class Session:
+    # Jedna symulowana karta przeglądarki: stan właściwości + łańcuch callbacków jak w dash-renderer
+
+    def __init__(self, port, dependencies, state, context, rng, think_time):
+        self.port = port
+        self.dependencies = dependencies
+        self.state = dict(state)
+        self.context = context
+        self.rng = rng
+        self.think_time = think_time
+        self.pool = ThreadPoolExecutor(BROWSER_CONNECTIONS)
+        self.local = threading.local()
+        self.requests = []
+        self.interactions = []
+        self.errors = 0
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=120)
+        return conn
+
+    def _call(self, dependency, changed):
+        outputs, _ = parse_outputs(dependency['output'])
+        body = {
+            'output': dependency['output'],
+            'outputs': outputs,
+            'inputs': [dict(item, value=self.state.get(f"{item['id']}.{item['property']}"))
+                       for item in dependency['inputs']],
+            'state': [dict(item, value=self.state.get(f"{item['id']}.{item['property']}"))
+                      for item in dependency.get('state', [])],
+            'changedPropIds': changed,
+        }
+        payload = json.dumps(body).encode('utf-8')
+        start = time.perf_counter()
+        try:
+            conn = self._connection()
+            conn.request('POST', UPDATE_PATH, payload, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.local.conn = None
+            self.errors += 1
+            return {}
+        elapsed = time.perf_counter() - start
+        self.requests.append((dependency['output'], elapsed, len(data)))
+        if status == 204:
+            return {}
+        if status != 200:
+            self.errors += 1
+            return {}
+        return json.loads(data).get('response', {})
+
+    def fire(self, changed):
+        # Wywołuje zależne callbacki równolegle, potem kolejne poziomy łańcucha (np. cross-filter -> wykresy)
+        start = time.perf_counter()
+        initial = changed is None
+        while True:
+            if initial:
+                due = [d for d in self.dependencies if not d.get('prevent_initial_call')]
+            else:
+                due = [d for d in self.dependencies
+                       if any(f"{i['id']}.{i['property']}" in changed for i in d['inputs'])]
+            if not due:
+                break
+            results = list(self.pool.map(lambda d: self._call(d, [] if initial else sorted(changed)), due))
+            changed = set()
+            for response in results:
+                for component, props in response.items():
+                    for prop, value in props.items():
+                        key = f'{component}.{prop}'
+                        if prop != 'figure':
+                            self.state[key] = value
+                        changed.add(key)
+            initial = False
+        return time.perf_counter() - start
+
+    def run(self, deadline):
+        self.interactions.append(('load', self.fire(None)))
+        weights = [w for w, _, _ in INTERACTIONS]
+        while time.time() < deadline:
+            time.sleep(self.rng.expovariate(1 / self.think_time) if self.think_time > 0 else 0)
+            _, prop, value = self.rng.choices(INTERACTIONS, weights=weights)[0]
+            self.state[prop] = value(self.rng, self.context)
+            self.interactions.append((prop, self.fire({prop})))
+        self.pool.shutdown()
+
+
+class ProcessSampler:
+    # Suma CPU i RSS procesu serwera i jego potomków (workery gunicorna) próbkowana z /proc
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self.page = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+    def _tree(self):
+        children = {}
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    with open(f'/proc/{entry}/stat') as f:
+                        ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                    children.setdefault(ppid, []).append(int(entry))
+                except (OSError, IndexError, ValueError):
+                    pass
+        pids, queue = [], [self.pid]
+        while queue:
+            pid = queue.pop()
+            pids.append(pid)
+            queue.extend(children.get(pid, []))
+        return pids
+
+    def _read(self):
+        cpu = rss = 0
+        for pid in self._tree():
+            try:
+                with open(f'/proc/{pid}/stat') as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+                cpu += int(fields[11]) + int(fields[12])
+                with open(f'/proc/{pid}/statm') as f:
+                    rss += int(f.read().split()[1]) * self.page
+            except (OSError, IndexError, ValueError):
+                pass
+        return cpu / self.ticks, rss
+
+    def _loop(self):
+        while not self.stop.is_set():
+            cpu, rss = self._read()
+            self.samples.append((time.time(), cpu, rss))
+            self.stop.wait(self.interval)
+
+    def start(self):
+        if os.path.isdir('/proc'):
+            self.thread.start()
+
+    def finish(self):
+        self.stop.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        if len(self.samples) < 2:
+            return {}
+        (t0, cpu0, _), (t1, cpu1, _) = self.samples[0], self.samples[-1]
+        rss = [s[2] for s in self.samples]
+        return {'cpu_percent': round(100 * (cpu1 - cpu0) / max(t1 - t0, 1e-9), 1),
+                'rss_mb_mean': round(float(np.mean(rss)) / 2 ** 20, 1),
+                'rss_mb_max': round(max(rss) / 2 ** 20, 1)}
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    values = np.array(values) * 1000
+    return {'n': len(values), 'p50_ms': round(float(np.percentile(values, 50)), 2),
+            'p95_ms': round(float(np.percentile(values, 95)), 2),
+            'p99_ms': round(float(np.percentile(values, 99)), 2),
+            'max_ms': round(float(values.max()), 2)}
+
+
+def top_countries(port, dependencies, state):
+    # Układ zawiera tylko wybrany kraj - listę podpowiedzi (top wg liczby tytułów) pobieramy jak przeglądarka
+    search = [d for d in dependencies if d['output'] == 'country-1.options']
+    if not search:
+        return [o['value'] for o in state.get('country-1.options') or []]
+    probe = Session(port, dependencies, state, {}, random.Random(0), 0)
+    options = probe._call(search[0], []).get('country-1', {}).get('options', [])
+    probe.pool.shutdown()
+    return [o['value'] for o in options]
+
+
+def run_mode(mode, args, env):
+    port = free_port()
+    process = start_server(mode, port, env, args.workers, args.threads)
+    try:
+        wait_ready(port, process, confirmations=args.workers if mode == 'gunicorn' else 1)
+        dependencies = [d for d in get_json(port, '/_dash-dependencies') if not d.get('clientside_function')]
+        layout = get_json(port, '/_dash-layout')
+        # Układ zastępczy na czas ładowania (layout.create_placeholder_layout) nie ma kontrolek dashboardu
+        if has_component(layout, 'startup-poll'):
+            raise RuntimeError("/_dash-layout zwraca układ zastępczy mimo odpowiedzi 200 z /ready")
+        state = {}
+        initial_state(layout, state)
+        context = {'countries': top_countries(port, dependencies, state) or ['United States']}
+
+        sampler = ProcessSampler(process.pid)
+        sampler.start()
+        start = time.time()
+        deadline = start + args.duration
+        sessions = [Session(port, dependencies, state, context, random.Random(args.seed + i), args.think_time)
+                    for i in range(args.sessions)]
+        threads = [threading.Thread(target=s.run, args=(deadline,)) for s in sessions]
+        for thread in threads:
+            thread.start()
+            # Sesje dołączają stopniowo w pierwszych sekundach, jak prawdziwi użytkownicy
+            time.sleep(args.ramp_up / max(len(threads), 1))
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - start
+        resources = sampler.finish()
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    requests = [r for s in sessions for r in s.requests]
+    by_callback = {}
+    for output, seconds, _ in requests:
+        by_callback.setdefault(output, []).append(seconds)
+    by_interaction = {}
+    for s in sessions:
+        for name, seconds in s.interactions:
+            by_interaction.setdefault(name, []).append(seconds)
+
+    return {
+        'mode': mode,
+        'workers': args.workers if mode == 'gunicorn' else 1,
+        'threads': args.threads if mode == 'gunicorn' else (1 if mode == 'single' else None),
+        'sessions': args.sessions,
+        'duration_s': round(elapsed, 2),
+        'requests': len(requests),
+        'errors': sum(s.errors for s in sessions),
+        'throughput_rps': round(len(requests) / elapsed, 1),
+        'response_mb': round(sum(r[2] for r in requests) / 2 ** 20, 2),
+        'latency': percentiles([r[1] for r in requests]),
+        'interaction_latency': {name: percentiles(values) for name, values in sorted(by_interaction.items())},
+        'callback_latency': {name: percentiles(values) for name, values in sorted(by_callback.items())},
+        'resources': resources,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test obciążeniowy serwera dashboardu")
+    parser.add_argument('--modes', nargs='+', default=['single', 'threaded', 'gunicorn'],
+                        choices=['single', 'threaded', 'gunicorn'])
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=30, help="sekundy na konfigurację")
+    parser.add_argument('--think-time', type=float, default=1.0, help="średnia przerwa między akcjami [s]")
+    parser.add_argument('--ramp-up', type=float, default=5.0)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--scale', type=float, default=0, help="syntetyczny katalog (0 = prawdziwy CSV)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.scale:
+            path = os.path.join(tmp, 'catalog.csv')
+            generate_catalog(scaled_size(args.scale), seed=args.seed).to_csv(path, index=False)
+            env['NETFLIX_CSV_PATH'] = path
+            env['NETFLIX_CACHE_DIR'] = os.path.join(tmp, 'cache')
+
+        for mode in args.modes:
+            print(f"== {mode}: {args.sessions} sesji przez {args.duration:g}s ...")
+            result = run_mode(mode, args, env)
+            results.append(result)
+            latency = result['latency']
+            print(f"   {result['requests']} żądań ({result['errors']} błędów), {result['throughput_rps']} req/s, "
+                  f"p50 {latency.get('p50_ms')} ms, p95 {latency.get('p95_ms')} ms, p99 {latency.get('p99_ms')} ms, "
+                  f"CPU {result['resources'].get('cpu_percent')}%, RSS max {result['resources'].get('rss_mb_max')} MB")
+            type_change = result['interaction_latency'].get('type-filter.value', {})
+            print(f"   zmiana filtra typu (cały łańcuch): p50 {type_change.get('p50_ms')} ms, "
+                  f"p95 {type_change.get('p95_ms')} ms")
+
+    print(f"\n{'tryb':<10} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'CPU%':>7} {'RSS MB':>8}")
+    for r in results:
+        print(f"{r['mode']:<10} {r['throughput_rps']:>8} {r['latency'].get('p50_ms', 0):>8} "
+              f"{r['latency'].get('p95_ms', 0):>8} {r['latency'].get('p99_ms', 0):>8} "
+              f"{r['resources'].get('cpu_percent', 0):>7} {r['resources'].get('rss_mb_max', 0):>8}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+        print(f"Zapisano {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+# Syntetyczny katalog w skali 10x-1000x. Rozkłady (osobno dla filmów i seriali) są dopasowane do
+# prawdziwego netflix_titles.csv: liczba wartości w polach wielowartościowych, częstości wartości,
+# braki danych, surowe napisy dat (z wiodącymi spacjami) i mieszane formaty 'duration'.
+# Bez pliku CSV generator wraca do prostych, ręcznie zdefiniowanych pul.
+import functools
+
+import numpy as np
+import pandas as pd
+
+from config import CSV_PATH
+
+COLUMNS = ['show_id', 'type', 'title', 'director', 'cast', 'country', 'date_added',
+           'release_year', 'rating', 'duration', 'listed_in', 'description']
+LIST_COLUMNS = ['director', 'cast', 'country', 'listed_in']
+SCALAR_COLUMNS = ['date_added', 'release_year', 'rating', 'duration']
+# Słownik osób rośnie razem ze skalą (wariant 'Imię Nazwisko #k'); kraje i gatunki pozostają jak w oryginale
+SCALED_VOCABULARY = ['director', 'cast']
+MAX_POOL = 100_000
+
+RATINGS = ['TV-MA', 'TV-14', 'TV-PG', 'R', 'PG-13', 'TV-Y7', 'TV-Y', 'PG', 'TV-G', 'NR', 'G']
+COUNTRIES = ['United States', 'India', 'United Kingdom', 'Canada', 'France', 'Japan', 'Spain',
+             'South Korea', 'Germany', 'Mexico', 'Poland', 'Brazil', 'Australia', 'Egypt', 'Turkey']
+GENRES = ['Dramas', 'Comedies', 'Documentaries', 'Action & Adventure', 'International Movies',
+          'International TV Shows', 'TV Dramas', 'Kids\' TV', 'Thrillers', 'Horror Movies', 'Romantic Movies']
+
+
+def _distribution(values):
+    counts = values.value_counts(dropna=False, normalize=True)
+    return counts.index.to_numpy(dtype=object), counts.to_numpy()
+
+
+@functools.lru_cache(maxsize=4)
+def fit_profile(path=CSV_PATH):
+    # Empiryczne rozkłady kolumn per typ; wynik jest mały i można go trzymać w pamięci
+    raw = pd.read_csv(path)
+    profile = {'n_rows': len(raw), 'types': _distribution(raw['type']), 'by_type': {}}
+    for content_type, sub in raw.groupby('type'):
+        columns = {column: _distribution(sub[column]) for column in SCALAR_COLUMNS}
+        lists = {}
+        for column in LIST_COLUMNS:
+            items = sub[column].dropna().str.split(',')
+            lists[column] = {
+                'missing': float(sub[column].isna().mean()),
+                'lengths': _distribution(items.str.len()),
+                'values': _distribution(items.explode().str.strip()),
+            }
+        profile['by_type'][content_type] = {
+            'columns': columns,
+            'lists': lists,
+            'titles': sub['title'].to_numpy(dtype=object),
+            'descriptions': sub['description'].to_numpy(dtype=object),
+        }
+    return profile
+
+
+def _choice(rng, distribution, size):
+    values, p = distribution
+    return values[rng.choice(len(values), size=size, p=p)]
+
+
+def _list_column(rng, spec, size, variants):
+    # Pula gotowych list "a, b, c" (losowanych z rozkładu długości i częstości) - wiersze losują z puli
+    n_pool = min(size, MAX_POOL)
+    lengths = _choice(rng, spec['lengths'], n_pool).astype(np.int64)
+    values = _choice(rng, spec['values'], int(lengths.sum()))
+    if variants > 1:
+        suffix = rng.integers(0, variants, size=len(values)).astype(str).astype(object)
+        values = np.where(suffix == '0', values, values + ' #' + suffix)
+    bounds = np.r_[0, np.cumsum(lengths)]
+    # Bez powtórzeń w obrębie jednego tytułu (jak w oryginale)
+    pool = np.array([', '.join(dict.fromkeys(values[a:b])) for a, b in zip(bounds[:-1], bounds[1:])], dtype=object)
+
+    column = pool[rng.integers(0, n_pool, size=size)]
+    column[rng.random(size) < spec['missing']] = np.nan
+    return column
+
+
+def _from_profile(profile, n_rows, rng):
+    variants = max(1, n_rows // profile['n_rows'])
+    types = _choice(rng, profile['types'], n_rows)
+    frame = {column: np.empty(n_rows, dtype=object) for column in COLUMNS}
+    frame['type'] = types
+
+    for content_type, spec in profile['by_type'].items():
+        rows = np.flatnonzero(types == content_type)
+        if len(rows) == 0:
+            continue
+        for column, distribution in spec['columns'].items():
+            frame[column][rows] = _choice(rng, distribution, len(rows))
+        for column, list_spec in spec['lists'].items():
+            scale = variants if column in SCALED_VOCABULARY else 1
+            frame[column][rows] = _list_column(rng, list_spec, len(rows), scale)
+        picks = rng.integers(0, len(spec['titles']), size=len(rows))
+        frame['title'][rows] = spec['titles'][picks]
+        frame['description'][rows] = spec['descriptions'][picks]
+
+    df = pd.DataFrame(frame)
+    df['show_id'] = 's' + pd.Series(np.arange(1, n_rows + 1)).astype(str)
+    # Tytuły z oryginału + numer, żeby były unikalne jak w prawdziwym katalogu
+    df['title'] = df['title'].astype(str) + ' (' + df.index.astype(str) + ')'
+    df['release_year'] = df['release_year'].astype(np.int64)
+    return df[COLUMNS]
+
+
+def _pool(rng, items, size, max_len, n_pool=2000):
+    # Pula gotowych list "a, b, c" - losowanie z puli jest wektorowe
+    lengths = rng.integers(1, max_len + 1, size=n_pool)
+    joined = [', '.join(rng.choice(items, size=k, replace=False)) for k in lengths]
+    return np.array(joined, dtype=object)[rng.integers(0, n_pool, size=size)]
+
+
+def _simple_catalog(n_rows, rng):
+    people = np.array([f'Person {i}' for i in range(max(1000, n_rows // 20))], dtype=object)
+
+    is_movie = rng.random(n_rows) < 0.7
+    dates = pd.Timestamp('2008-01-01') + pd.to_timedelta(rng.integers(0, 5000, size=n_rows), unit='D')
+    minutes = rng.integers(60, 200, size=n_rows).astype(str).astype(object)
+    seasons = rng.integers(1, 8, size=n_rows)
+
+    duration = np.where(is_movie, minutes + ' min',
+                        np.where(seasons == 1, '1 Season', seasons.astype(str).astype(object) + ' Seasons'))
+
+    df = pd.DataFrame({
+        'show_id': 's' + pd.Series(np.arange(1, n_rows + 1)).astype(str),
+        'type': np.where(is_movie, 'Movie', 'TV Show'),
+        'title': 'Title ' + pd.Series(np.arange(n_rows)).astype(str),
+        'director': _pool(rng, people, n_rows, 2),
+        'cast': _pool(rng, people, n_rows, 8),
+        'country': _pool(rng, np.array(COUNTRIES, dtype=object), n_rows, 3),
+        'date_added': dates.strftime('%B %d, %Y'),
+        'release_year': rng.integers(1950, 2022, size=n_rows),
+        'rating': rng.choice(RATINGS, size=n_rows),
+        'duration': duration,
+        'listed_in': _pool(rng, np.array(GENRES, dtype=object), n_rows, 3),
+        'description': 'Synthetic description',
+    })
+    return df[COLUMNS]
+
+
+def generate_catalog(n_rows, seed=0, path=CSV_PATH):
+    rng = np.random.default_rng(seed)
+    try:
+        profile = fit_profile(path)
+    except FileNotFoundError:
+        return _simple_catalog(n_rows, rng)
+    return _from_profile(profile, n_rows, rng)
+
+
+def scaled_size(scale, path=CSV_PATH):
+    # Liczba wierszy dla skali względem prawdziwego katalogu (np. 10 -> ~88 tys.)
+    try:
+        return int(scale * fit_profile(path)['n_rows'])
+    except FileNotFoundError:
+        return int(scale * 8807)
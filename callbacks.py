@@ -1,309 +1,623 @@
-from dash import Input, Output, State, ctx
-import plotly.express as px
-import pandas as pd
-import numpy as np
-from data import NETFLIX_RED
+import functools
+import json
 
+from dash import ClientsideFunction, Input, Output, State, ctx, Patch
+from data import NETFLIX_RED
+from aggregates import SEASON_ORDER, country_comparison, daily_counts, trend_counts
+from config import SEARCH_LIMIT, SLIM_FIGURES
+from figure_cache import create_figure_cache
+from figure_payload import TEMPLATE, setup as setup_figures, slim_figure
+from jobs import shared_job
+from facets import TEXT_FACET, normalize_selection
+from metrics import stage
+from query_backend import create_query_backend
+from startup import LazyModule
+
+# plotly.express (~0.6 s importu) i szablon figur dopiero przy pierwszej figurze - worker odpowiada
+# na /health wcześniej
+px = LazyModule('plotly.express', on_load=setup_figures)
+
+MODAL_IDS = ["map", "trend", "month", "country", "genre", "hierarchy", "duration", "seasons", "director", "rating",
+             "cast"]
+
+# Tryb kliencki: figury top-N budujemy dla maksimum kontrolki, przeglądarka tylko przycina dane
+CLIENT_TOP_N = {'genre': 20, 'hierarchy': 50, 'director': 30, 'cast': 30}
+
+
+def bar_patch(counts, label):
+    # Częściowa aktualizacja: tylko nowe wiersze słupków zamiast całej figury
+    patched = Patch()
+    patched['data'][0]['x'] = counts['count'].tolist()
+    patched['data'][0]['y'] = counts[label].tolist()
+    patched['data'][0]['text'] = counts['count'].tolist()
+    if 'error' in counts:
+        patched['data'][0]['error_x']['array'] = [0] * len(counts)
+        patched['data'][0]['error_x']['arrayminus'] = counts['error'].tolist()
+    return patched
+
+
+def hierarchy_patch(counts):
+    labels = counts['genre'].tolist()
+    values = counts['count'].tolist()
+    patched = Patch()
+    patched['data'][0]['ids'] = labels
+    patched['data'][0]['labels'] = labels
+    patched['data'][0]['parents'] = [''] * len(labels)
+    patched['data'][0]['values'] = values
+    patched['data'][0]['customdata'] = [[v] for v in values]
+    patched['data'][0]['marker']['colors'] = values
+    return patched
+
+
+def register_callbacks(app, store, figure_cache=None, client_side=False, slim_figures=SLIM_FIGURES,
+                       background_manager=None, query_backend=None):
+    # store.get() zwraca aktualny Dataset (może zostać podmieniony przy przeładowaniu danych)
+    figure_cache = figure_cache or create_figure_cache()
+    # Wycinki kostki (liczniki po filtrach) z wybranego silnika agregacji (patrz query_backend.py)
+    backend = query_backend or create_query_backend()
+    cached = lambda name: figure_cache.cached(name, lambda: store.get().version)
 
-def register_callbacks(app, df):
     # --- KONFIGURACJA WSPÓLNA DLA WYKRESÓW ---
-    layout_settings = dict(
+    # W trybie odchudzonym tło, czcionka i siatka są w szablonie TEMPLATE (patrz figure_payload.py)
+    template = TEMPLATE if slim_figures else 'plotly_dark'
+    layout_settings = {} if slim_figures else dict(
         paper_bgcolor='rgba(0,0,0,0)',
         plot_bgcolor='rgba(0,0,0,0)',
         font=dict(color='white')
     )
 
     def apply_grid(fig):
+        if slim_figures:
+            return fig
         grid_style = dict(showgrid=True, gridcolor='rgba(255, 255, 255, 0.2)', zerolinecolor='rgba(255, 255, 255, 0.2)')
         fig.update_xaxes(**grid_style)
         fig.update_yaxes(**grid_style)
         return fig
 
-    # 1. CALLBACK KPI + MAPA
-    @app.callback(
-        [Output('kpi-total', 'children'),
-         Output('kpi-movie-perc', 'children'),
-         Output('kpi-tv-perc', 'children'),
-         Output('map-graph', 'figure')],
-        [Input('type-filter', 'value'),
-         Input('map-type', 'value')]
-    )
-    def update_kpi_and_map(selected_type, map_type):
-        filtered = df if selected_type == 'All' else df[df['type'] == selected_type]
-        total = len(filtered)
-        if selected_type == 'All':
-            m_perc = (len(df[df['type'] == 'Movie']) / len(df)) * 100
-            t_perc = (len(df[df['type'] == 'TV Show']) / len(df)) * 100
-            kpi2 = f"{m_perc:.1f}%"
-            kpi3 = f"{t_perc:.1f}%"
-        else:
-            kpi2 = "-"
-            kpi3 = "-"
+    def finish(fig):
+        return slim_figure(fig) if slim_figures else fig
+
+    def top_counts(name, selected_type, selection, n):
+        # Tryb przybliżony bez filtrów krzyżowych: top-N ze szkicu Space-Saving (kolumna 'error');
+        # szkice są liczone per typ, więc przy filtrach krzyżowych zostają dokładne liczniki
+        data = store.get()
+        if data.sketches is not None and not selection:
+            return data.sketches.top(name, selected_type, int(n))
+        return backend.slice(data, selected_type, selection)[name].head(int(n))
+
+    def error_bars(fig, counts, name, selected_type):
+        # Prawdziwa liczba leży w [count - error, count] - wąs tylko w lewo od końca słupka
+        if 'error' not in counts:
+            return fig
+        fig.update_traces(error_x=dict(type='data', symmetric=False, array=[0] * len(counts),
+                                       arrayminus=counts['error'].tolist(), color='rgba(255, 255, 255, 0.6)'))
+        bound = store.get().sketches.error_bound(name, selected_type)
+        fig.add_annotation(text=f"Przybliżenie (Space-Saving), błąd ≤ {bound}", xref='paper', yref='paper',
+                           x=1, y=1, xanchor='right', yanchor='bottom', showarrow=False, font=dict(size=10))
+        return fig
 
-        country_df = filtered[['show_id', 'country']].copy()
-        country_df['country'] = country_df['country'].str.split(', ')
-        country_df = country_df.explode('country')
-        counts = country_df['country'].value_counts().reset_index()
-        counts.columns = ['country', 'count']
-        counts = counts[counts['country'] != 'Unknown']
+    # --- BUDOWANIE FIGUR (cache'owane po wartościach wejść) ---
+    @cached('map_figure')
+    def map_figure(selected_type, map_type, selection):
+        data = store.get()
+        counts = backend.slice(data, selected_type, selection)['country']
+        if slim_figures:
+            # Kody ISO-3 (tabela z czasu ładowania danych) - przeglądarka nie dopasowuje nazw regexami
+            counts = counts.assign(iso_alpha=counts['country'].map(data.country_codes)).dropna(subset=['iso_alpha'])
+            locations, locationmode = 'iso_alpha', 'ISO-3'
+        else:
+            locations, locationmode = 'country', 'country names'
 
         if map_type == 'area':
             fig = px.choropleth(
-                counts, locations="country", locationmode='country names',
+                counts, locations=locations, locationmode=locationmode,
                 color="count", hover_name="country",
                 color_continuous_scale=px.colors.sequential.Reds,
-                template='plotly_dark'
+                template=template
             )
         else:
             fig = px.scatter_geo(
-                counts, locations="country", locationmode='country names',
+                counts, locations=locations, locationmode=locationmode,
                 size="count", hover_name="country",
                 color="count", color_continuous_scale=px.colors.sequential.Reds,
-                template='plotly_dark', projection="natural earth"
+                template=template, projection="natural earth"
             )
 
         fig.update_layout(**layout_settings, margin={"r": 0, "t": 0, "l": 0, "b": 0})
         fig.update_geos(bgcolor='rgba(0,0,0,0)', lakecolor='#1f1f1f', landcolor='#2b2b2b', subunitcolor='#141414')
-        return total, kpi2, kpi3, fig
-
-    # 2. CALLBACK TREND CZASOWY
-    @app.callback(
-        Output('trend-graph', 'figure'),
-        [Input('type-filter', 'value'),
-         Input('trend-interval', 'value'),
-         Input('trend-split', 'value'),
-         Input('trend-agg', 'value')]
-    )
-    def update_trend(selected_type, interval, view, agg):
-        dff = df.copy()
-        if selected_type != 'All':
-            dff = dff[dff['type'] == selected_type]
-        dff = dff.set_index('date_added')
-
-        if view == 'split':
-            grouped = dff.groupby([pd.Grouper(freq=interval), 'type']).size().reset_index(name='count')
-            color_arg = 'type'
-        else:
-            grouped = dff.groupby(pd.Grouper(freq=interval)).size().reset_index(name='count')
-            color_arg = None
-
-        if agg == 'cumsum':
-            if view == 'split':
-                grouped['count'] = grouped.groupby('type')['count'].cumsum()
-            else:
-                grouped['count'] = grouped['count'].cumsum()
+        return finish(fig)
+
+    @cached('trend_figure')
+    def trend_figure(selected_type, interval, view, agg, selection):
+        data = store.get()
+        # Dzienne liczniki są gotowe; M/Q/Y i narastająco to tylko redukcje po okresach
+        with stage('aggregation'):
+            mask = data.selection_mask(selected_type, selection) if selection else None
+            daily = daily_counts(data.timeline, mask)
+            grouped = trend_counts(data.timeline, daily, selected_type, interval, view, agg)
+        color_arg = 'type' if view == 'split' else None
 
         fig = px.line(
             grouped, x='date_added', y='count', color=color_arg,
-            markers=True, template='plotly_dark',
+            markers=True, template=template,
             color_discrete_map={'Movie': NETFLIX_RED, 'TV Show': '#ffffff'}
         )
         if color_arg is None: fig.update_traces(line_color=NETFLIX_RED)
         fig.update_layout(**layout_settings, title=None)
 
         apply_grid(fig)
-        return fig
-
-    @app.callback(
-        [Output('month-pie-graph', 'figure'),
-         Output('country-comparison-graph', 'figure')],
-        [Input('type-filter', 'value'),
-         Input('country-1', 'value'),
-         Input('country-2', 'value')]
-    )
-    def update_new_charts(selected_type, c1, c2):
-
-        dff = df if selected_type == 'All' else df[df['type'] == selected_type]
-
+        return finish(fig)
 
-        dff_month = dff.copy()
-        dff_month['month'] = dff_month['date_added'].dt.month_name()
-
-        month_counts = dff_month['month'].value_counts().reset_index()
-        month_counts.columns = ['month', 'count']
+    @cached('month_figure')
+    def month_figure(selected_type, selection):
+        data = store.get()
+        month_counts = backend.slice(data, selected_type, selection)['month']
 
         fig_month = px.pie(
             month_counts, values='count', names='month',
-            template='plotly_dark',
+            template=template,
             color_discrete_sequence=px.colors.sequential.RdBu
         )
         fig_month.update_traces(textposition='inside', textinfo='percent+label')
         fig_month.update_layout(**layout_settings, margin={"r": 0, "t": 0, "l": 0, "b": 0})
+        return finish(fig_month)
 
-
-        dff_country = dff[['date_added', 'year_added', 'country']].copy()
-        dff_country['country'] = dff_country['country'].str.split(', ')
-        dff_country = dff_country.explode('country')
-        dff_country['country'] = dff_country['country'].str.strip()
-
-
-        dff_compare = dff_country[dff_country['country'].isin([c1, c2])]
-
-
-        comp_counts = dff_compare.groupby(['year_added', 'country']).size().reset_index(name='count')
+    @cached('country_figure')
+    def country_figure(selected_type, c1, c2, selection):
+        data = store.get()
+        comp_counts = country_comparison(backend.slice(data, selected_type, selection), [c1, c2])
 
 
         if comp_counts.empty:
-            fig_comp = px.line(template='plotly_dark')
+            fig_comp = px.line(template=template)
             fig_comp.add_annotation(text="Brak danych", showarrow=False)
         else:
             fig_comp = px.line(
                 comp_counts, x='year_added', y='count', color='country',
-                markers=True, template='plotly_dark'
+                markers=True, template=template
             )
             apply_grid(fig_comp)
 
         fig_comp.update_layout(**layout_settings,
                                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+        return finish(fig_comp)
 
-        return fig_month, fig_comp
-
-    @app.callback(
-        [Output('genre-bar-graph', 'figure'),
-         Output('genre-hierarchy-graph', 'figure')],
-        [Input('type-filter', 'value'),
-         Input('genre-top-n', 'value'),
-         Input('hierarchy-type', 'value'),
-         Input('hierarchy-n', 'value')]
-    )
-    def update_genres(selected_type, bar_n, hier_type, hier_n):
-        filtered = df if selected_type == 'All' else df[df['type'] == selected_type]
-        genres = filtered[['show_id', 'listed_in']].copy()
-        genres['listed_in'] = genres['listed_in'].str.split(', ')
-        genres_exp = genres.explode('listed_in')
-        counts = genres_exp['listed_in'].value_counts().reset_index()
-        counts.columns = ['genre', 'count']
-
-        bar_data = counts.head(int(bar_n))
+    @cached('genre_bar_figure')
+    def genre_bar_figure(selected_type, bar_n, selection):
+        bar_data = top_counts('genre', selected_type, selection, bar_n)
         fig_bar = px.bar(
             bar_data, x='count', y='genre', orientation='h',
-            text='count', template='plotly_dark'
+            text='count', template=template
         )
         fig_bar.update_traces(marker_color=NETFLIX_RED, textposition='outside')
         fig_bar.update_layout(**layout_settings, yaxis={'categoryorder': 'total ascending'})
+        error_bars(fig_bar, bar_data, 'genre', selected_type)
         apply_grid(fig_bar)
+        return finish(fig_bar)
 
-        hier_data = counts.head(int(hier_n))
+    @cached('genre_hierarchy_figure')
+    def genre_hierarchy_figure(selected_type, hier_type, hier_n, selection):
+        data = store.get()
+        hier_data = backend.slice(data, selected_type, selection)['genre'].head(int(hier_n))
         if hier_type == 'treemap':
             fig_hier = px.treemap(hier_data, path=['genre'], values='count',
-                                  color='count', color_continuous_scale='Reds', template='plotly_dark')
+                                  color='count', color_continuous_scale='Reds', template=template)
         else:
             fig_hier = px.sunburst(hier_data, path=['genre'], values='count',
-                                   color='count', color_continuous_scale='Reds', template='plotly_dark')
+                                   color='count', color_continuous_scale='Reds', template=template)
         fig_hier.update_layout(**layout_settings, margin={"r": 0, "t": 0, "l": 0, "b": 0})
-        return fig_bar, fig_hier
-
-
-    @app.callback(
-        [Output('duration-hist', 'figure'),
-         Output('seasons-bar', 'figure')],
-        [Input('type-filter', 'value')]
-    )
-    def update_duration_seasons(selected_type):
-
-        movies = pd.DataFrame()
-        if selected_type in ['All', 'Movie']:
-            movies = df[df['type'] == 'Movie'].dropna(subset=['duration_min']).copy()
-
-        if not movies.empty:
-            bins = [0, 90, 120, 150, 9999]
-            labels = ['< 90 min', '90-119 min', '120-149 min', '150+ min']
-            movies['duration_cat'] = pd.cut(movies['duration_min'], bins=bins, labels=labels, right=False)
-
-            dur_counts = movies['duration_cat'].value_counts().sort_index().reset_index()
-            dur_counts.columns = ['category', 'count']
-
-            fig_dur = px.bar(dur_counts, x='category', y='count', template='plotly_dark',
+        return finish(fig_hier)
+
+    @cached('duration_figure')
+    def duration_figure(selected_type, selection):
+        data = store.get()
+        dur_counts = backend.slice(data, selected_type, selection)['duration']
+        if not dur_counts.empty:
+            fig_dur = px.bar(dur_counts, x='category', y='count', template=template,
                              text='count', color_discrete_sequence=[NETFLIX_RED])
             fig_dur.update_traces(textposition='outside')
             fig_dur.update_layout(**layout_settings, xaxis_title=None, yaxis_title="Liczba filmów")
             apply_grid(fig_dur)
         else:
-            fig_dur = px.bar(template='plotly_dark')
+            fig_dur = px.bar(template=template)
             fig_dur.update_layout(**layout_settings, title="Brak danych dla wybranego filtra")
-
-
-        shows = pd.DataFrame()
-        if selected_type in ['All', 'TV Show']:
-            shows = df[df['type'] == 'TV Show'].dropna(subset=['seasons_count']).copy()
-
-        if not shows.empty:
-            def categorize_seasons(s):
-                if s >= 5: return '5+'
-                return str(int(s))
-
-            shows['season_cat'] = shows['seasons_count'].apply(categorize_seasons)
-            cat_order = ['1', '2', '3', '4', '5+']
-
-            sea_counts = shows['season_cat'].value_counts().reset_index()
-            sea_counts.columns = ['category', 'count']
-
-            fig_sea = px.bar(sea_counts, x='category', y='count', template='plotly_dark',
+        return finish(fig_dur)
+
+    @cached('seasons_figure')
+    def seasons_figure(selected_type, selection):
+        data = store.get()
+        sea_counts = backend.slice(data, selected_type, selection)['seasons']
+        if not sea_counts.empty:
+            fig_sea = px.bar(sea_counts, x='category', y='count', template=template,
                              text='count', color_discrete_sequence=['white'])
-            fig_sea.update_layout(**layout_settings, xaxis={'categoryorder': 'array', 'categoryarray': cat_order},
+            fig_sea.update_layout(**layout_settings, xaxis={'categoryorder': 'array', 'categoryarray': SEASON_ORDER},
                                   xaxis_title="Liczba sezonów")
             apply_grid(fig_sea)
         else:
-            fig_sea = px.bar(template='plotly_dark')
+            fig_sea = px.bar(template=template)
             fig_sea.update_layout(**layout_settings, title="Brak danych dla wybranego filtra")
+        return finish(fig_sea)
 
-        return fig_dur, fig_sea
-
-
-    @app.callback(
-        [Output('director-graph', 'figure'),
-         Output('rating-graph', 'figure'),
-         Output('cast-graph', 'figure')],
-        [Input('type-filter', 'value'),
-         Input('director-slider', 'value'),
-         Input('cast-slider', 'value')]
-    )
-    def update_people_ratings(selected_type, dir_n, cast_n):
-        filtered = df if selected_type == 'All' else df[df['type'] == selected_type]
-
-
-        dirs = filtered[['show_id', 'director']].copy()
-        dirs = dirs[dirs['director'] != 'Unknown']
-        dirs['director'] = dirs['director'].str.split(', ')
-        dirs = dirs.explode('director')
-        dir_counts = dirs['director'].value_counts().head(dir_n).reset_index()
-        dir_counts.columns = ['director', 'count']
+    @cached('director_figure')
+    def director_figure(selected_type, dir_n, selection):
+        dir_counts = top_counts('director', selected_type, selection, dir_n)
 
         fig_dir = px.bar(dir_counts, x='count', y='director', orientation='h',
-                         template='plotly_dark', text='count')
+                         template=template, text='count')
         fig_dir.update_traces(marker_color=NETFLIX_RED)
         fig_dir.update_layout(**layout_settings, yaxis={'categoryorder': 'total ascending'})
+        error_bars(fig_dir, dir_counts, 'director', selected_type)
         apply_grid(fig_dir)
+        return finish(fig_dir)
 
-
-        rat_counts = filtered.groupby(['rating', 'type']).size().reset_index(name='count')
-        total_per_rating = rat_counts.groupby('rating')['count'].sum().sort_values(ascending=True)
-        rating_order = total_per_rating.index.tolist()
+    @cached('rating_figure')
+    def rating_figure(selected_type, selection):
+        data = store.get()
+        cube_slice = backend.slice(data, selected_type, selection)
+        rat_counts = cube_slice['rating']
+        rating_order = cube_slice['rating_order']
 
         fig_rat = px.bar(rat_counts, x='count', y='rating', color='type',
                          orientation='h',
-                         template='plotly_dark',
+                         template=template,
                          color_discrete_map={'Movie': NETFLIX_RED, 'TV Show': '#ffffff'},
                          barmode='stack')
 
         fig_rat.update_layout(**layout_settings, yaxis={'categoryorder': 'array', 'categoryarray': rating_order})
         apply_grid(fig_rat)
+        return finish(fig_rat)
 
-
-        casts = filtered[['show_id', 'cast']].copy()
-        casts = casts[casts['cast'] != 'Unknown']
-        casts['cast'] = casts['cast'].str.split(', ')
-        casts = casts.explode('cast')
-        cast_counts = casts['cast'].value_counts().head(cast_n).reset_index()
-        cast_counts.columns = ['actor', 'count']
+    @cached('cast_figure')
+    def cast_figure(selected_type, cast_n, selection):
+        cast_counts = top_counts('cast', selected_type, selection, cast_n)
 
         fig_cast = px.bar(cast_counts, x='count', y='actor', orientation='h',
-                          template='plotly_dark', text='count')
+                          template=template, text='count')
         fig_cast.update_traces(marker_color='white')
         fig_cast.update_layout(**layout_settings, yaxis={'categoryorder': 'total ascending'})
+        error_bars(fig_cast, cast_counts, 'cast', selected_type)
         apply_grid(fig_cast)
+        return finish(fig_cast)
+
+    # --- CALLBACKI: każda kontrolka przelicza tylko zależne od niej wyjścia ---
+
+    # 0. FILTRY KRZYŻOWE: kliknięcie kraju / gatunku / roku przełącza wartość w filtrze,
+    # pole wyszukiwania ustawia zapytanie pełnotekstowe (wiersze z indeksu odwróconego)
+    @app.callback(
+        Output('cross-filter', 'data'),
+        [Input('map-graph', 'clickData'),
+         Input('genre-bar-graph', 'clickData'),
+         Input('trend-graph', 'clickData'),
+         Input('clear-cross-filter', 'n_clicks'),
+         Input('text-search', 'value')],
+        [State('cross-filter', 'data')],
+        prevent_initial_call=True
+    )
+    def update_cross_filter(map_click, genre_click, trend_click, clear_clicks, text_query, selection):
+        trigger = ctx.triggered_id
+        if trigger == 'clear-cross-filter':
+            return {}
+        if trigger == 'text-search':
+            query = ' '.join((text_query or '').split())
+            selection = dict(selection or {}, **{TEXT_FACET: [query] if query else []})
+            return normalize_selection(selection)
+
+        clicks = {
+            # hovertext = nazwa kraju (location to kod ISO-3 w trybie odchudzonym)
+            'map-graph': ('country', map_click, lambda p: p.get('hovertext') or p.get('location')),
+            'genre-bar-graph': ('genre', genre_click, lambda p: p.get('y')),
+            'trend-graph': ('year_added', trend_click, lambda p: int(str(p.get('x'))[:4])),
+        }
+        if trigger not in clicks or not clicks[trigger][1]:
+            return selection
+        facet, click, extract = clicks[trigger]
+        value = extract(click['points'][0])
+
+        selection = dict(selection or {})
+        values = list(selection.get(facet, []))
+        if value in values:
+            values.remove(value)
+        else:
+            values.append(value)
+        selection[facet] = values
+        return normalize_selection(selection)
+
+    @app.callback(
+        Output('text-search', 'value'),
+        [Input('clear-cross-filter', 'n_clicks')],
+        prevent_initial_call=True
+    )
+    def clear_text_search(clear_clicks):
+        return ''
+
+    @app.callback(
+        Output('cross-filter-summary', 'children'),
+        [Input('cross-filter', 'data')]
+    )
+    def update_cross_filter_summary(selection):
+        selection = normalize_selection(selection)
+        if not selection:
+            return ("Kliknij kraj, gatunek lub punkt trendu albo wpisz szukaną frazę, "
+                    "aby filtrować wszystkie wykresy.")
+        return "Filtry: " + "; ".join(f"{facet} = {', '.join(map(str, values))}" for facet, values in selection.items())
+
+    # PORÓWNANIE KRAJÓW (ma własne listy wyboru - w obu trybach liczone na serwerze)
+    @app.callback(
+        Output('country-comparison-graph', 'figure'),
+        [Input('type-filter', 'value'),
+         Input('country-1', 'value'),
+         Input('country-2', 'value'),
+         Input('cross-filter', 'data')]
+    )
+    def update_country_comparison(selected_type, c1, c2, selection):
+        return country_figure(selected_type, c1, c2, normalize_selection(selection, exclude='country'))
+
+    # Listy wyboru krajów: w układzie tylko wybrana wartość, podpowiedzi z indeksu prefiksowego
+    def search_options(facet, search_value, value):
+        matches = store.get().search[facet].search(search_value, SEARCH_LIMIT)
+        names = [name for name, _ in matches]
+        # Wybrana wartość musi zostać na liście, inaczej Dropdown ją wyczyści
+        if value and value not in names:
+            names.insert(0, value)
+        return [{'label': name, 'value': name} for name in names]
+
+    @app.callback(
+        Output('country-1', 'options'),
+        [Input('country-1', 'search_value')],
+        [State('country-1', 'value')]
+    )
+    def update_country_1_options(search_value, value):
+        return search_options('country', search_value, value)
+
+    @app.callback(
+        Output('country-2', 'options'),
+        [Input('country-2', 'search_value')],
+        [State('country-2', 'value')]
+    )
+    def update_country_2_options(search_value, value):
+        return search_options('country', search_value, value)
+
+    def kpi_values(selected_type, selection):
+        data = store.get()
+        total = backend.slice(data, selected_type, selection)['total']
+        if selected_type == 'All':
+            m_perc = (backend.slice(data, 'Movie', selection)['total'] / max(total, 1)) * 100
+            t_perc = (backend.slice(data, 'TV Show', selection)['total'] / max(total, 1)) * 100
+            kpi2 = f"{m_perc:.1f}%"
+            kpi3 = f"{t_perc:.1f}%"
+        else:
+            kpi2 = "-"
+            kpi3 = "-"
+        return (total, kpi2, kpi3, distinct_kpi(data, 'cast', selected_type, selection),
+                distinct_kpi(data, 'country', selected_type, selection))
+
+    def distinct_kpi(data, name, selected_type, selection):
+        # Liczba unikalnych wartości: HyperLogLog w trybie przybliżonym, inaczej długość tabeli liczników
+        if data.sketches is not None and not selection:
+            estimate, relative_error = data.sketches.distinct_count(name, selected_type)
+            return f"≈{estimate:,} (±{relative_error:.1%})".replace(',', ' ')
+        return f"{len(backend.slice(data, selected_type, selection)[name]):,}".replace(',', ' ')
+
+    def figure_json(fig):
+        # Zbuforowane figury wracają już jako dict, świeżo zbudowane jako go.Figure
+        return fig if isinstance(fig, dict) else json.loads(fig.to_json())
+
+    @cached('client_payload')
+    def client_payload(selected_type, selection):
+        # Jedna paczka na (typ, filtr krzyżowy); szablon plotly_dark wysyłamy raz, nie przy każdej figurze
+        full = normalize_selection(selection)
+        no_country = normalize_selection(selection, exclude='country')
+        no_genre = normalize_selection(selection, exclude='genre')
+        no_year = normalize_selection(selection, exclude='year_added')
+
+        figures = {
+            'map_area': map_figure(selected_type, 'area', no_country),
+            'map_bubble': map_figure(selected_type, 'bubble', no_country),
+            'month': month_figure(selected_type, full),
+            'genre_bar': genre_bar_figure(selected_type, CLIENT_TOP_N['genre'], no_genre),
+            'hierarchy': genre_hierarchy_figure(selected_type, 'treemap', CLIENT_TOP_N['hierarchy'], full),
+            'duration': duration_figure(selected_type, full),
+            'seasons': seasons_figure(selected_type, full),
+            'director': director_figure(selected_type, CLIENT_TOP_N['director'], full),
+            'rating': rating_figure(selected_type, full),
+            'cast': cast_figure(selected_type, CLIENT_TOP_N['cast'], full),
+        }
+        for interval in ['M', 'Q', 'Y']:
+            for view in ['total', 'split']:
+                figures[f'trend_{interval}_{view}'] = trend_figure(selected_type, interval, view, 'count', no_year)
+
+        template = None
+        for name, fig in figures.items():
+            fig = figures[name] = figure_json(fig)
+            template = fig['layout'].pop('template', template)
+        # px.treemap sortuje węzły alfabetycznie - kolejność rankingu potrzebna do przycinania top-N
+        genres = backend.slice(store.get(), selected_type, full)['genre']['genre']
+        genres = genres.head(CLIENT_TOP_N['hierarchy']).tolist()
+        return {'template': template, 'kpi': kpi_values(selected_type, full), 'figures': figures,
+                'genre_rank': genres}
+
+    # Budowniczowie figur (z cache) i wartości KPI po nazwie - do rozgrzewania cache i eksportu statycznego
+    # poza callbackami (patrz warmup.py, export.py)
+    builders = {fn.__name__: fn for fn in [map_figure, trend_figure, month_figure, country_figure, genre_bar_figure,
+                                           genre_hierarchy_figure, duration_figure, seasons_figure, director_figure,
+                                           rating_figure, cast_figure, client_payload, kpi_values]}
+
+    # Układ zastępczy na czas ładowania danych w tle (patrz app.create_app) - przeglądarka odpytuje /ready
+    app.clientside_callback(
+        ClientsideFunction('netflix', 'pollReady'),
+        Output('startup-poll', 'disabled'),
+        [Input('startup-poll', 'n_intervals')]
+    )
+
+    if client_side:
+        @app.callback(
+            Output('client-aggregates', 'data'),
+            [Input('type-filter', 'value'),
+             Input('cross-filter', 'data')]
+        )
+        def update_client_aggregates(selected_type, selection):
+            return client_payload(selected_type, normalize_selection(selection))
+
+        register_clientside_callbacks(app)
+        return builders
+
+    # Menedżer zadań zapamiętuje wynik po wejściach i wersji danych (cache_by w jobs.py), bez wyzwalacza -
+    # Patch z przesunięcia suwaka trafiłby pod ten sam klucz co pełna figura. W tle zawsze pełne figury
+    # (z cache wykresów), Patch tylko w zwykłych callbackach.
+    patches = background_manager is None
+
+    def heavy_callback(outputs, inputs, progress_id):
+        # Ciężkie widoki: z menedżerem zadań (jobs.py) liczone w osobnym procesie z paskiem postępu;
+        # ponowne wywołanie przy zmianie wejść anuluje poprzednie zadanie. Bez menedżera - zwykły callback.
+        def decorator(fn):
+            if background_manager is None:
+                @functools.wraps(fn)
+                def sync(*args):
+                    return fn(lambda percent: None, *args)
+                return app.callback(outputs, inputs)(sync)
+
+            job = shared_job(fn, lambda: store.get().version)
+            return app.callback(
+                outputs, inputs, background=True, manager=background_manager,
+                progress=Output(progress_id, 'value'),
+                progress_default=0,
+                running=[(Output(progress_id, 'style'), {'display': 'flex', 'height': '4px'},
+                          {'display': 'none', 'height': '4px'})]
+            )(job)
+        return decorator
+
+    # 1. KPI
+    @app.callback(
+        [Output('kpi-total', 'children'),
+         Output('kpi-movie-perc', 'children'),
+         Output('kpi-tv-perc', 'children'),
+         Output('kpi-actors', 'children'),
+         Output('kpi-countries', 'children')],
+        [Input('type-filter', 'value'),
+         Input('cross-filter', 'data')]
+    )
+    def update_kpi(selected_type, selection):
+        return kpi_values(selected_type, normalize_selection(selection))
+
+    # 2. MAPA (bez własnej fasety 'country', żeby można było zaznaczyć kolejne kraje)
+    @app.callback(
+        Output('map-graph', 'figure'),
+        [Input('type-filter', 'value'),
+         Input('map-type', 'value'),
+         Input('cross-filter', 'data')]
+    )
+    def update_map(selected_type, map_type, selection):
+        return map_figure(selected_type, map_type, normalize_selection(selection, exclude='country'))
+
+    # 3. TREND CZASOWY
+    @app.callback(
+        Output('trend-graph', 'figure'),
+        [Input('type-filter', 'value'),
+         Input('trend-interval', 'value'),
+         Input('trend-split', 'value'),
+         Input('trend-agg', 'value'),
+         Input('cross-filter', 'data')]
+    )
+    def update_trend(selected_type, interval, view, agg, selection):
+        return trend_figure(selected_type, interval, view, agg, normalize_selection(selection, exclude='year_added'))
+
+    # 4. MIESIĄCE
+    @app.callback(
+        Output('month-pie-graph', 'figure'),
+        [Input('type-filter', 'value'),
+         Input('cross-filter', 'data')]
+    )
+    def update_month(selected_type, selection):
+        return month_figure(selected_type, normalize_selection(selection))
+
+    # 5. GATUNKI
+    @app.callback(
+        Output('genre-bar-graph', 'figure'),
+        [Input('type-filter', 'value'),
+         Input('genre-top-n', 'value'),
+         Input('cross-filter', 'data')]
+    )
+    def update_genre_bar(selected_type, bar_n, selection):
+        selection = normalize_selection(selection, exclude='genre')
+        if ctx.triggered_id == 'genre-top-n':
+            return bar_patch(top_counts('genre', selected_type, selection, bar_n), 'genre')
+        return genre_bar_figure(selected_type, int(bar_n), selection)
+
+    @heavy_callback(
+        Output('genre-hierarchy-graph', 'figure'),
+        [Input('type-filter', 'value'),
+         Input('hierarchy-type', 'value'),
+         Input('hierarchy-n', 'value'),
+         Input('cross-filter', 'data')],
+        'hierarchy-progress'
+    )
+    def update_genre_hierarchy(progress, selected_type, hier_type, hier_n, selection):
+        data = store.get()
+        selection = normalize_selection(selection)
+        progress(10)
+        genres = backend.slice(data, selected_type, selection)['genre']
+        progress(60)
+        if patches and ctx.triggered_id == 'hierarchy-n':
+            return hierarchy_patch(genres.head(int(hier_n)))
+        return genre_hierarchy_figure(selected_type, hier_type, int(hier_n), selection)
+
+    # 6. CZAS TRWANIA I SEZONY
+    @heavy_callback(
+        [Output('duration-hist', 'figure'),
+         Output('seasons-bar', 'figure')],
+        [Input('type-filter', 'value'),
+         Input('cross-filter', 'data')],
+        'duration-progress'
+    )
+    def update_duration_seasons(progress, selected_type, selection):
+        selection = normalize_selection(selection)
+        progress(10)
+        duration = duration_figure(selected_type, selection)
+        progress(60)
+        return duration, seasons_figure(selected_type, selection)
+
+    # 7. REŻYSERZY, RATINGI, OBSADA
+    @heavy_callback(
+        Output('director-graph', 'figure'),
+        [Input('type-filter', 'value'),
+         Input('director-slider', 'value'),
+         Input('cross-filter', 'data')],
+        'director-progress'
+    )
+    def update_directors(progress, selected_type, dir_n, selection):
+        selection = normalize_selection(selection)
+        progress(10)
+        directors = top_counts('director', selected_type, selection, dir_n)
+        progress(60)
+        if patches and ctx.triggered_id == 'director-slider':
+            return bar_patch(directors, 'director')
+        return director_figure(selected_type, dir_n, selection)
+
+    @heavy_callback(
+        Output('rating-graph', 'figure'),
+        [Input('type-filter', 'value'),
+         Input('cross-filter', 'data')],
+        'rating-progress'
+    )
+    def update_ratings(progress, selected_type, selection):
+        progress(10)
+        return rating_figure(selected_type, normalize_selection(selection))
 
-        return fig_dir, fig_rat, fig_cast
+    @heavy_callback(
+        Output('cast-graph', 'figure'),
+        [Input('type-filter', 'value'),
+         Input('cast-slider', 'value'),
+         Input('cross-filter', 'data')],
+        'cast-progress'
+    )
+    def update_cast(progress, selected_type, cast_n, selection):
+        selection = normalize_selection(selection)
+        progress(10)
+        cast = top_counts('cast', selected_type, selection, cast_n)
+        progress(60)
+        if patches and ctx.triggered_id == 'cast-slider':
+            return bar_patch(cast, 'actor')
+        return cast_figure(selected_type, cast_n, selection)
 
 
     @app.callback(
@@ -349,12 +663,78 @@ def register_callbacks(app, df):
 
         current_states = list(args[-num_modals:])
 
-        ids = ["map", "trend", "month", "country", "genre", "hierarchy", "duration", "seasons", "director", "rating",
-               "cast"]
-
-        for i, uid in enumerate(ids):
+        for i, uid in enumerate(MODAL_IDS):
             if f"open-modal-{uid}" == ctx_msg or f"close-modal-{uid}" == ctx_msg:
                 current_states[i] = not current_states[i]
                 return current_states
 
-        return current_states
\ No newline at end of file
+        return current_states
+
+    return builders
+
+
+def register_clientside_callbacks(app):
+    # Funkcje w assets/clientside.js (przestrzeń nazw 'netflix'); dane z dcc.Store 'client-aggregates'
+    aggregates = Input('client-aggregates', 'data')
+
+    app.clientside_callback(
+        ClientsideFunction('netflix', 'kpi'),
+        [Output('kpi-total', 'children'), Output('kpi-movie-perc', 'children'), Output('kpi-tv-perc', 'children'),
+         Output('kpi-actors', 'children'), Output('kpi-countries', 'children')],
+        [aggregates]
+    )
+    app.clientside_callback(
+        ClientsideFunction('netflix', 'map'),
+        Output('map-graph', 'figure'),
+        [aggregates, Input('map-type', 'value')]
+    )
+    app.clientside_callback(
+        ClientsideFunction('netflix', 'trend'),
+        Output('trend-graph', 'figure'),
+        [aggregates, Input('trend-interval', 'value'), Input('trend-split', 'value'), Input('trend-agg', 'value')]
+    )
+    app.clientside_callback(
+        ClientsideFunction('netflix', 'month'),
+        Output('month-pie-graph', 'figure'),
+        [aggregates]
+    )
+    app.clientside_callback(
+        ClientsideFunction('netflix', 'genreBar'),
+        Output('genre-bar-graph', 'figure'),
+        [aggregates, Input('genre-top-n', 'value')]
+    )
+    app.clientside_callback(
+        ClientsideFunction('netflix', 'hierarchy'),
+        Output('genre-hierarchy-graph', 'figure'),
+        [aggregates, Input('hierarchy-type', 'value'), Input('hierarchy-n', 'value')]
+    )
+    app.clientside_callback(
+        ClientsideFunction('netflix', 'durationSeasons'),
+        [Output('duration-hist', 'figure'), Output('seasons-bar', 'figure')],
+        [aggregates]
+    )
+    app.clientside_callback(
+        ClientsideFunction('netflix', 'director'),
+        Output('director-graph', 'figure'),
+        [aggregates, Input('director-slider', 'value')]
+    )
+    app.clientside_callback(
+        ClientsideFunction('netflix', 'rating'),
+        Output('rating-graph', 'figure'),
+        [aggregates]
+    )
+    app.clientside_callback(
+        ClientsideFunction('netflix', 'cast'),
+        Output('cast-graph', 'figure'),
+        [aggregates, Input('cast-slider', 'value')]
+    )
+
+    inputs = []
+    for uid in MODAL_IDS:
+        inputs += [Input(f"open-modal-{uid}", "n_clicks"), Input(f"close-modal-{uid}", "n_clicks")]
+    app.clientside_callback(
+        ClientsideFunction('netflix', 'toggleModals'),
+        [Output(f"modal-{uid}", "is_open") for uid in MODAL_IDS],
+        inputs,
+        [State(f"modal-{uid}", "is_open") for uid in MODAL_IDS]
+    )
@@ -0,0 +1,67 @@
+import os
+
+# Ustawienia przez zmienne środowiskowe (wspólne dla wszystkich workerów)
+CSV_PATH = os.environ.get('NETFLIX_CSV_PATH', 'netflix_titles.csv')
+CACHE_DIR = os.environ.get('NETFLIX_CACHE_DIR', '.cache')
+# Tryb kompaktowy katalogu (category / string[pyarrow] / węższe liczby) - patrz data.compact_frame
+COMPACT_CATALOG = os.environ.get('NETFLIX_COMPACT', '1') == '1'
+
+# Cache gotowych wykresów: limit pamięci procesu + opcjonalny backend współdzielony ('', 'disk', 'redis')
+FIGURE_CACHE_MAX_MB = int(os.environ.get('NETFLIX_FIGURE_CACHE_MB', '64'))
+FIGURE_CACHE_BACKEND = os.environ.get('NETFLIX_FIGURE_CACHE_BACKEND', '')
+FIGURE_CACHE_DIR = os.environ.get('NETFLIX_FIGURE_CACHE_DIR', os.path.join(CACHE_DIR, 'figures'))
+FIGURE_CACHE_REDIS_URL = os.environ.get('NETFLIX_REDIS_URL', 'redis://localhost:6379/0')
+
+# Katalog migawki danych współdzielonej przez workery (np. /dev/shm/netflix); pusty = każdy worker ładuje sam
+SHARED_DATASET_DIR = os.environ.get('NETFLIX_SHARED_DIR', '')
+
+# Co ile sekund sprawdzać, czy plik CSV (lub migawka współdzielona) się zmienił; 0 = wyłączone
+RELOAD_INTERVAL = float(os.environ.get('NETFLIX_RELOAD_INTERVAL', '0'))
+
+# Tryb kliencki: jeden zestaw agregatów na zmianę filtra trafia do dcc.Store,
+# a top-N, przełączniki widoków i okna pomocy obsługuje przeglądarka (assets/clientside.js)
+CLIENT_SIDE = os.environ.get('NETFLIX_CLIENT_SIDE', '0') == '1'
+
+# Pomiary callbacków (/metrics w formacie Prometheusa) i profilowanie pojedynczych żądań
+# Domyślnie wyłączone - /metrics zdradza ruch i obciążenie; z NETFLIX_METRICS_TOKEN wymaga tokenu
+METRICS_ENABLED = os.environ.get('NETFLIX_METRICS', '0') == '1'
+METRICS_MAX_LABELS = int(os.environ.get('NETFLIX_METRICS_MAX_LABELS', '500'))
+PROFILER = os.environ.get('NETFLIX_PROFILER', 'cprofile')  # 'cprofile' albo 'pyinstrument'
+PROFILE_DIR = os.environ.get('NETFLIX_PROFILE_DIR', os.path.join(CACHE_DIR, 'profiles'))
+PROFILE_ON_START = os.environ.get('NETFLIX_PROFILE', '0') == '1'
+# Token do przełączania profilowania w locie: /metrics/profile?token=...&enable=1
+PROFILE_TOKEN = os.environ.get('NETFLIX_PROFILE_TOKEN', '')
+METRICS_TOKEN = os.environ.get('NETFLIX_METRICS_TOKEN', '')
+
+# Odchudzone figury (mały szablon, kody ISO-3, zaokrąglone tablice) i silnik JSON odpowiedzi ('orjson' / 'json')
+SLIM_FIGURES = os.environ.get('NETFLIX_SLIM_FIGURES', '1') == '1'
+JSON_ENGINE = os.environ.get('NETFLIX_JSON_ENGINE', 'orjson')
+
+# Ile podpowiedzi zwraca wyszukiwanie w listach wyboru (kraje itd.) - lista nie jest wysyłana w całości
+SEARCH_LIMIT = int(os.environ.get('NETFLIX_SEARCH_LIMIT', '20'))
+# Wyszukiwanie pełnotekstowe (tytuł + opis): ostatnie słowo zapytania dopasowywane jako prefiks
+TEXT_SEARCH_PREFIX = os.environ.get('NETFLIX_TEXT_PREFIX', '1') == '1'
+
+# Rozgrzewanie cache wykresów przy starcie i po przeładowaniu danych (pula procesów, patrz warmup.py).
+# Domyślnie wyłączone: bez współdzielonego backendu cache każdy worker gunicorna rozgrzewałby własną pulą.
+# Ze współdzielonym backendem (disk / redis) daną wersję danych rozgrzewa tylko jeden proces
+WARMUP = os.environ.get('NETFLIX_WARMUP', '0') == '1'
+WARMUP_WORKERS = int(os.environ.get('NETFLIX_WARMUP_WORKERS', '0')) or min(4, os.cpu_count() or 1)
+# Po tylu sekundach zgłoszenie rozgrzewania (plik w CACHE_DIR/warmup) uznaje się za porzucone
+WARMUP_CLAIM_TTL = float(os.environ.get('NETFLIX_WARMUP_CLAIM_TTL', '1800'))
+
+# Tryb tła dla ciężkich callbacków (reżyserzy, obsada, ratingi, czas trwania, hierarchia gatunków) - patrz jobs.py
+BACKGROUND_CALLBACKS = os.environ.get('NETFLIX_BACKGROUND', '0') == '1'
+BACKGROUND_DIR = os.environ.get('NETFLIX_BACKGROUND_DIR', os.path.join(CACHE_DIR, 'jobs'))
+BACKGROUND_RESULT_TTL = int(os.environ.get('NETFLIX_BACKGROUND_TTL', '300'))
+
+# Tryb przybliżony: top-N obsady / reżyserów / gatunków i liczby unikalnych wartości ze szkiców strumieniowych
+# (Space-Saving, HyperLogLog - patrz sketches.py), z granicami błędu na wykresach
+APPROXIMATE = os.environ.get('NETFLIX_APPROXIMATE', '0') == '1'
+SKETCH_CAPACITY = int(os.environ.get('NETFLIX_SKETCH_CAPACITY', '1024'))
+SKETCH_HLL_PRECISION = int(os.environ.get('NETFLIX_SKETCH_HLL_PRECISION', '12'))
+SKETCH_CHUNK_ROWS = int(os.environ.get('NETFLIX_SKETCH_CHUNK_ROWS', '1000000'))
+
+# Silnik agregacji wycinków z filtrem krzyżowym: 'pandas' (w pamięci), 'duckdb' albo 'sqlite' (SQL nad plikami
+# Parquet z CACHE_DIR, patrz query_backend.py)
+QUERY_BACKEND = os.environ.get('NETFLIX_QUERY_BACKEND', 'pandas')
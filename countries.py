@@ -0,0 +1,48 @@
+# Nazwa kraju (jak w netflix_titles.csv) -> kod ISO 3166-1 alfa-3 dla locationmode='ISO-3'.
+# Historyczne nazwy przypisane tak jak dopasowuje je plotly.js w trybie 'country names'
+# (West Germany -> DEU, Soviet Union -> RUS); kraje bez kodu (np. East Germany) nie trafiają na mapę.
+COUNTRY_ISO3 = {
+    'Afghanistan': 'AFG', 'Albania': 'ALB', 'Algeria': 'DZA', 'Andorra': 'AND', 'Angola': 'AGO',
+    'Antigua and Barbuda': 'ATG', 'Argentina': 'ARG', 'Armenia': 'ARM', 'Aruba': 'ABW', 'Australia': 'AUS',
+    'Austria': 'AUT', 'Azerbaijan': 'AZE', 'Bahamas': 'BHS', 'Bahrain': 'BHR', 'Bangladesh': 'BGD',
+    'Barbados': 'BRB', 'Belarus': 'BLR', 'Belgium': 'BEL', 'Belize': 'BLZ', 'Benin': 'BEN', 'Bermuda': 'BMU',
+    'Bhutan': 'BTN', 'Bolivia': 'BOL', 'Bosnia and Herzegovina': 'BIH', 'Botswana': 'BWA', 'Brazil': 'BRA',
+    'Brunei': 'BRN', 'Bulgaria': 'BGR', 'Burkina Faso': 'BFA', 'Burundi': 'BDI', 'Cambodia': 'KHM',
+    'Cameroon': 'CMR', 'Canada': 'CAN', 'Cape Verde': 'CPV', 'Cayman Islands': 'CYM',
+    'Central African Republic': 'CAF', 'Chad': 'TCD', 'Chile': 'CHL', 'China': 'CHN', 'Colombia': 'COL',
+    'Comoros': 'COM', 'Congo': 'COG', 'Democratic Republic of the Congo': 'COD', 'Costa Rica': 'CRI',
+    'Croatia': 'HRV', 'Cuba': 'CUB', 'Cyprus': 'CYP', 'Czech Republic': 'CZE', 'Czechia': 'CZE',
+    'Denmark': 'DNK', 'Djibouti': 'DJI', 'Dominica': 'DMA', 'Dominican Republic': 'DOM', 'Ecuador': 'ECU',
+    'Egypt': 'EGY', 'El Salvador': 'SLV', 'Equatorial Guinea': 'GNQ', 'Eritrea': 'ERI', 'Estonia': 'EST',
+    'Eswatini': 'SWZ', 'Ethiopia': 'ETH', 'Fiji': 'FJI', 'Finland': 'FIN', 'France': 'FRA', 'Gabon': 'GAB',
+    'Gambia': 'GMB', 'Georgia': 'GEO', 'Germany': 'DEU', 'West Germany': 'DEU', 'Ghana': 'GHA',
+    'Greece': 'GRC', 'Greenland': 'GRL', 'Grenada': 'GRD', 'Guatemala': 'GTM', 'Guinea': 'GIN',
+    'Guinea-Bissau': 'GNB', 'Guyana': 'GUY', 'Haiti': 'HTI', 'Honduras': 'HND', 'Hong Kong': 'HKG',
+    'Hungary': 'HUN', 'Iceland': 'ISL', 'India': 'IND', 'Indonesia': 'IDN', 'Iran': 'IRN', 'Iraq': 'IRQ',
+    'Ireland': 'IRL', 'Israel': 'ISR', 'Italy': 'ITA', 'Ivory Coast': 'CIV', 'Jamaica': 'JAM', 'Japan': 'JPN',
+    'Jordan': 'JOR', 'Kazakhstan': 'KAZ', 'Kenya': 'KEN', 'Kosovo': 'XKX', 'Kuwait': 'KWT', 'Kyrgyzstan': 'KGZ',
+    'Laos': 'LAO', 'Latvia': 'LVA', 'Lebanon': 'LBN', 'Lesotho': 'LSO', 'Liberia': 'LBR', 'Libya': 'LBY',
+    'Liechtenstein': 'LIE', 'Lithuania': 'LTU', 'Luxembourg': 'LUX', 'Macau': 'MAC', 'Madagascar': 'MDG',
+    'Malawi': 'MWI', 'Malaysia': 'MYS', 'Maldives': 'MDV', 'Mali': 'MLI', 'Malta': 'MLT', 'Mauritania': 'MRT',
+    'Mauritius': 'MUS', 'Mexico': 'MEX', 'Moldova': 'MDA', 'Monaco': 'MCO', 'Mongolia': 'MNG',
+    'Montenegro': 'MNE', 'Morocco': 'MAR', 'Mozambique': 'MOZ', 'Myanmar': 'MMR', 'Namibia': 'NAM',
+    'Nepal': 'NPL', 'Netherlands': 'NLD', 'New Zealand': 'NZL', 'Nicaragua': 'NIC', 'Niger': 'NER',
+    'Nigeria': 'NGA', 'North Korea': 'PRK', 'North Macedonia': 'MKD', 'Norway': 'NOR', 'Oman': 'OMN',
+    'Pakistan': 'PAK', 'Palestine': 'PSE', 'Panama': 'PAN', 'Papua New Guinea': 'PNG', 'Paraguay': 'PRY',
+    'Peru': 'PER', 'Philippines': 'PHL', 'Poland': 'POL', 'Portugal': 'PRT', 'Puerto Rico': 'PRI',
+    'Qatar': 'QAT', 'Romania': 'ROU', 'Russia': 'RUS', 'Soviet Union': 'RUS', 'Rwanda': 'RWA', 'Samoa': 'WSM',
+    'San Marino': 'SMR', 'Saudi Arabia': 'SAU', 'Senegal': 'SEN', 'Serbia': 'SRB', 'Seychelles': 'SYC',
+    'Sierra Leone': 'SLE', 'Singapore': 'SGP', 'Slovakia': 'SVK', 'Slovenia': 'SVN', 'Somalia': 'SOM',
+    'South Africa': 'ZAF', 'South Korea': 'KOR', 'South Sudan': 'SSD', 'Spain': 'ESP', 'Sri Lanka': 'LKA',
+    'Sudan': 'SDN', 'Suriname': 'SUR', 'Sweden': 'SWE', 'Switzerland': 'CHE', 'Syria': 'SYR', 'Taiwan': 'TWN',
+    'Tajikistan': 'TJK', 'Tanzania': 'TZA', 'Thailand': 'THA', 'Togo': 'TGO', 'Trinidad and Tobago': 'TTO',
+    'Tunisia': 'TUN', 'Turkey': 'TUR', 'Turkmenistan': 'TKM', 'Uganda': 'UGA', 'Ukraine': 'UKR',
+    'United Arab Emirates': 'ARE', 'United Kingdom': 'GBR', 'United States': 'USA', 'Uruguay': 'URY',
+    'Uzbekistan': 'UZB', 'Vatican City': 'VAT', 'Venezuela': 'VEN', 'Vietnam': 'VNM', 'Yemen': 'YEM',
+    'Zambia': 'ZMB', 'Zimbabwe': 'ZWE',
+}
+
+
+def country_codes(names):
+    # Wywoływane raz przy ładowaniu danych (kategorie tabeli pomostowej 'country')
+    return {name: COUNTRY_ISO3[name] for name in names if name in COUNTRY_ISO3}
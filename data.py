@@ -1,44 +1,489 @@
+import functools
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 
+from aggregates import build_aggregate_cube, build_row_codes, build_slice, build_timeline, gather
+from config import APPROXIMATE, CACHE_DIR, COMPACT_CATALOG, CSV_PATH
+from countries import country_codes
+from facets import TEXT_FACET, FacetIndex
+from metrics import stage
+from search_index import build_search_index
+from sketches import build_sketches
+from text_index import TextIndex
+
 NETFLIX_RED = '#E50914'
 
+# Zwiększ przy każdej zmianie przetwarzania danych - stary cache zostanie odrzucony
+CACHE_SCHEMA_VERSION = 5
 
-def load_and_process_data():
-    try:
-        df = pd.read_csv('netflix_titles.csv')
+# Kolumny pliku źródłowego - z nich liczony jest skrót wiersza (wykrywanie zmian przy przeładowaniu)
+RAW_COLUMNS = ['show_id', 'type', 'title', 'director', 'cast', 'country', 'date_added',
+               'release_year', 'rating', 'duration', 'listed_in', 'description']
 
-        # 1. Konwersja dat
-        df['date_added'] = pd.to_datetime(df['date_added'].str.strip(), format='mixed', errors='coerce')
-        df = df.dropna(subset=['date_added'])
-        df['year_added'] = df['date_added'].dt.year
+# Kolumny wielowartościowe -> nazwa tabeli pomostowej (bridge)
+BRIDGE_COLUMNS = {
+    'country': 'country',
+    'cast': 'cast',
+    'director': 'director',
+    'genre': 'listed_in',
+}
 
-        # 2. Uzupełnienie braków
-        df['country'] = df['country'].fillna('Unknown')
-        df['rating'] = df['rating'].fillna('Unknown')
-        df['director'] = df['director'].fillna('Unknown')
-        df['cast'] = df['cast'].fillna('Unknown')
 
+class Dataset:
+    # Przetworzony katalog + tabele pomostowe show_id -> wartość (kraj/aktor/reżyser/gatunek).
+    # Każda tabela ma kolumny: row (pozycja w df), show_id, value (Categorical = kody całkowite).
+    # show_id w tabelach to Categorical o kodach = row, więc nie powiela napisów.
+    # cube: gotowe agregaty dla każdej wartości filtra typu (patrz aggregates.py).
+    # timeline: dzienne liczniki per typ dla wykresu trendu.
+    # facets: bitmapy wierszy dla filtrów krzyżowych (patrz facets.py).
+    # search: indeksy prefiksowe nazw dla list wyboru (patrz search_index.py).
+    # text: indeks odwrócony tytułów i opisów dla wyszukiwania pełnotekstowego (patrz text_index.py).
+    # sketches: szkice top-N i liczby unikalnych wartości w trybie przybliżonym (patrz sketches.py), inaczej None.
+    # row_codes: kolumny całkowite dla wycinków z filtrem krzyżowym (patrz aggregates.build_row_codes), leniwie.
 
-        def extract_minutes(x):
-            if isinstance(x, str) and 'min' in x:
-                return int(x.split(' ')[0])
-            return None
+    def __init__(self, df, bridges=None, version='0', cube=None, timeline=None, facets=None, source=None,
+                 text=None, search=None, sketches=None, approximate=APPROXIMATE):
+        self.df = df
+        # Znacznik wersji danych (skrót pliku źródłowego) - część kluczy cache wykresów
+        self.version = version
+        # Rozmiar / mtime / sha256 pliku, z którego powstał zbiór (patrz reload.py)
+        self.source = source or {}
+        # Gotowe części (np. z migawki w pamięci współdzielonej, patrz shared.py) nie są przeliczane
+        self.bridges = bridges if bridges is not None else build_bridge_tables(df)
+        self.cube = cube if cube is not None else build_aggregate_cube(self)
+        self.timeline = timeline if timeline is not None else build_timeline(df)
+        self.facets = facets if facets is not None else FacetIndex(self)
+        self.text = text if text is not None else TextIndex.build(df)
+        # Nazwa kraju -> ISO-3 dla mapy, raz dla całego słownika krajów
+        self.country_codes = country_codes(self.categories('country')) if 'country' in self.bridges else {}
+        # Indeksy prefiksowe krajów / aktorów / reżyserów dla list wyboru (patrz search_index.py)
+        self.search = search if search is not None else build_search_index(self)
+        # Szkice nie obsługują usuwania wierszy - przy przeładowaniu liczone od nowa z tabel pomostowych
+        if sketches is None and approximate and not df.empty:
+            sketches = build_sketches(self)
+        self.sketches = sketches
+        self._slices = OrderedDict()
+        self._slices_lock = threading.Lock()
+
+    @functools.cached_property
+    def row_codes(self):
+        return build_row_codes(self)
 
-        def extract_seasons(x):
-            if isinstance(x, str) and 'Season' in x:
-                return int(x.split(' ')[0])
+    def type_mask(self, selected_type):
+        if selected_type == 'All' or self.df.empty:
             return None
+        return self.df['type'].to_numpy() == selected_type
+
+    def selection_mask(self, selected_type, selection=None):
+        # Filtr typu AND filtry krzyżowe rozwiązywane operacjami bitowymi na indeksie faset
+        # AND wiersze pasujące do zapytania pełnotekstowego
+        query = dict(selection or {})
+        text = query.pop(TEXT_FACET, None)
+        if selected_type != 'All':
+            query['type'] = [selected_type]
+        bits = self.facets.query(query)
+        mask = None if bits is None else self.facets.to_mask(bits)
+        text_mask = self.text.mask(' '.join(text)) if text else None
+        if text_mask is None:
+            return mask
+        return text_mask if mask is None else mask & text_mask
+
+    def slice(self, selected_type, selection=None):
+        # Bez filtrów krzyżowych - gotowy wycinek kostki; w przeciwnym razie agregacja po zbiorze wierszy
+        if not selection:
+            return self.cube[selected_type]
+        key = json.dumps([selected_type, selection], sort_keys=True)
+        with self._slices_lock:
+            if key in self._slices:
+                self._slices.move_to_end(key)
+                return self._slices[key]
+        with stage('aggregation'):
+            cube_slice = build_slice(self, self.selection_mask(selected_type, selection))
+        with self._slices_lock:
+            self._slices[key] = cube_slice
+            if len(self._slices) > 64:
+                self._slices.popitem(last=False)
+        return cube_slice
+
+    def memory_report(self):
+        # Bajty na kolumnę katalogu i na każdą tabelę pochodną
+        rows = [('catalog', column, _nbytes(self.df[column])) for column in self.df.columns]
+        for name, bridge in self.bridges.items():
+            for column in bridge.columns:
+                values = bridge[column]
+                # show_id dzieli kategorie z katalogiem - liczymy tylko kody
+                size = values.cat.codes.nbytes if column == 'show_id' and values.dtype == 'category' else _nbytes(values)
+                rows.append((f'bridge:{name}', column, int(size)))
+        rows.append(('cube', '', _nbytes(self.cube)))
+        rows.append(('timeline', '', _nbytes(self.timeline or {})))
+        rows.append(('row_codes', '', _nbytes(self.row_codes)))
+        rows.append(('facets', '', self.facets.memory_bytes()))
+        rows.extend(('search', name, index.memory_bytes()) for name, index in self.search.items())
+        rows.append(('text', '', self.text.memory_bytes()))
+        if self.sketches is not None:
+            rows.append(('sketches', '', self.sketches.memory_bytes()))
+        report = pd.DataFrame(rows, columns=['table', 'column', 'bytes'])
+        report['MB'] = (report['bytes'] / 2 ** 20).round(2)
+        return report
+
+    def filtered(self, selected_type):
+        mask = self.type_mask(selected_type)
+        return self.df if mask is None else self.df[mask]
+
+    def categories(self, name):
+        return self.bridges[name]['value'].cat.categories
+
+    def count_values(self, name, mask=None):
+        # Liczba tytułów na wartość, malejąco; mask to tablica bool po wierszach df
+        bridge = self.bridges[name]
+        codes = bridge['value'].cat.codes.to_numpy()
+        if mask is not None:
+            codes = codes[gather(mask, bridge['row'].to_numpy())]
+        categories = self.categories(name)
+        counts = np.bincount(codes, minlength=len(categories))
+        # Niezerowe malejąco (remisy w kolejności kodów); tablice pośrednie zwalniane od razu,
+        # a indeks kategorii wybierany raz zamiast filtra i sortowania Series (dwie kopie)
+        del codes
+        present = np.flatnonzero(counts)
+        counts = counts[present]
+        order = np.argsort(np.negative(counts), kind='stable')
+        return pd.Series(counts[order], index=categories[present[order]], name='count')
+
+
+def _show_index(df):
+    # Wspólne kategorie show_id dla wszystkich tabel pomostowych (kody = numer wiersza)
+    if 'show_id' in df.columns and df['show_id'].is_unique:
+        return pd.Index(df['show_id'])
+    return None
+
+
+def _show_ids(df, rows, show_index=None):
+    if show_index is not None:
+        return pd.Categorical.from_codes(rows, categories=show_index)
+    return df['show_id'].to_numpy()[rows] if 'show_id' in df.columns else np.array([], dtype=object)
+
+
+def explode_column(df, column, show_index=None):
+    if column not in df.columns or df.empty:
+        return pd.DataFrame({'row': np.array([], dtype=np.int32),
+                             'show_id': _show_ids(df, np.array([], dtype=np.int32)),
+                             'value': pd.Categorical([])})
+
+    # Dzielimy tylko unikalne napisy (kombinacje krajów/gatunków mocno się powtarzają),
+    # a potem rozwijamy je na wiersze operacjami na tablicach
+    codes, uniques = pd.factorize(df[column].to_numpy())
+    pieces = pd.Series(uniques, dtype=object).str.split(',').explode().str.strip()
+    pieces = pieces[pieces.notna() & (pieces != '') & (pieces != 'Unknown')]
+    values = pd.Categorical(pieces.to_numpy())
+    piece_uid = pieces.index.to_numpy()
+
+    per_uid = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    order = np.argsort(codes, kind='stable')
+    starts = (codes < 0).sum() + np.cumsum(per_uid) - per_uid
+
+    repeat = per_uid[piece_uid]
+    offsets = np.arange(repeat.sum()) - np.repeat(np.cumsum(repeat) - repeat, repeat)
+    rows = order[np.repeat(starts[piece_uid], repeat) + offsets]
+    value_codes = np.repeat(values.codes, repeat)
+
+    by_row = np.argsort(rows, kind='stable')
+    rows = rows[by_row].astype(np.int32)
+    return pd.DataFrame({
+        'row': rows,
+        'show_id': _show_ids(df, rows, show_index),
+        'value': pd.Categorical.from_codes(value_codes[by_row], categories=values.categories),
+    })
+
+
+def build_bridge_tables(df):
+    show_index = _show_index(df)
+    return {name: explode_column(df, column, show_index) for name, column in BRIDGE_COLUMNS.items()}
+
+
+DATE_FORMAT = '%B %d, %Y'
+DURATION_PATTERN = r'^\s*(\d+)\s*(min|Season)'
+
+
+def _parse_unique(values, parse):
+    # Daty i czasy trwania mają mało unikalnych wartości - parsujemy każdą tylko raz
+    codes, uniques = pd.factorize(values)
+    parsed = parse(pd.Series(uniques, dtype=object))
+    return codes, parsed
+
+
+def parse_dates(values):
+    # Szybka ścieżka: jawny format ("September 25, 2021"); 'mixed' tylko dla nietypowych wierszy
+    def parse(uniques):
+        uniques = uniques.str.strip()
+        parsed = pd.to_datetime(uniques, format=DATE_FORMAT, errors='coerce')
+        outliers = parsed.isna() & uniques.notna()
+        if outliers.any():
+            parsed[outliers] = pd.to_datetime(uniques[outliers], format='mixed', errors='coerce')
+        return parsed
+
+    codes, parsed = _parse_unique(values, parse)
+    return pd.Series(pd.DatetimeIndex(parsed).take(codes, allow_fill=True, fill_value=pd.NaT), index=values.index)
+
+
+def parse_duration(values):
+    # Jeden przebieg regexem: "90 min" -> minuty, "2 Seasons" -> sezony
+    def parse(uniques):
+        parts = uniques.str.extract(DURATION_PATTERN)
+        number = pd.to_numeric(parts[0], errors='coerce').astype('Int32')
+        return pd.DataFrame({'min': number.where(parts[1] == 'min'),
+                             'seasons': number.where(parts[1] == 'Season')})
+
+    codes, parsed = _parse_unique(values, parse)
+    # Kod -1 (brak wartości) -> <NA>
+    minutes = pd.Series(parsed['min'].array.take(codes, allow_fill=True), index=values.index)
+    seasons = pd.Series(parsed['seasons'].array.take(codes, allow_fill=True), index=values.index)
+    return minutes, seasons
+
+
+# Kolumny o mało unikalnych wartościach -> category; pozostałe napisy -> string[pyarrow]
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+def _string_dtype():
+    try:
+        import pyarrow  # noqa: F401
+        return 'string[pyarrow]'
+    except ImportError:
+        return object
+
+
+def compact_frame(df):
+    # Tryb kompaktowy: kody zamiast powielonych napisów ('Unknown' trzymane raz) i węższe liczby
+    string_dtype = _string_dtype()
+    for column in df.columns:
+        if df[column].dtype != object:
+            continue
+        if df[column].nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(df):
+            df[column] = df[column].astype('category')
+        else:
+            df[column] = df[column].astype(string_dtype)
+
+    df['release_year'] = pd.to_numeric(df['release_year'], downcast='integer')
+    df['year_added'] = df['year_added'].astype(np.int16)
+    for column in ['duration_min', 'seasons_count']:
+        df[column] = narrow_integers(df[column])
+    return df
+
+
+def narrow_integers(values):
+    # Najwęższy typ Int* mieszczący faktyczny zakres (np. > 127 sezonów -> Int16), bez przepełnienia
+    return pd.to_numeric(values.astype('Int64'), downcast='integer')
+
+
+def _nbytes(obj):
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True, index=False)
+        return int(usage.sum()) if isinstance(obj, pd.DataFrame) else int(usage)
+    if isinstance(obj, pd.Index):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sum(_nbytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(_nbytes(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+def row_hashes(df):
+    columns = [c for c in RAW_COLUMNS if c in df.columns]
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def parse_catalog(df, compact=COMPACT_CATALOG):
+    # 0. Skrót surowego wiersza - pozwala przeładować tylko zmienione wiersze
+    df['row_hash'] = row_hashes(df)
+
+    # 1. Konwersja dat
+    df['date_added'] = parse_dates(df['date_added'])
+    df = df.dropna(subset=['date_added']).reset_index(drop=True)
+    df['year_added'] = df['date_added'].dt.year
+
+    # 2. Uzupełnienie braków
+    df['country'] = df['country'].fillna('Unknown')
+    df['rating'] = df['rating'].fillna('Unknown')
+    df['director'] = df['director'].fillna('Unknown')
+    df['cast'] = df['cast'].fillna('Unknown')
+
+    df['duration_min'], df['seasons_count'] = parse_duration(df['duration'])
+
+    if compact:
+        df = compact_frame(df)
+    return df
+
+
+def process_catalog(df, compact=COMPACT_CATALOG):
+    # 3. Tabele pomostowe dla kolumn wielowartościowych (liczone raz, nie w każdym callbacku)
+    return Dataset(parse_catalog(df, compact))
+
+
+# --- CACHE (Parquet) ---
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_stamp(path):
+    return _stamp(os.stat(path))
+
+
+def _stamp(st):
+    return {'schema': CACHE_SCHEMA_VERSION, 'compact': COMPACT_CATALOG, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def read_source(path):
+    # Jeden odczyt pliku: te same bajty idą do parsowania i do skrótu, znacznik z tego samego deskryptora
+    # (plik podmieniony w trakcie nie trafi do cache pod cudzym znacznikiem)
+    with open(path, 'rb') as f:
+        stamp = _stamp(os.fstat(f.fileno()))
+        content = f.read()
+    stamp['sha256'] = hashlib.sha256(content).hexdigest()
+    return stamp, content
+
+
+def _cache_paths(cache_dir):
+    return {
+        'meta': os.path.join(cache_dir, 'meta.json'),
+        'catalog': os.path.join(cache_dir, 'catalog.parquet'),
+        'bridge': lambda name: os.path.join(cache_dir, f'bridge_{name}.parquet'),
+        'categories': lambda name: os.path.join(cache_dir, f'categories_{name}.parquet'),
+        'text_terms': os.path.join(cache_dir, 'text_terms.parquet'),
+        'text_rows': os.path.join(cache_dir, 'text_rows.parquet'),
+    }
+
+
+def read_cache_meta(cache_dir):
+    try:
+        with open(_cache_paths(cache_dir)['meta'], encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_cache_valid(path, cache_dir):
+    meta = read_cache_meta(cache_dir)
+    if not meta or meta.get('schema') != CACHE_SCHEMA_VERSION or meta.get('compact') != COMPACT_CATALOG:
+        return False
+    stamp = source_stamp(path)
+    if meta.get('size') == stamp['size'] and meta.get('mtime_ns') == stamp['mtime_ns']:
+        return True
+    # Plik "dotknięty" (inny mtime), ale treść ta sama - cache nadal aktualny
+    if meta.get('size') == stamp['size'] and meta.get('sha256') == file_digest(path):
+        meta.update(stamp)
+        _write_json_atomic(_cache_paths(cache_dir)['meta'], meta)
+        return True
+    return False
+
+
+def _tmp_path(path):
+    # Plik tymczasowy per proces i wątek - workery i obserwator mogą zapisywać cache równocześnie
+    return f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+
+
+def _write_json_atomic(path, obj):
+    tmp = _tmp_path(path)
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+
+def _write_parquet_atomic(frame, path):
+    tmp = _tmp_path(path)
+    frame.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def save_cache(data, cache_dir):
+    paths = _cache_paths(cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_parquet_atomic(data.df, paths['catalog'])
+    for name, bridge in data.bridges.items():
+        codes = pd.DataFrame({
+            'row': bridge['row'].to_numpy(),
+            'code': bridge['value'].cat.codes.to_numpy(),
+        })
+        _write_parquet_atomic(codes, paths['bridge'](name))
+        _write_parquet_atomic(pd.DataFrame({'value': data.categories(name)}), paths['categories'](name))
+    # Indeks pełnotekstowy: słowa z liczbą wpisów + płaska lista wierszy (offsety odtwarzane z liczników)
+    terms = pd.DataFrame({'term': pd.Series(data.text.terms, dtype=object), 'count': np.diff(data.text.offsets)})
+    _write_parquet_atomic(terms, paths['text_terms'])
+    _write_parquet_atomic(pd.DataFrame({'row': data.text.rows}), paths['text_rows'])
+    # meta.json zapisywany na końcu - niedokończony zapis nigdy nie jest traktowany jako ważny cache
+    # Znacznik z odczytu, z którego powstały dane (data.source), nie ponowny stat pliku
+    meta = {'schema': CACHE_SCHEMA_VERSION, 'compact': COMPACT_CATALOG}
+    meta.update((key, data.source[key]) for key in ('size', 'mtime_ns', 'sha256'))
+    _write_json_atomic(paths['meta'], meta)
+
+
+def load_cache(cache_dir):
+    paths = _cache_paths(cache_dir)
+    df = pd.read_parquet(paths['catalog'])
+    if COMPACT_CATALOG:
+        # Parquet przywraca string[python] - wracamy do napisów Arrow
+        string_columns = [c for c in df.columns if isinstance(df[c].dtype, pd.StringDtype)]
+        df = df.astype({c: _string_dtype() for c in string_columns})
+    show_index = _show_index(df)
+    bridges = {}
+    for name in BRIDGE_COLUMNS:
+        codes = pd.read_parquet(paths['bridge'](name))
+        categories = pd.read_parquet(paths['categories'](name))['value'].to_numpy()
+        bridges[name] = pd.DataFrame({
+            'row': codes['row'].to_numpy(),
+            'show_id': _show_ids(df, codes['row'].to_numpy(), show_index),
+            'value': pd.Categorical.from_codes(codes['code'].to_numpy(), categories=categories),
+        })
+    terms = pd.read_parquet(paths['text_terms'])
+    offsets = np.concatenate([[0], np.cumsum(terms['count'].to_numpy())])
+    text = TextIndex(terms['term'].tolist(), offsets, pd.read_parquet(paths['text_rows'])['row'].to_numpy(), len(df))
+    meta = read_cache_meta(cache_dir)
+    source = {k: meta[k] for k in ('size', 'mtime_ns', 'sha256')}
+    return Dataset(df, bridges, version=meta['sha256'][:16], source=source, text=text)
+
+
+def load_and_process_data(path=CSV_PATH, cache_dir=CACHE_DIR, use_cache=True):
+    try:
+        if use_cache and is_cache_valid(path, cache_dir):
+            try:
+                return load_cache(cache_dir)
+            except (ImportError, OSError, ValueError, KeyError) as e:
+                print(f"OSTRZEŻENIE: Nie udało się wczytać cache ({e}), parsuję CSV.")
 
-        df['duration_min'] = df['duration'].apply(extract_minutes)
-        df['seasons_count'] = df['duration'].apply(extract_seasons)
+        stamp, content = read_source(path)
+        data = process_catalog(pd.read_csv(io.BytesIO(content)))
+        del content
+        data.version = stamp['sha256'][:16]
+        data.source = {key: stamp[key] for key in ('size', 'mtime_ns', 'sha256')}
 
-        return df
+        if use_cache:
+            try:
+                save_cache(data, cache_dir)
+            except (ImportError, OSError, ValueError) as e:
+                # Brak pyarrow/fastparquet lub katalog tylko do odczytu - działamy bez cache
+                print(f"OSTRZEŻENIE: Nie udało się zapisać cache ({e}).")
+        return data
     except FileNotFoundError:
-        print("BŁĄD: Nie znaleziono pliku 'netflix_titles.csv'.")
-        return pd.DataFrame()
+        print(f"BŁĄD: Nie znaleziono pliku '{path}'.")
+        return Dataset(pd.DataFrame())
 
 
 def get_data_date(df):
     if not df.empty and 'date_added' in df.columns:
         return df['date_added'].max().strftime('%Y-%m-%d')
-    return "N/A"
\ No newline at end of file
+    return "N/A"
@@ -0,0 +1,311 @@
+# Statyczny eksport dashboardu: każda figura dla skończonej przestrzeni wejść (kontrolki bez filtrów krzyżowych
+# i wyszukiwania), budowana w puli procesów tymi samymi budowniczymi co callbacki (register_callbacks).
+# Paczka: index.html (układ z create_layout + plotly.js), figures/<wykres>/<skrót>.json i manifest.json
+# (wartości kontrolek -> plik), do serwowania z CDN albo zwykłego serwera plików - bez Pythona przy żądaniu.
+#   python -m export --out dist --workers 4 --countries 10
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import time
+
+import plotly
+
+from aggregates import TYPES
+from config import SLIM_FIGURES, WARMUP_WORKERS
+from warmup import (DEFAULT_COUNTRIES, GENRE_TOP_N, HIERARCHY_N, HIERARCHY_TYPES, MAP_TYPES, SLIDER_TOP_N, TREND_AGGS,
+                    TREND_INTERVALS, TREND_VIEWS, build_views)
+
+# Wykres -> (budowniczy, kontrolki w kolejności argumentów); ostatni argument (filtr krzyżowy) zawsze pusty
+VIEWS = {
+    'map-graph': ('map_figure', ['type-filter', 'map-type']),
+    'trend-graph': ('trend_figure', ['type-filter', 'trend-interval', 'trend-split', 'trend-agg']),
+    'month-pie-graph': ('month_figure', ['type-filter']),
+    'country-comparison-graph': ('country_figure', ['type-filter', 'country-1', 'country-2']),
+    'genre-bar-graph': ('genre_bar_figure', ['type-filter', 'genre-top-n']),
+    'genre-hierarchy-graph': ('genre_hierarchy_figure', ['type-filter', 'hierarchy-type', 'hierarchy-n']),
+    'duration-hist': ('duration_figure', ['type-filter']),
+    'seasons-bar': ('seasons_figure', ['type-filter']),
+    'director-graph': ('director_figure', ['type-filter', 'director-slider']),
+    'rating-graph': ('rating_figure', ['type-filter']),
+    'cast-graph': ('cast_figure', ['type-filter', 'cast-slider']),
+}
+KPI_IDS = ['kpi-total', 'kpi-movie-perc', 'kpi-tv-perc', 'kpi-actors', 'kpi-countries']
+# Elementy wymagające serwera (wyszukiwanie, filtry krzyżowe) - pomijane w wersji statycznej
+SERVER_ONLY = {'text-search', 'cross-filter-summary', 'clear-cross-filter'}
+DEFAULT_TOP_COUNTRIES = 10
+
+# Klasy Bootstrapa dla komponentów dbc renderowanych jako <div>
+BOOTSTRAP_CLASSES = {'Row': 'row', 'Card': 'card', 'CardHeader': 'card-header', 'CardBody': 'card-body',
+                     'ModalHeader': 'modal-header', 'ModalBody': 'modal-body', 'ModalFooter': 'modal-footer'}
+VOID_TAGS = {'br', 'hr', 'img', 'input'}
+
+SCRIPT = """
+(function () {
+    function value(id) {
+        var el = document.getElementById(id);
+        if (!el) { return null; }
+        var checked = el.querySelector('input:checked');
+        return checked ? checked.value : el.value;
+    }
+    function show(manifest, graphId) {
+        var view = manifest.views[graphId];
+        var key = view.inputs.map(value).join('|');
+        var el = document.getElementById(graphId);
+        var file = view.files[key];
+        if (!file) {
+            el.innerHTML = '<p class="text-muted small p-3">Ta kombinacja nie została wyeksportowana.</p>';
+            el.dataset.key = '';
+            return;
+        }
+        if (el.dataset.key === key) { return; }
+        el.dataset.key = key;
+        fetch(file).then(function (r) { return r.json(); }).then(function (fig) {
+            if (!el.dataset.plotted) { el.innerHTML = ''; el.dataset.plotted = '1'; }
+            Plotly.react(el, fig.data, fig.layout, {responsive: true});
+        });
+    }
+    function kpi(manifest) {
+        var values = manifest.kpi[value('type-filter')] || [];
+        manifest.kpi_ids.forEach(function (id, i) {
+            document.getElementById(id).textContent = values[i] === undefined ? '-' : values[i];
+        });
+    }
+    fetch('manifest.json').then(function (r) { return r.json(); }).then(function (manifest) {
+        var refresh = function () {
+            kpi(manifest);
+            Object.keys(manifest.views).forEach(function (id) { show(manifest, id); });
+        };
+        document.addEventListener('change', refresh);
+        document.addEventListener('input', function (e) {
+            if (e.target.type === 'range') { refresh(); }
+        });
+        refresh();
+    });
+    // Okna pomocy: przyciski open-modal-* / close-modal-*
+    document.addEventListener('click', function (e) {
+        var id = e.target.id || '';
+        if (id.indexOf('open-') === 0) { document.getElementById(id.slice(5)).showModal(); }
+        if (id.indexOf('close-') === 0) { document.getElementById(id.slice(6)).close(); }
+    });
+})();
+"""
+
+
+def control_values(data, top_countries=DEFAULT_TOP_COUNTRIES):
+    # Skończona przestrzeń wejść - te same wartości co w warmup.plan; kraje: top-N według liczby tytułów
+    countries = list(dict.fromkeys(list(DEFAULT_COUNTRIES) + data.count_values('country').index[:top_countries].tolist()))
+    return {
+        'type-filter': TYPES, 'map-type': MAP_TYPES,
+        'trend-interval': TREND_INTERVALS, 'trend-split': TREND_VIEWS, 'trend-agg': TREND_AGGS,
+        'genre-top-n': GENRE_TOP_N, 'hierarchy-type': HIERARCHY_TYPES, 'hierarchy-n': HIERARCHY_N,
+        'director-slider': SLIDER_TOP_N, 'cast-slider': SLIDER_TOP_N,
+        'country-1': countries, 'country-2': countries,
+    }
+
+
+def plan(controls):
+    # (wykres, klucz manifestu, budowniczy, argumenty) dla każdej kombinacji kontrolek
+    calls = []
+    for graph_id, (name, inputs) in VIEWS.items():
+        combinations = [[]]
+        for control in inputs:
+            combinations = [combo + [value] for combo in combinations for value in controls[control]]
+        for combo in combinations:
+            calls.append((graph_id, '|'.join(str(v) for v in combo), name, tuple(combo) + ({},)))
+    return calls
+
+
+def _file_name(graph_id, key):
+    return f"figures/{graph_id}/{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.json"
+
+
+# --- HTML z drzewa komponentów create_layout ---
+
+def _style(style):
+    # camelCase Reacta -> właściwości CSS
+    return ';'.join(re.sub(r'([A-Z])', r'-\1', key).lower() + f':{value}' for key, value in style.items())
+
+
+def _attrs(props, classes=''):
+    attrs = {}
+    if props.get('id') is not None:
+        attrs['id'] = props['id']
+    class_name = ' '.join(c for c in [classes, props.get('className') or ''] if c)
+    if class_name:
+        attrs['class'] = class_name
+    if props.get('style'):
+        attrs['style'] = _style(props['style'])
+    return ''.join(f' {key}="{html.escape(str(value))}"' for key, value in attrs.items())
+
+
+def _col_classes(props):
+    classes = []
+    width = props.get('width')
+    if isinstance(width, dict):
+        classes.append(f"col-{width['size']}" if width.get('size') else 'col')
+        if width.get('offset'):
+            classes.append(f"offset-{width['offset']}")
+    elif width in (None, True):
+        classes.append('col')
+    else:
+        classes.append(f'col-{width}')
+    return ' '.join(classes)
+
+
+def _options(options, selected, options_override=None):
+    options = [{'label': v, 'value': v} for v in options_override] if options_override else options or []
+    return ''.join(f'<option value="{html.escape(str(o["value"]))}"'
+                   f'{" selected" if str(o["value"]) == str(selected) else ""}>{html.escape(str(o["label"]))}</option>'
+                   for o in options)
+
+
+def render(component, overrides=None):
+    # Komponenty html.* -> znaczniki, kontrolki dcc/dbc -> natywne <select>/<input>, wykresy -> puste <div>
+    overrides = overrides or {}
+    if component is None:
+        return ''
+    if isinstance(component, (list, tuple)):
+        return ''.join(render(child, overrides) for child in component)
+    if not hasattr(component, 'to_plotly_json'):
+        return html.escape(str(component))
+
+    spec = component.to_plotly_json()
+    kind, namespace, props = spec['type'], spec['namespace'], spec['props']
+    if props.get('id') in SERVER_ONLY:
+        return ''
+    children = render(props.get('children'), overrides)
+    attrs = lambda classes='': _attrs(props, classes)
+
+    if namespace == 'dash_html_components':
+        tag = kind.lower()
+        return f'<{tag}{attrs()}>' if tag in VOID_TAGS else f'<{tag}{attrs()}>{children}</{tag}>'
+    if kind == 'Graph':
+        return f'<div{attrs("static-graph")}><p class="text-muted small p-3">Ładowanie...</p></div>'
+    if kind in ('Store', 'Progress'):
+        return ''
+    if kind in ('Select', 'Dropdown'):
+        classes = 'form-select' if kind == 'Select' else 'form-select text-dark'
+        return (f'<select{attrs(classes)}>'
+                f'{_options(props.get("options"), props.get("value"), overrides.get(props.get("id")))}</select>')
+    if kind == 'RadioItems':
+        name = html.escape(props['id'])
+        items = ''.join(
+            f'<div class="form-check{" form-check-inline" if props.get("inline") else ""}">'
+            f'<input class="form-check-input" type="radio" name="{name}" id="{name}-{i}" '
+            f'value="{html.escape(str(o["value"]))}"{" checked" if o["value"] == props.get("value") else ""}>'
+            f'<label class="form-check-label" for="{name}-{i}">{html.escape(str(o["label"]))}</label></div>'
+            for i, o in enumerate(props.get('options') or []))
+        return f'<div{attrs()}>{items}</div>'
+    if kind in ('Slider', 'Input'):
+        input_type = 'range' if kind == 'Slider' else props.get('type') or 'text'
+        limits = ''.join(f' {key}="{props[key]}"' for key in ('min', 'max', 'step') if props.get(key) is not None)
+        classes = 'form-range' if kind == 'Slider' else 'form-control'
+        return (f'<input type="{input_type}"{attrs(classes)}{limits} '
+                f'value="{html.escape(str(props.get("value", "")))}">')
+    if kind == 'Container':
+        return f'<div{attrs("container-fluid" if props.get("fluid") else "container")}>{children}</div>'
+    if kind == 'Col':
+        return f'<div{attrs(_col_classes(props))}>{children}</div>'
+    if kind == 'Button':
+        return f'<button type="button"{attrs("btn btn-" + props.get("color", "secondary"))}>{children}</button>'
+    if kind == 'Modal':
+        return f'<dialog{attrs("p-0 border-0 bg-transparent")}><div class="modal-content">{children}</div></dialog>'
+    if kind == 'ModalTitle':
+        return f'<h5{attrs("modal-title")}>{children}</h5>'
+    return f'<div{attrs(BOOTSTRAP_CLASSES.get(kind, ""))}>{children}</div>'
+
+
+def render_page(layout, overrides, stylesheets):
+    links = ''.join(f'<link rel="stylesheet" href="{html.escape(href)}">' for href in stylesheets)
+    return (f'<!DOCTYPE html>\n<html lang="pl"><head><meta charset="utf-8">'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1">'
+            f'<title>Netflix Dashboard PL</title>{links}</head>'
+            f'<body>{render(layout, overrides)}'
+            f'<script src="plotly.min.js"></script><script src="export.js"></script></body></html>\n')
+
+
+# --- EKSPORT ---
+
+def export(data, out, workers=WARMUP_WORKERS, top_countries=DEFAULT_TOP_COUNTRIES, slim_figures=SLIM_FIGURES):
+    import dash_bootstrap_components as dbc
+    from layout import create_layout
+
+    start = time.perf_counter()
+    controls = control_values(data, top_countries)
+    calls = plan(controls)
+    calls += [(None, selected_type, 'kpi_values', (selected_type, {})) for selected_type in TYPES]
+    views = {graph_id: {'inputs': inputs, 'files': {}} for graph_id, (_, inputs) in VIEWS.items()}
+    manifest = {'version': data.version, 'views': views, 'kpi_ids': KPI_IDS, 'kpi': {}, 'controls': controls}
+    report = {'version': data.version, 'workers': workers, 'figures': 0, 'errors': 0}
+
+    os.makedirs(out, exist_ok=True)
+    # Ta sama pula co rozgrzewanie cache (warmup.build_views) - procesy podpinają migawkę zamiast parsować CSV
+    targets = {(graph_id, key): (name, args) for graph_id, key, name, args in calls}
+    for (graph_id, key), payload in build_views(data, targets, workers, client_side=False, slim_figures=slim_figures,
+                                                render=True):
+        if isinstance(payload, Exception):
+            report['errors'] += 1
+            report['last_error'] = repr(payload)
+            continue
+        if graph_id is None:
+            manifest['kpi'][key] = json.loads(payload)
+            continue
+        name = _file_name(graph_id, key)
+        os.makedirs(os.path.dirname(os.path.join(out, name)), exist_ok=True)
+        with open(os.path.join(out, name), 'wb') as f:
+            f.write(payload)
+        views[graph_id]['files'][key] = name
+        report['figures'] += 1
+
+    # Listy krajów w wersji statycznej: dokładnie te, dla których istnieją pliki porównania
+    overrides = {'country-1': controls['country-1'], 'country-2': controls['country-2']}
+    with open(os.path.join(out, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(render_page(create_layout(data), overrides, [dbc.themes.DARKLY, 'style.css']))
+    with open(os.path.join(out, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, default=str)
+    with open(os.path.join(out, 'export.js'), 'w', encoding='utf-8') as f:
+        f.write(SCRIPT)
+    shutil.copyfile(os.path.join(os.path.dirname(plotly.__file__), 'package_data', 'plotly.min.js'),
+                    os.path.join(out, 'plotly.min.js'))
+    shutil.copyfile(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'style.css'),
+                    os.path.join(out, 'style.css'))
+
+    sizes = [os.path.getsize(os.path.join(dirpath, name)) for dirpath, _, names in os.walk(out) for name in names]
+    report.update(planned=len(calls) - len(TYPES), files=len(sizes), bytes=sum(sizes),
+                  seconds=round(time.perf_counter() - start, 3))
+    return report
+
+
+def format_report(report):
+    text = (f"Eksport statyczny (wersja {report['version']}): {report['figures']}/{report['planned']} figur "
+            f"w {report['seconds']:.1f} s, {report['workers']} procesy, {report['files']} plików, "
+            f"{report['bytes'] / 2 ** 20:.1f} MB")
+    if report['errors']:
+        text += f", błędy: {report['errors']} ({report.get('last_error')})"
+    return text
+
+
+def main():
+    from data import load_and_process_data
+
+    parser = argparse.ArgumentParser(description="Eksportuje dashboard do statycznej paczki HTML + JSON")
+    parser.add_argument('--out', default='dist')
+    parser.add_argument('--workers', type=int, default=WARMUP_WORKERS)
+    parser.add_argument('--countries', type=int, default=DEFAULT_TOP_COUNTRIES,
+                        help="ile najczęstszych krajów w porównaniu (pary N x N)")
+    args = parser.parse_args()
+
+    data = load_and_process_data()
+    if data.df.empty:
+        print("Brak danych.")
+        return
+    report = export(data, args.out, workers=args.workers, top_countries=args.countries)
+    print(format_report(report))
+
+
+if __name__ == '__main__':
+    main()
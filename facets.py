@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+# Fasety indeksowane bitmapami: kolumny jednowartościowe + tabele pomostowe
+COLUMN_FACETS = ['type', 'rating', 'year_added']
+BRIDGE_FACETS = ['country', 'genre', 'director']
+FACETS = COLUMN_FACETS + BRIDGE_FACETS
+# Zapytanie pełnotekstowe w filtrze krzyżowym - rozwiązywane indeksem odwróconym (patrz text_index.py)
+TEXT_FACET = 'text'
+
+# Liczba ustawionych bitów dla każdego bajtu (popcount)
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def normalize_selection(selection, exclude=None):
+    # Kanoniczna postać filtra krzyżowego {faseta: [wartości]} - stabilny klucz cache
+    if not selection:
+        return {}
+    return {facet: sorted(values, key=str) for facet, values in sorted(selection.items())
+            if values and facet != exclude and (facet in FACETS or facet == TEXT_FACET)}
+
+
+class FacetIndex:
+    # Dla każdej wartości fasety zbiór wierszy: gęsta bitmapa (np.packbits) albo,
+    # gdy wartość jest rzadka, posortowana tablica numerów wierszy (jak kontener "array" w roaring)
+
+    def __init__(self, data=None, n_rows=0, facets=None):
+        self.n_rows = len(data.df) if data is not None else n_rows
+        self.n_bytes = (self.n_rows + 7) // 8
+        self.facets = facets if facets is not None else {}
+        if data is None or data.df.empty:
+            return
+
+        all_rows = np.arange(self.n_rows, dtype=np.uint32)
+        for column in COLUMN_FACETS:
+            codes, uniques = pd.factorize(data.df[column])
+            self._add(column, codes, all_rows, uniques.tolist())
+        for name in BRIDGE_FACETS:
+            bridge = data.bridges[name]
+            self._add(name, bridge['value'].cat.codes.to_numpy(), bridge['row'].to_numpy().astype(np.uint32),
+                      bridge['value'].cat.categories.tolist())
+
+    def _add(self, facet, codes, rows, uniques):
+        order = np.argsort(codes, kind='stable')
+        sizes = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        start = int((codes < 0).sum())
+        containers = {}
+        for value, size in zip(uniques, sizes):
+            containers[value] = self._container(np.unique(rows[order[start:start + size]]))
+            start += size
+        self.facets[facet] = containers
+
+    def _container(self, rows):
+        if rows.nbytes < self.n_bytes:
+            return rows
+        bits = np.zeros(self.n_rows, dtype=bool)
+        bits[rows] = True
+        return np.packbits(bits)
+
+    def empty(self):
+        return np.zeros(self.n_bytes, dtype=np.uint8)
+
+    def full(self):
+        return np.packbits(np.ones(self.n_rows, dtype=bool))
+
+    def bitset(self, facet, value):
+        container = self.facets.get(facet, {}).get(value)
+        if container is None:
+            return self.empty()
+        if container.dtype == np.uint8:
+            return container
+        bits = np.zeros(self.n_rows, dtype=bool)
+        bits[container] = True
+        return np.packbits(bits)
+
+    def query(self, selection, combine='and'):
+        # OR w obrębie fasety, AND (lub OR) między fasetami; None = brak filtra
+        result = None
+        for facet, values in selection.items():
+            if not values:
+                continue
+            bits = self.empty()
+            for value in values:
+                bits |= self.bitset(facet, value)
+            if result is None:
+                result = bits
+            elif combine == 'and':
+                result &= bits
+            else:
+                result |= bits
+        return result
+
+    def to_mask(self, bits):
+        # unpackbits daje 0/1 w uint8 - widok jako bool zamiast kopii
+        return np.unpackbits(bits, count=self.n_rows).view(bool)
+
+    def count(self, bits):
+        return int(_POPCOUNT[bits].sum())
+
+    def rows(self, container):
+        # Numery wierszy kontenera (rzadki - wprost, gęsty - rozpakowana bitmapa)
+        if container.dtype == np.uint8:
+            return np.flatnonzero(np.unpackbits(container, count=self.n_rows)).astype(np.uint32)
+        return container
+
+    def merge(self, keep, n_kept, added=None):
+        # Przeładowanie jak TextIndex.merge: wiersze zachowane (keep) dostają nowe numery, dodane idą na koniec;
+        # kontenery wartości bez zmian w wierszach nie są liczone od nowa z katalogu
+        mapping = np.full(len(keep), -1, dtype=np.int64)
+        mapping[keep] = np.arange(n_kept)
+        added_facets = added.facets if added is not None else {}
+        merged = FacetIndex(n_rows=n_kept + (added.n_rows if added is not None else 0))
+        for facet in list(self.facets) + [f for f in added_facets if f not in self.facets]:
+            old, new = self.facets.get(facet, {}), added_facets.get(facet, {})
+            containers = {}
+            for value in list(old) + [v for v in new if v not in old]:
+                parts = []
+                if value in old:
+                    rows = mapping[self.rows(old[value])]
+                    parts.append(rows[rows >= 0])
+                if value in new:
+                    parts.append(added.rows(new[value]).astype(np.int64) + n_kept)
+                rows = np.concatenate(parts)
+                # Wartość bez żadnego wiersza po przeładowaniu znika (jak przy budowie od zera)
+                if len(rows):
+                    containers[value] = merged._container(rows.astype(np.uint32))
+            merged.facets[facet] = containers
+        return merged
+
+    def memory_bytes(self):
+        return sum(c.nbytes for containers in self.facets.values() for c in containers.values())
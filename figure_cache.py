@@ -0,0 +1,183 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from config import (FIGURE_CACHE_BACKEND, FIGURE_CACHE_DIR, FIGURE_CACHE_MAX_MB,
+                    FIGURE_CACHE_REDIS_URL)
+from metrics import mark, stage
+from startup import LazyModule
+
+# plotly.io dopiero przy pierwszym zapisie / odczycie figury (patrz startup.py)
+pio = LazyModule('plotly.io')
+
+
+def make_key(name, version, args):
+    raw = json.dumps([name, version, list(args)], default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class DiskBackend:
+    # Wspólny katalog dla wszystkich workerów gunicorna (jeden plik JSON na klucz)
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def set(self, key, payload):
+        path = self._path(key)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, path)
+        self._prune()
+
+    def _prune(self):
+        # Usuwamy najstarsze pliki, gdy katalog przekroczy limit
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+class RedisBackend:
+    # Dowolny serwer zgodny z protokołem Redis (redis, valkey, lokalny redislite)
+
+    def __init__(self, url, ttl=24 * 3600):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.client.get(f'figure:{key}')
+
+    def set(self, key, payload):
+        self.client.set(f'figure:{key}', payload, ex=self.ttl)
+
+
+class FigureCache:
+    # LRU ograniczony rozmiarem (bajty JSON) + opcjonalny backend współdzielony między workerami
+
+    def __init__(self, max_bytes, backend=None):
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'shared_hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key):
+        with self.lock:
+            payload = self.entries.get(key)
+            if payload is not None:
+                self.entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return payload
+
+        if self.backend is not None:
+            payload = self.backend.get(key)
+            if payload is not None:
+                self._store(key, payload)
+                with self.lock:
+                    self.stats['shared_hits'] += 1
+                return payload
+
+        with self.lock:
+            self.stats['misses'] += 1
+        return None
+
+    def set(self, key, payload):
+        self._store(key, payload)
+        if self.backend is not None:
+            self.backend.set(key, payload)
+
+    def _store(self, key, payload):
+        if len(payload) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self.entries[key] = payload
+            self.size += len(payload)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def contains(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def drain(self):
+        # Zwraca i usuwa wszystkie wpisy (proces rozgrzewający odsyła je do cache serwera)
+        with self.lock:
+            entries = list(self.entries.items())
+            self.entries.clear()
+            self.size = 0
+        return entries
+
+    def info(self):
+        with self.lock:
+            return dict(self.stats, entries=len(self.entries), bytes=self.size, max_bytes=self.max_bytes)
+
+    def cached(self, name, version):
+        # Dekorator callbacku: klucz = nazwa + wersja danych + wartości wejść
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args):
+                stamp = version()
+                key = make_key(name, stamp, args)
+                payload = self.get(key)
+                if payload is not None:
+                    mark('cache_hit')
+                    with stage('serialization'):
+                        return pio.json.from_json_plotly(payload)
+                mark('cache_miss')
+                result = fn(*args)
+                # Dane podmienione w trakcie budowania - nie zapisujemy wyniku pod starą wersją
+                if version() == stamp:
+                    with stage('serialization'):
+                        # Ten sam silnik co odpowiedzi Dash (orjson, jeśli skonfigurowany w figure_payload)
+                        payload = pio.json.to_json_plotly(result).encode('utf-8')
+                    self.set(key, payload)
+                return result
+            return wrapper
+        return decorator
+
+
+def create_figure_cache():
+    backend = None
+    if FIGURE_CACHE_BACKEND == 'disk':
+        backend = DiskBackend(FIGURE_CACHE_DIR, max_bytes=4 * FIGURE_CACHE_MAX_MB * 2 ** 20)
+    elif FIGURE_CACHE_BACKEND == 'redis':
+        backend = RedisBackend(FIGURE_CACHE_REDIS_URL)
+    return FigureCache(FIGURE_CACHE_MAX_MB * 2 ** 20, backend)
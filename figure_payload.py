@@ -0,0 +1,96 @@
+# Odchudzone figury: mały szablon zamiast pełnego plotly_dark (~7.8 kB w każdej figurze),
+# wspólny styl w szablonie zamiast layout_settings/apply_grid przy każdym wykresie,
+# zaokrąglone tablice liczbowe, daty bez części czasu i szybka serializacja (orjson, jeśli jest).
+import datetime
+
+import numpy as np
+
+from config import JSON_ENGINE
+from startup import LazyModule
+
+# Moduły plotly dopiero w setup() / przy pierwszej figurze, nie przy imporcie (patrz setup)
+go = LazyModule('plotly.graph_objects')
+pio = LazyModule('plotly.io')
+
+TEMPLATE = 'netflix_dark'
+BASE_TEMPLATE = 'plotly_dark'
+# Tylko to, czego używają nasze wykresy (bez scene/polar/ternary/mapbox, pełnych skal kolorów itd.)
+TEMPLATE_LAYOUT_KEYS = ['autotypenumbers', 'colorway', 'font', 'hovermode', 'hoverlabel', 'paper_bgcolor',
+                        'plot_bgcolor', 'coloraxis', 'xaxis', 'yaxis', 'geo', 'title', 'annotationdefaults']
+TEMPLATE_TRACE_TYPES = ['bar', 'scatter', 'scattergeo', 'choropleth', 'pie']
+
+LAYOUT_SETTINGS = dict(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='white'))
+GRID_STYLE = dict(showgrid=True, gridcolor='rgba(255, 255, 255, 0.2)', zerolinecolor='rgba(255, 255, 255, 0.2)')
+
+# Atrybuty śladów px, które mają wartości domyślne plotly.js - nie ma potrzeby ich wysyłać
+TRACE_DEFAULTS = {'legendgroup': '', 'offsetgroup': '', 'xaxis': 'x', 'yaxis': 'y', 'geo': 'geo'}
+DIGITS = 4
+
+
+def register_template():
+    base = pio.templates[BASE_TEMPLATE].to_plotly_json()
+    layout = {key: value for key, value in base['layout'].items() if key in TEMPLATE_LAYOUT_KEYS}
+    layout.update(LAYOUT_SETTINGS)
+    for axis in ['xaxis', 'yaxis']:
+        layout[axis] = dict(layout.get(axis, {}), **GRID_STYLE)
+    data = {key: value for key, value in base['data'].items() if key in TEMPLATE_TRACE_TYPES}
+    pio.templates[TEMPLATE] = go.layout.Template(layout=layout, data=data)
+
+
+def configure_json():
+    # Dash serializuje odpowiedzi przez plotly.io.json - silnik ustawiony tutaj dotyczy też callbacków
+    if JSON_ENGINE == 'orjson':
+        try:
+            import orjson  # noqa: F401
+        except ImportError:
+            return
+    pio.json.config.default_engine = JSON_ENGINE
+
+
+def _slim_array(values):
+    if values.dtype == object and len(values) and isinstance(values[0], datetime.datetime):
+        values = values.astype('datetime64[ns]')
+    if values.dtype.kind == 'f':
+        finite = np.isfinite(values)
+        if finite.all() and np.array_equal(values, np.round(values)):
+            return values.astype(np.int64)
+        return np.round(values, DIGITS)
+    if values.dtype.kind == 'M':
+        days = values.astype('datetime64[D]')
+        if (days == values).all():
+            return np.datetime_as_string(days).astype(object)
+    return values
+
+
+def _slim(value):
+    if isinstance(value, np.ndarray):
+        return _slim_array(value)
+    if isinstance(value, dict):
+        return {key: _slim(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)) and value and isinstance(value[0], (dict, np.ndarray)):
+        return [_slim(item) for item in value]
+    return value
+
+
+def slim_figure(fig):
+    # Zwraca dict (Dash przyjmuje go jako 'figure'); tablice zostają w numpy - orjson koduje je bez kopii
+    fig = fig.to_dict()
+    traces = []
+    for trace in fig['data']:
+        trace = {key: _slim(value) for key, value in trace.items()
+                 if not (key in TRACE_DEFAULTS and TRACE_DEFAULTS[key] == value)}
+        marker = trace.get('marker')
+        if isinstance(marker, dict) and marker.get('pattern') == {'shape': ''}:
+            trace['marker'] = {key: value for key, value in marker.items() if key != 'pattern'}
+        traces.append(trace)
+    fig['data'] = traces
+    return fig
+
+
+def setup():
+    # Szablon i silnik JSON rejestrowane przy pierwszym imporcie plotly.express (callbacks.px), nie przy
+    # imporcie modułu. Start workera skraca leniwy plotly.express (~0.6 s); plotly.io i graph_objects ładuje
+    # i tak dash (dcc.Graph), więc ich leniwy import to tylko kilka ms.
+    # Odpowiedzi sprzed pierwszej figury idą silnikiem 'auto' (orjson, jeśli jest)
+    register_template()
+    configure_json()
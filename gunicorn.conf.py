@@ -0,0 +1,35 @@
+# Uruchomienie: NETFLIX_SHARED_DIR=/dev/shm/netflix gunicorn app:server
+# Master publikuje migawkę danych raz przed forkowaniem workerów; workery tylko ją podpinają.
+# Z NETFLIX_RELOAD_INTERVAL > 0 osobny proces publikujący śledzi CSV i publikuje nowe wersje migawki,
+# a workery podpinają je w swoim wątku obserwatora.
+import multiprocessing
+
+from config import RELOAD_INTERVAL, SHARED_DATASET_DIR
+
+workers = 4
+_publisher = {}
+
+
+def on_starting(server):
+    if SHARED_DATASET_DIR:
+        from shared import publish_snapshot
+        server.log.info("Publikuję migawkę danych w %s", SHARED_DATASET_DIR)
+        publish_snapshot(SHARED_DATASET_DIR)
+
+
+def when_ready(server):
+    if SHARED_DATASET_DIR and RELOAD_INTERVAL > 0:
+        from shared import watch_and_publish
+        # spawn: master nie dzieli wątków ani stanu z procesem publikującym (fork workerów pozostaje bezpieczny)
+        process = multiprocessing.get_context('spawn').Process(
+            target=watch_and_publish, args=(SHARED_DATASET_DIR, RELOAD_INTERVAL), name='snapshot-publisher',
+            daemon=True)
+        process.start()
+        _publisher['process'] = process
+        server.log.info("Proces publikujący migawki co %s s (pid %s)", RELOAD_INTERVAL, process.pid)
+
+
+def on_exit(server):
+    process = _publisher.get('process')
+    if process is not None and process.is_alive():
+        process.terminate()
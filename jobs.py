@@ -0,0 +1,80 @@
+# Tryb tła dla ciężkich callbacków (Dash background callbacks) na lokalnym menedżerze diskcache:
+# zadanie liczy się w osobnym procesie, wątek serwera tylko odpytuje o wynik i postęp.
+# Menedżer to zwykły DiskcacheManager (tylko publiczne API: cache_by, expire). Identyczne zadania w toku
+# (ta sama funkcja, wejścia i wersja danych) liczy jeden proces: pozostałe czekają na jego wynik we wspólnym
+# cache (shared_job). Anulowanie zabija tylko zadanie danego klienta - gdy był to proces liczący,
+# jeden z czekających przejmuje obliczenie.
+import functools
+import hashlib
+import json
+import os
+import time
+
+from config import BACKGROUND_DIR, BACKGROUND_RESULT_TTL
+
+OWNER = 'owner:{}'
+RESULT = 'result:{}'
+POLL_INTERVAL = 0.05
+_MISSING = object()
+
+
+def create_background_manager(store, directory=BACKGROUND_DIR, expire=BACKGROUND_RESULT_TTL):
+    os.makedirs(directory, exist_ok=True)
+    try:
+        import diskcache
+        from dash import DiskcacheManager
+
+        # cache_by = wersja danych: wynik zostaje w cache (aż do expire), a po przeładowaniu danych klucze zadań
+        # są nowe. Wyzwalacz nie jest częścią klucza, dlatego callbacki w tle zawsze zwracają pełne figury,
+        # nigdy Patch (patrz callbacks.register_callbacks)
+        return DiskcacheManager(diskcache.Cache(directory), cache_by=[lambda: store.get().version], expire=expire)
+    except ImportError as e:
+        # Także brak dodatków dash[diskcache] (multiprocess, psutil) - zgłaszany dopiero przez konstruktor
+        print(f"OSTRZEŻENIE: Tryb tła niedostępny ({e}) - ciężkie callbacki zostają synchroniczne.")
+        return None
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def job_key(name, version, args):
+    return hashlib.sha256(json.dumps([name, version, args], sort_keys=True, default=str).encode()).hexdigest()
+
+
+def shared_job(fn, version, directory=BACKGROUND_DIR, expire=BACKGROUND_RESULT_TTL):
+    # Funkcja zadania (set_progress, *wejścia) z deduplikacją: pierwszy proces zgłasza się jako właściciel
+    # klucza (add - atomowe w diskcache) i zapisuje wynik; pozostałe odpytują o wynik, a gdy właściciel
+    # zniknął bez wyniku (anulowany), jeden z nich przejmuje zgłoszenie
+    @functools.wraps(fn)
+    def job(set_progress, *args):
+        import diskcache
+
+        key = job_key(fn.__name__, version(), args)
+        owner, result = OWNER.format(key), RESULT.format(key)
+        with diskcache.Cache(os.path.join(directory, 'shared')) as handle:
+            while True:
+                value = handle.get(result, default=_MISSING)
+                if value is not _MISSING:
+                    return value
+                if handle.add(owner, os.getpid(), expire=expire):
+                    try:
+                        value = fn(set_progress, *args)
+                        handle.set(result, value, expire=expire)
+                        return value
+                    finally:
+                        handle.delete(owner)
+                pid = handle.get(owner)
+                if pid is not None and not _alive(pid):
+                    with handle.transact():
+                        if handle.get(owner) == pid:
+                            handle.delete(owner)
+                    continue
+                time.sleep(POLL_INTERVAL)
+    return job
@@ -3,9 +3,12 @@ import dash_bootstrap_components as dbc
 from data import get_data_date
 import pandas as pd
 
+# Co ile ms układ zastępczy sprawdza, czy dane są już załadowane
+STARTUP_POLL_MS = 1000
 
 
-def create_card(title, graph_id, modal_id, modal_title, modal_text, controls=None, extra_content=None):
+def create_card(title, graph_id, modal_id, modal_title, modal_text, controls=None, extra_content=None,
+                progress_id=None):
     header_children = [
         html.Span(title, className="card-label align-middle"),
         dbc.Button("?", id=f"open-{modal_id}", color="link", size="sm", className="info-btn float-end p-0 ms-2")
@@ -17,6 +20,9 @@ def create_card(title, graph_id, modal_id, modal_title, modal_text, controls=Non
     card_content = [
         dbc.CardHeader(header_children, className="custom-card-header"),
         dbc.CardBody([
+            # Tryb tła: pasek postępu zadania liczącego wykres (widoczny tylko w trakcie)
+            dbc.Progress(id=progress_id, value=0, className="job-progress mb-1",
+                         style={'display': 'none', 'height': '4px'}) if progress_id else html.Div(),
             extra_content if extra_content else html.Div(),
             dcc.Graph(id=graph_id, className="custom-graph")
         ], className="custom-card-body")
@@ -34,29 +40,50 @@ def create_card(title, graph_id, modal_id, modal_title, modal_text, controls=Non
     return dbc.Card(card_content + [modal], className="custom-card mb-4")
 
 
-def create_layout(df):
-    last_date = get_data_date(df)
+def create_header():
+    return dbc.Row([
+        dbc.Col([
+            html.Div([
+                html.H1("Netflix Movies & TV Shows Dashboard", className="app-title"),
+                html.P([
+                    "Interaktywny dashboard analizujący filmy i seriale z Netflix",
+                    html.Br(),
+                    html.Span("Źródło: Kaggle Netflix Movies & TV Shows | Autor: Artur Kompała", className="author-info")
+                ], className="app-description")
+            ], className="header-content text-center")
+        ], width=12)
+    ], className="header-section mb-4")
 
-    all_countries = df['country'].str.split(', ').explode().dropna().str.strip()
-    # Filter out Unknown and sort
-    unique_countries = sorted(list(set(all_countries[all_countries != 'Unknown'])))
-    country_options = [{'label': c, 'value': c} for c in unique_countries]
 
+def create_placeholder_layout(error=None):
+    # Układ na czas ładowania danych w tle (patrz app.create_app): nagłówek i wskaźnik ładowania.
+    # Przeglądarka odpytuje /ready (assets/clientside.js) i przeładowuje stronę, gdy dane są gotowe
+    status = f"Nie udało się załadować danych: {error}" if error else "Ładowanie danych..."
     return dbc.Container(fluid=True, className="app-container p-4", children=[
-
-        # --- 1. HEADER (Nagłówek - Wstęp i Tytuł) ---
+        create_header(),
         dbc.Row([
             dbc.Col([
-                html.Div([
-                    html.H1("Netflix Movies & TV Shows Dashboard", className="app-title"),
-                    html.P([
-                        "Interaktywny dashboard analizujący filmy i seriale z Netflix",
-                        html.Br(),
-                        html.Span("Źródło: Kaggle Netflix Movies & TV Shows | Autor: Artur Kompała", className="author-info")
-                    ], className="app-description")
-                ], className="header-content text-center")
-            ], width=12)
-        ], className="header-section mb-4"),
+                dbc.Spinner(color="danger") if not error else html.Div(),
+                html.P(status, className="text-muted mt-3")
+            ], width=12, className="text-center")
+        ]),
+        dcc.Interval(id='startup-poll', interval=STARTUP_POLL_MS)
+    ])
+
+
+def create_layout(data, client_side=False, background=False):
+    last_date = get_data_date(data.df)
+    # Paski postępu tylko dla callbacków liczonych w tle (patrz jobs.py)
+    progress = lambda name: f'{name}-progress' if background else None
+
+    # Listy krajów nie wysyłamy w układzie - podpowiedzi przychodzą z indeksu prefiksowego
+    # (callbacki search_value), więc rozmiar strony nie rośnie z liczbą krajów
+    country_option = lambda c: [{'label': c, 'value': c}]
+
+    return dbc.Container(fluid=True, className="app-container p-4", children=[
+
+        # --- 1. HEADER (Nagłówek - Wstęp i Tytuł) ---
+        create_header(),
 
         # --- 2. GŁÓWNY FILTR ---
         dbc.Row([
@@ -75,20 +102,48 @@ def create_layout(df):
             ], width={'size': 4, 'offset': 4}, className="filter-wrapper")
         ]),
 
+        # --- WYSZUKIWANIE W TYTUŁACH I OPISACH (trafia do filtra krzyżowego jako 'text') ---
+        dbc.Row([
+            dbc.Col([
+                dcc.Input(id='text-search', type='search', debounce=True, value='',
+                          placeholder="Szukaj w tytułach i opisach...", className="form-control mb-2")
+            ], width={'size': 4, 'offset': 4})
+        ]),
+
+        # --- FILTRY KRZYŻOWE (kliknięcia na mapie, gatunkach i trendzie) ---
+        dcc.Store(id='cross-filter', data={}),
+        # Tryb kliencki: agregaty bieżącego filtra, z których wykresy składa assets/clientside.js
+        dcc.Store(id='client-aggregates') if client_side else html.Div(),
+        dbc.Row([
+            dbc.Col([
+                html.Span(id='cross-filter-summary', className="small text-muted me-2"),
+                dbc.Button("Wyczyść filtry", id='clear-cross-filter', color="link", size="sm",
+                           className="p-0", n_clicks=0)
+            ], width={'size': 8, 'offset': 2}, className="text-center")
+        ], className="mb-4"),
+
         # --- 3. KPI ---
         dbc.Row([
             dbc.Col(dbc.Card(dbc.CardBody([
                 html.H4(id='kpi-total', className="kpi-value text-danger"),
                 html.P("Łączna liczba tytułów", className="kpi-label text-muted small")
-            ]), className="kpi-card"), width=4),
+            ]), className="kpi-card"), width=True),
             dbc.Col(dbc.Card(dbc.CardBody([
                 html.H4(id='kpi-movie-perc', className="kpi-value"),
                 html.P("Filmy", className="kpi-label text-muted small")
-            ]), className="kpi-card"), width=4),
+            ]), className="kpi-card"), width=True),
             dbc.Col(dbc.Card(dbc.CardBody([
                 html.H4(id='kpi-tv-perc', className="kpi-value"),
                 html.P("Seriale", className="kpi-label text-muted small")
-            ]), className="kpi-card"), width=4),
+            ]), className="kpi-card"), width=True),
+            dbc.Col(dbc.Card(dbc.CardBody([
+                html.H4(id='kpi-actors', className="kpi-value"),
+                html.P("Unikalni aktorzy", className="kpi-label text-muted small")
+            ]), className="kpi-card"), width=True),
+            dbc.Col(dbc.Card(dbc.CardBody([
+                html.H4(id='kpi-countries', className="kpi-value"),
+                html.P("Kraje produkcji", className="kpi-label text-muted small")
+            ]), className="kpi-card"), width=True),
         ], className="kpi-section mb-4"),
 
         # --- 4. MAPA ---
@@ -172,13 +227,13 @@ def create_layout(df):
                 extra_content=dbc.Row([
                     dbc.Col([
                         html.Label("Kraj 1", className="small text-muted"),
-                        dcc.Dropdown(id='country-1', options=country_options, value='India', clearable=False,
+                        dcc.Dropdown(id='country-1', options=country_option('India'), value='India', clearable=False,
                                      className="text-dark")
                     ], width=6),
                     dbc.Col([
                         html.Label("Kraj 2", className="small text-muted"),
-                        dcc.Dropdown(id='country-2', options=country_options, value='United States', clearable=False,
-                                     className="text-dark")
+                        dcc.Dropdown(id='country-2', options=country_option('United States'), value='United States',
+                                     clearable=False, className="text-dark")
                     ], width=6)
                 ], className="mb-2")
             ), width=6),
@@ -205,6 +260,7 @@ def create_layout(df):
             dbc.Col(create_card(
                 title="Szczegóły Gatunków",
                 graph_id='genre-hierarchy-graph',
+                progress_id=progress('hierarchy'),
                 modal_id='modal-hierarchy',
                 modal_title="Hierarchia",
                 modal_text="Alternatywny widok rozkładu gatunków.",
@@ -225,6 +281,7 @@ def create_layout(df):
             dbc.Col(create_card(
                 title="Czas Trwania Filmów",
                 graph_id='duration-hist',
+                progress_id=progress('duration'),
                 modal_id='modal-duration',
                 modal_title="Czas Trwania",
                 modal_text="Podział filmów na kategorie długości.",
@@ -244,6 +301,7 @@ def create_layout(df):
             dbc.Col(create_card(
                 title="Top Obsada",
                 graph_id='cast-graph',
+                progress_id=progress('cast'),
                 modal_id='modal-cast',
                 modal_title="Aktorzy",
                 modal_text="Najpopularniejsi aktorzy i aktorki.",
@@ -260,6 +318,7 @@ def create_layout(df):
             dbc.Col(create_card(
                 title="Top Reżyserzy",
                 graph_id='director-graph',
+                progress_id=progress('director'),
                 modal_id='modal-director',
                 modal_title="Reżyserzy",
                 modal_text="Najaktywniejsi reżyserzy.",
@@ -273,6 +332,7 @@ def create_layout(df):
             dbc.Col(create_card(
                 title="Kategorie Wiekowe",
                 graph_id='rating-graph',
+                progress_id=progress('rating'),
                 modal_id='modal-rating',
                 modal_title="Kategorie Wiekowe",
                 modal_text="Rozkład kategorii wiekowych dla filmów i seriali.",
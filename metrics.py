@@ -0,0 +1,231 @@
+# Pomiary callbacków Dash: czas (agregacja / budowa figury / serializacja), bajty odpowiedzi, trafienia cache.
+# Etykiety: callback (wyjście) + identyfikatory wejść, które wywołały żądanie - nigdy wartości (tekst wyszukiwania,
+# wybrane kraje). Eksport w formacie tekstowym Prometheusa pod /metrics.
+# Liczniki są per proces - przy kilku workerach gunicorna każdy worker raportuje swoje.
+import contextlib
+import cProfile
+import functools
+import os
+import threading
+import time
+
+from config import METRICS_MAX_LABELS, METRICS_TOKEN, PROFILE_DIR, PROFILE_ON_START, PROFILE_TOKEN, PROFILER
+
+STAGES = ['aggregation', 'figure', 'serialization']
+BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+UPDATE_PATH = '_dash-update-component'
+
+_local = threading.local()
+
+
+def _current():
+    return getattr(_local, 'record', None)
+
+
+@contextlib.contextmanager
+def stage(name):
+    # Dolicza czas bloku do etapu bieżącego żądania; poza żądaniem Dash nic nie robi
+    record = _current()
+    if record is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['stages'][name] = record['stages'].get(name, 0.0) + time.perf_counter() - start
+
+
+def mark(name):
+    record = _current()
+    if record is not None:
+        record['marks'][name] = record['marks'].get(name, 0) + 1
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+
+    def __init__(self, max_labels=METRICS_MAX_LABELS):
+        self.max_labels = max_labels
+        self.lock = threading.Lock()
+        self.inputs_seen = set()
+        self.histograms = {}
+        self.counters = {}
+
+    def _inputs_label(self, inputs):
+        # inputs: identyfikatory wejść (np. 'genre-top-n.value'); mimo to limit różnych etykiet w Prometheusie
+        label = ','.join(sorted(inputs))[:200]
+        if label in self.inputs_seen:
+            return label
+        if len(self.inputs_seen) >= self.max_labels:
+            return 'other'
+        self.inputs_seen.add(label)
+        return label
+
+    def _observe(self, name, labels, value):
+        histogram = self.histograms.setdefault((name, labels), [[0] * len(BUCKETS), 0, 0.0])
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                histogram[0][i] += 1
+        histogram[1] += 1
+        histogram[2] += value
+
+    def _inc(self, name, labels, value=1):
+        self.counters[(name, labels)] = self.counters.get((name, labels), 0) + value
+
+    def observe_request(self, callback, inputs, stages, n_bytes, marks):
+        with self.lock:
+            labels = (('callback', callback), ('inputs', self._inputs_label(inputs)))
+            for name in STAGES:
+                self._observe('dash_callback_seconds', labels + (('stage', name),), stages.get(name, 0.0))
+            self._inc('dash_callback_requests_total', labels)
+            self._inc('dash_callback_response_bytes_total', labels, n_bytes)
+            for name, count in marks.items():
+                self._inc(f'dash_figure_{name}_total', labels, count)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            typed = set()
+            for (name, labels), (buckets, count, total) in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f'# TYPE {name} histogram')
+                    typed.add(name)
+                text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+                for bound, value in zip(BUCKETS, buckets):
+                    lines.append(f'{name}_bucket{{{text},le="{bound}"}} {value}')
+                lines.append(f'{name}_bucket{{{text},le="+Inf"}} {count}')
+                lines.append(f'{name}_sum{{{text}}} {total:.6f}')
+                lines.append(f'{name}_count{{{text}}} {count}')
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f'# TYPE {name} counter')
+                    typed.add(name)
+                text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+                lines.append(f'{name}{{{text}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class Profiler:
+    # Profil pojedynczego żądania callbacku zapisywany do PROFILE_DIR; włączany w trakcie działania
+
+    def __init__(self, directory=PROFILE_DIR, enabled=PROFILE_ON_START, kind=PROFILER):
+        self.directory = directory
+        self.enabled = enabled
+        self.kind = kind
+
+    def start(self):
+        if self.kind == 'pyinstrument':
+            from pyinstrument import Profiler as Pyinstrument
+            profiler = Pyinstrument()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return profiler
+
+    def stop(self, profiler, callback):
+        os.makedirs(self.directory, exist_ok=True)
+        name = ''.join(c if c.isalnum() or c in '-_' else '_' for c in callback)[:80]
+        path = os.path.join(self.directory, f'{name}-{time.time_ns()}')
+        if self.kind == 'pyinstrument':
+            profiler.stop()
+            with open(f'{path}.html', 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+        else:
+            profiler.disable()
+            profiler.dump_stats(f'{path}.prof')
+
+
+def _timed(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        record = _current()
+        if record is None:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            record['callback'] = time.perf_counter() - start
+    return wrapper
+
+
+def init_app(app, metrics=None, profiler=None):
+    # Wywołać przed register_callbacks - opakowuje rejestrowane funkcje pomiarem czasu
+    from flask import Response, request
+
+    metrics = metrics or Metrics()
+    profiler = profiler or Profiler()
+    server = app.server
+
+    register = app.callback
+
+    def callback(*args, **kwargs):
+        decorator = register(*args, **kwargs)
+        return lambda fn: decorator(_timed(fn))
+    app.callback = callback
+
+    @server.before_request
+    def start_record():
+        if not request.path.endswith(UPDATE_PATH):
+            return
+        _local.record = {'start': time.perf_counter(), 'stages': {}, 'marks': {}, 'callback': 0.0}
+        if profiler.enabled:
+            _local.record['profiler'] = profiler.start()
+
+    @server.after_request
+    def finish_record(response):
+        record = _current()
+        if record is None:
+            return response
+        _local.record = None
+
+        body = request.get_json(silent=True) or {}
+        name = body.get('output', '?')
+        # Które wejścia wywołały callback (bez wartości wpisanych przez użytkownika)
+        inputs = [str(prop) for prop in body.get('changedPropIds', [])]
+        if 'profiler' in record:
+            profiler.stop(record['profiler'], name)
+
+        total = time.perf_counter() - record['start']
+        stages = record['stages']
+        aggregation = stages.get('aggregation', 0.0)
+        cached_serialization = stages.get('serialization', 0.0)
+        # Reszta żądania poza funkcją callbacku to głównie serializacja odpowiedzi przez Dash
+        stages = {
+            'aggregation': aggregation,
+            'figure': max(record['callback'] - aggregation - cached_serialization, 0.0),
+            'serialization': cached_serialization + max(total - record['callback'], 0.0),
+        }
+        n_bytes = response.calculate_content_length() or 0
+        metrics.observe_request(name, inputs, stages, n_bytes, record['marks'])
+        return response
+
+    @server.teardown_request
+    def drop_record(exc):
+        # Wyjątek w callbacku pomija after_request - nie zostawiamy rekordu dla następnego żądania w wątku
+        _local.record = None
+
+    @server.route('/metrics')
+    def metrics_endpoint():
+        # Z ustawionym NETFLIX_METRICS_TOKEN: ?token=... albo nagłówek Authorization: Bearer ... (Prometheus)
+        if METRICS_TOKEN:
+            header = request.headers.get('Authorization', '')
+            if METRICS_TOKEN not in (request.args.get('token'), header.removeprefix('Bearer ')):
+                return Response('forbidden\n', status=403, mimetype='text/plain')
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    @server.route('/metrics/profile')
+    def profile_endpoint():
+        # ?token=...&enable=1|0 ; bez ustawionego NETFLIX_PROFILE_TOKEN przełącznik jest wyłączony
+        if not PROFILE_TOKEN or request.args.get('token') != PROFILE_TOKEN:
+            return Response('forbidden\n', status=403, mimetype='text/plain')
+        if 'enable' in request.args:
+            profiler.enabled = request.args['enable'] == '1'
+        return Response(f'profiling={int(profiler.enabled)} dir={profiler.directory}\n', mimetype='text/plain')
+
+    return metrics
@@ -0,0 +1,301 @@
+# Wymienny silnik agregacji wycinków z filtrem krzyżowym za callbackami (NETFLIX_QUERY_BACKEND):
+# - 'pandas': w pamięci procesu (Dataset.slice - bitmapy faset, kody wierszy),
+# - 'duckdb': te same zapytania w SQL nad plikami Parquet cache danych, równolegle na wszystkich rdzeniach,
+# - 'sqlite': jak wyżej, nad plikiem SQLite na dysku zbudowanym partiami z tych samych plików Parquet.
+# To alternatywny silnik obliczeń, nie tryb oszczędzania pamięci: Dataset (katalog, tabele pomostowe, indeksy)
+# nadal jest w pamięci, bo korzystają z niego pozostałe callbacki. Silnik SQL omija tylko kody wierszy
+# (Dataset.row_codes), które pandas buduje przy pierwszym filtrze krzyżowym.
+# Bez filtrów krzyżowych każdy silnik zwraca gotowy wycinek kostki (Dataset.cube) - bez zapytania.
+# Wynik ma postać wycinka kostki (aggregates.build_slice), więc figury się nie zmieniają.
+# Dopóki pliki Parquet nie odpowiadają wersji danych (np. zaraz po przeładowaniu), liczy pandas.
+# Zgodność z pandas: python -m benchmarks.bench_backends
+import contextlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from aggregates import COUNT_TABLES, _empty_counts, _frame, duration_frame, month_frame, rating_order
+from config import CACHE_DIR, QUERY_BACKEND
+from data import BRIDGE_COLUMNS, _cache_paths, read_cache_meta
+from facets import BRIDGE_FACETS, COLUMN_FACETS, TEXT_FACET
+from metrics import stage
+
+SLICE_CACHE_SIZE = 64
+
+
+class PandasBackend:
+    name = 'pandas'
+
+    def slice(self, data, selected_type, selection=None):
+        return data.slice(selected_type, selection)
+
+
+class SQLBackend:
+    # Tabele widziane przez zapytania: catalog(row_id, type, rating, year_added, month, duration_min,
+    # seasons_count), bridge_<nazwa>(row_id, code), categories_<nazwa>(code, value).
+    # Podklasy dostarczają _open(version) i _session(text_rows): kontekst z funkcją execute(sql, params)
+    # zwracającą listę kolumn wyniku (tablice numpy); text_rows to wiersze z wyszukiwania pełnotekstowego.
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.version = None
+        self.lock = threading.Lock()
+        self._slices = OrderedDict()
+        self._warned = set()
+
+    def slice(self, data, selected_type, selection=None):
+        if not selection:
+            return data.cube[selected_type]
+        key = json.dumps([data.version, selected_type, selection or {}], sort_keys=True)
+        with self.lock:
+            if key in self._slices:
+                self._slices.move_to_end(key)
+                return self._slices[key]
+        if not self._ready(data):
+            return data.slice(selected_type, selection)
+        with stage('aggregation'):
+            cube_slice = self.build_slice(data, selected_type, selection)
+        with self.lock:
+            self._slices[key] = cube_slice
+            if len(self._slices) > SLICE_CACHE_SIZE:
+                self._slices.popitem(last=False)
+        return cube_slice
+
+    def _ready(self, data):
+        if self.version == data.version:
+            return True
+        meta = read_cache_meta(self.cache_dir)
+        if not meta or meta.get('sha256', '')[:16] != data.version:
+            if data.version not in self._warned:
+                self._warned.add(data.version)
+                print(f"OSTRZEŻENIE: Brak plików Parquet dla wersji {data.version} w '{self.cache_dir}' - "
+                      f"agregacje liczy pandas.")
+            return False
+        with self.lock:
+            if self.version != data.version:
+                self._open(data.version)
+                self.version = data.version
+        return True
+
+    def _filter(self, data, selected_type, selection):
+        # Filtr typu AND filtry krzyżowe (OR w obrębie fasety) AND wiersze z indeksu pełnotekstowego
+        clauses, params, text_rows = [], [], None
+        if selected_type != 'All':
+            clauses.append('type = ?')
+            params.append(selected_type)
+        for facet, values in (selection or {}).items():
+            if not values:
+                continue
+            placeholders = ', '.join('?' * len(values))
+            if facet in COLUMN_FACETS:
+                clauses.append(f'{facet} IN ({placeholders})')
+                params.extend(values)
+            elif facet in BRIDGE_FACETS:
+                clauses.append(f'row_id IN (SELECT b.row_id FROM bridge_{facet} b JOIN categories_{facet} k '
+                               f'ON k.code = b.code WHERE k.value IN ({placeholders}))')
+                params.extend(values)
+            elif facet == TEXT_FACET:
+                text_rows = data.text.query(' '.join(values))
+                if text_rows is not None:
+                    clauses.append('row_id IN (SELECT row_id FROM text_rows)')
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        return f'WITH f AS (SELECT * FROM catalog{where}) ', params, text_rows
+
+    def build_slice(self, data, selected_type, selection=None):
+        prefix, params, text_rows = self._filter(data, selected_type, selection)
+        # Wszystkie zapytania wycinka w jednej sesji (tabela text_rows wypełniana raz)
+        with self._session(text_rows) as execute:
+            return self._aggregate(data, lambda sql: execute(prefix + sql, params))
+
+    def _aggregate(self, data, run):
+        (total,) = run('SELECT COUNT(*) FROM f')
+        cube_slice = {'total': int(total[0])}
+        # Najpierw liczniki po kodach, nazwy dołączane dopiero do wyniku grupowania
+        for name in BRIDGE_COLUMNS:
+            values, counts = run(f'SELECT k.value, c.n FROM (SELECT b.code, COUNT(*) AS n FROM bridge_{name} b '
+                                 f'JOIN f ON f.row_id = b.row_id GROUP BY b.code) c '
+                                 f'JOIN categories_{name} k ON k.code = c.code ORDER BY c.n DESC, c.code')
+            cube_slice[name] = _counts(values, counts, COUNT_TABLES[name])
+
+        years, countries, counts = run(
+            'SELECT c.year_added, k.value, c.n FROM (SELECT f.year_added, b.code, COUNT(*) AS n FROM bridge_country b '
+            'JOIN f ON f.row_id = b.row_id GROUP BY f.year_added, b.code) c '
+            'JOIN categories_country k ON k.code = c.code ORDER BY c.year_added, k.value')
+        index = pd.MultiIndex.from_arrays([years.astype(data.df['year_added'].dtype), countries.astype(object)],
+                                          names=['year_added', 'country'])
+        cube_slice['country_year'] = pd.Series(counts.astype(np.int64), index=index, name='count')
+
+        ratings, types, counts = run('SELECT rating, type, COUNT(*) FROM f GROUP BY rating, type ORDER BY rating, type')
+        rat_counts = pd.DataFrame({'rating': ratings.astype(object), 'type': types.astype(object),
+                                   'count': counts.astype(np.int64)})
+        cube_slice['rating'] = rat_counts
+        cube_slice['rating_order'] = rating_order(rat_counts)
+
+        # Przedziały jak pd.cut(DURATION_BINS, right=False); -1 = film poza przedziałami
+        bins, counts = run("SELECT CASE WHEN duration_min < 0 OR duration_min IS NULL THEN -1 "
+                           "WHEN duration_min < 90 THEN 0 "
+                           "WHEN duration_min < 120 THEN 1 WHEN duration_min < 150 THEN 2 "
+                           "WHEN duration_min < 9999 THEN 3 ELSE -1 END AS bin, COUNT(*) FROM f "
+                           "WHERE type = 'Movie' AND duration_min IS NOT NULL GROUP BY bin")
+        in_range = bins >= 0
+        bin_counts = np.bincount(bins[in_range].astype(np.int64), weights=counts[in_range], minlength=4)
+        bin_counts = bin_counts.astype(np.int64)
+        cube_slice['duration'] = duration_frame(bin_counts) if len(bins) else _empty_counts('category')
+
+        # Remisy jak value_counts: w kolejności pierwszego wystąpienia
+        values, counts, _ = run("SELECT CASE WHEN seasons_count >= 5 THEN '5+' "
+                                "ELSE CAST(seasons_count AS VARCHAR) END AS category, COUNT(*) AS n, "
+                                "MIN(row_id) AS first FROM f WHERE type = 'TV Show' AND seasons_count IS NOT NULL "
+                                "GROUP BY category ORDER BY n DESC, first")
+        cube_slice['seasons'] = _counts(values, counts, 'category')
+
+        months, counts = run('SELECT month, COUNT(*) FROM f GROUP BY month')
+        months = np.bincount(months.astype(np.int64), weights=counts, minlength=13).astype(np.int64)
+        cube_slice['month'] = month_frame(months[1:])
+        return cube_slice
+
+
+def _counts(values, counts, key):
+    if not len(values):
+        return _empty_counts(key)
+    return _frame(pd.Series(counts.astype(np.int64), index=pd.Index(values, dtype=object)), key)
+
+
+def _quote(path):
+    return "'" + path.replace("'", "''") + "'"
+
+
+class DuckDBBackend(SQLBackend):
+    # Widoki nad plikami Parquet - DuckDB czyta tylko potrzebne kolumny, wielowątkowo
+    name = 'duckdb'
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        import duckdb
+        super().__init__(cache_dir)
+        self.connection = duckdb.connect()
+
+    def _open(self, version):
+        paths = _cache_paths(self.cache_dir)
+        self.connection.execute(
+            f"CREATE OR REPLACE VIEW catalog AS SELECT file_row_number AS row_id, type, rating, year_added, "
+            f"month(date_added) AS month, duration_min, seasons_count "
+            f"FROM read_parquet({_quote(paths['catalog'])}, file_row_number = true)")
+        for name in BRIDGE_COLUMNS:
+            self.connection.execute(
+                f'CREATE OR REPLACE VIEW bridge_{name} AS SELECT "row" AS row_id, code '
+                f"FROM read_parquet({_quote(paths['bridge'](name))})")
+            self.connection.execute(
+                f"CREATE OR REPLACE VIEW categories_{name} AS SELECT file_row_number AS code, value "
+                f"FROM read_parquet({_quote(paths['categories'](name))}, file_row_number = true)")
+
+    @contextlib.contextmanager
+    def _session(self, text_rows):
+        # Osobny kursor na wycinek (połączenie DuckDB nie jest współdzielone między wątkami)
+        cursor = self.connection.cursor()
+        try:
+            if text_rows is not None:
+                cursor.register('text_rows', pd.DataFrame({'row_id': np.asarray(text_rows, dtype=np.int64)}))
+            yield lambda sql, params: list(cursor.execute(sql, params).fetchnumpy().values())
+        finally:
+            cursor.close()
+
+
+class SQLiteBackend(SQLBackend):
+    # Plik bazy obok cache danych, przebudowywany partiami z Parquet przy zmianie wersji; połączenie na wątek
+    name = 'sqlite'
+    BATCH_ROWS = 100_000
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        super().__init__(cache_dir)
+        self.path = os.path.join(cache_dir, 'catalog.sqlite')
+        self.local = threading.local()
+
+    def _open(self, version):
+        import sqlite3
+        try:
+            with sqlite3.connect(self.path) as connection:
+                current = connection.execute('SELECT version FROM meta').fetchone()[0]
+        except sqlite3.Error:
+            current = None
+        if current != version:
+            self._build(version)
+
+    def _build(self, version):
+        import sqlite3
+        import pyarrow.parquet as pq
+
+        paths = _cache_paths(self.cache_dir)
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        connection = sqlite3.connect(tmp)
+        try:
+            connection.execute('CREATE TABLE catalog (row_id INTEGER PRIMARY KEY, type TEXT, rating TEXT, '
+                               'year_added INTEGER, month INTEGER, duration_min INTEGER, seasons_count INTEGER)')
+            offset = 0
+            columns = ['type', 'rating', 'year_added', 'date_added', 'duration_min', 'seasons_count']
+            for batch in pq.ParquetFile(paths['catalog']).iter_batches(self.BATCH_ROWS, columns=columns):
+                chunk = batch.to_pandas()
+                frame = pd.DataFrame({
+                    'row_id': np.arange(offset, offset + len(chunk)),
+                    'type': chunk['type'].astype(object), 'rating': chunk['rating'].astype(object),
+                    'year_added': chunk['year_added'].astype(np.int64), 'month': chunk['date_added'].dt.month,
+                    'duration_min': chunk['duration_min'].astype('Int64'),
+                    'seasons_count': chunk['seasons_count'].astype('Int64'),
+                }).astype(object)
+                connection.executemany('INSERT INTO catalog VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                       frame.where(frame.notna(), None).itertuples(index=False))
+                offset += len(chunk)
+            for name in BRIDGE_COLUMNS:
+                connection.execute(f'CREATE TABLE bridge_{name} (row_id INTEGER, code INTEGER)')
+                for batch in pq.ParquetFile(paths['bridge'](name)).iter_batches(self.BATCH_ROWS):
+                    connection.executemany(f'INSERT INTO bridge_{name} VALUES (?, ?)',
+                                           zip(batch.column('row').to_pylist(), batch.column('code').to_pylist()))
+                connection.execute(f'CREATE INDEX bridge_{name}_row ON bridge_{name} (row_id)')
+                connection.execute(f'CREATE TABLE categories_{name} (code INTEGER PRIMARY KEY, value TEXT)')
+                values = pq.read_table(paths['categories'](name)).column('value').to_pylist()
+                connection.executemany(f'INSERT INTO categories_{name} VALUES (?, ?)', enumerate(values))
+            connection.execute('CREATE INDEX catalog_type ON catalog (type)')
+            connection.execute('CREATE TABLE meta (version TEXT)')
+            connection.execute('INSERT INTO meta VALUES (?)', (version,))
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(tmp, self.path)
+
+    def _connection(self):
+        import sqlite3
+        # Po przebudowie pliku stare połączenia wskazują na usuniętą bazę - otwieramy nowe
+        if getattr(self.local, 'version', None) != self.version:
+            self.local.connection = sqlite3.connect(self.path, isolation_level=None)
+            self.local.connection.execute('CREATE TEMP TABLE text_rows (row_id INTEGER PRIMARY KEY)')
+            self.local.version = self.version
+        return self.local.connection
+
+    @contextlib.contextmanager
+    def _session(self, text_rows):
+        connection = self._connection()
+        if text_rows is not None:
+            connection.execute('DELETE FROM text_rows')
+            connection.executemany('INSERT INTO text_rows VALUES (?)', ((int(r),) for r in text_rows))
+
+        def execute(sql, params):
+            cursor = connection.execute(sql, params)
+            rows = cursor.fetchall()
+            if not rows:
+                return [np.empty(0, dtype=object) for _ in cursor.description]
+            return [np.asarray(column) for column in zip(*rows)]
+
+        yield execute
+
+
+def create_query_backend(name=QUERY_BACKEND, cache_dir=CACHE_DIR):
+    if name == 'duckdb':
+        return DuckDBBackend(cache_dir)
+    if name == 'sqlite':
+        return SQLiteBackend(cache_dir)
+    return PandasBackend()
@@ -0,0 +1,245 @@
+# Przeładowanie danych bez restartu: wykrywa dopisane/zmienione wiersze (po show_id),
+# parsuje tylko różnicę i przyrostowo aktualizuje tabele pomostowe, kostkę i szereg czasowy.
+import hashlib
+import io
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from aggregates import TYPES, build_slice, merge_slices, update_timeline
+from config import CACHE_DIR, CSV_PATH
+from data import (BRIDGE_COLUMNS, Dataset, _show_ids, _show_index, explode_column, load_and_process_data,
+                  narrow_integers, parse_catalog, row_hashes, save_cache, source_stamp)
+from facets import FacetIndex
+from search_index import update_search_index
+from text_index import TextIndex
+
+
+class DatasetStore:
+    # Aktualny zbiór danych; podmiana jest atomowa (jedno przypisanie referencji).
+    # Bez danych na starcie (ładowanie w tle, patrz app.create_app) get czeka, aż pierwsze ładowanie się rozstrzygnie:
+    # swap (dane) albo fail (błąd - get zgłasza wyjątek, dopóki ponowna próba nie zakończy się swapem)
+
+    def __init__(self, data=None):
+        self._data = data
+        self._lock = threading.Lock()
+        self.listeners = []
+        self.error = None
+        self.ready = threading.Event()
+        self._settled = threading.Event()
+        if data is not None:
+            self.ready.set()
+            self._settled.set()
+
+    def get(self):
+        # Callback ze strony sprzed restartu może przyjść przed załadowaniem danych - czeka zamiast błędu
+        if self._data is None:
+            self._settled.wait()
+            if self._data is None:
+                raise RuntimeError(f"Dane niedostępne: {self.error}")
+        return self._data
+
+    def fail(self, error):
+        self.error = error
+        self._settled.set()
+
+    def swap(self, data):
+        with self._lock:
+            self._data = data
+        self.error = None
+        self.ready.set()
+        self._settled.set()
+        for listener in self.listeners:
+            listener(data)
+
+
+def _prefix_hasher(path, size):
+    h = hashlib.sha256()
+    remaining = size
+    with open(path, 'rb') as f:
+        while remaining > 0:
+            chunk = f.read(min(1 << 20, remaining))
+            if not chunk:
+                break
+            h.update(chunk)
+            remaining -= len(chunk)
+        f.seek(size - 1)
+        ends_with_newline = f.read(1) == b'\n'
+    return h, ends_with_newline
+
+
+def read_changes(data, path):
+    # Zwraca (surowe nowe/zmienione wiersze, maska zachowanych starych wierszy, nowe source) albo None
+    stamp = source_stamp(path)
+    source = data.source
+    if source and stamp['size'] == source.get('size') and stamp['mtime_ns'] == source.get('mtime_ns'):
+        return None
+
+    ids = data.df['show_id'].astype(object).to_numpy()
+    if source and stamp['size'] > source['size'] > 0:
+        hasher, ends_with_newline = _prefix_hasher(path, source['size'])
+        if ends_with_newline and hasher.hexdigest() == source['sha256']:
+            # Szybka ścieżka: plik tylko dopisany - czytamy wyłącznie nowe bajty
+            with open(path, 'rb') as f:
+                header = f.readline()
+                f.seek(source['size'])
+                tail = f.read()
+            hasher.update(tail)
+            raw = pd.read_csv(io.BytesIO(header + tail))
+            keep = ~np.isin(ids, raw['show_id'].to_numpy())
+            new_source = {'size': source['size'] + len(tail), 'mtime_ns': stamp['mtime_ns'],
+                          'sha256': hasher.hexdigest()}
+            return raw, keep, new_source
+
+    # Pełne porównanie: skróty wierszy po show_id, parsowane są tylko wiersze nowe lub zmienione
+    with open(path, 'rb') as f:
+        content = f.read()
+    raw = pd.read_csv(io.BytesIO(content))
+    hashes = row_hashes(raw)
+    old_hashes = data.df['row_hash'].to_numpy() if 'row_hash' in data.df.columns else np.zeros(len(ids), np.uint64)
+    positions = pd.Index(ids).get_indexer(raw['show_id'].to_numpy())
+    found = positions >= 0
+    unchanged = np.zeros(len(raw), dtype=bool)
+    unchanged[found] = old_hashes[positions[found]] == hashes[found]
+
+    keep = np.zeros(len(ids), dtype=bool)
+    keep[positions[unchanged]] = True
+    new_source = {'size': len(content), 'mtime_ns': stamp['mtime_ns'], 'sha256': hashlib.sha256(content).hexdigest()}
+    return raw[~unchanged].reset_index(drop=True), keep, new_source
+
+
+def _concat_like(old, added):
+    # Łączy kolumny tak, by zachować typy starego katalogu (category, string[pyarrow], Int16...)
+    columns = {}
+    for column in old.columns:
+        values = old[column]
+        extra = added[column] if column in added.columns else pd.Series(pd.NA, index=added.index)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            merged = union_categoricals([values.array, pd.Categorical(extra.astype(object))], ignore_order=True)
+            columns[column] = merged.remove_unused_categories()
+        elif pd.api.types.is_extension_array_dtype(values.dtype) and pd.api.types.is_integer_dtype(values.dtype):
+            # Int8 / Int16 dobrane do zakresu starego katalogu - dodane wiersze mogą go przekroczyć
+            columns[column] = narrow_integers(pd.concat([values.astype('Int64'), extra.astype('Int64')],
+                                                        ignore_index=True))
+        else:
+            columns[column] = pd.concat([values, extra.astype(values.dtype)], ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def _merge_bridge(old_bridge, keep, n_kept, added_bridge):
+    mapping = np.full(len(keep), -1, dtype=np.int64)
+    mapping[keep] = np.arange(n_kept)
+    rows = old_bridge['row'].to_numpy()
+    selected = keep[rows]
+
+    categories = old_bridge['value'].cat.categories.union(added_bridge['value'].cat.categories)
+    old_values = old_bridge['value'].cat.set_categories(categories).cat.codes.to_numpy()[selected]
+    new_values = added_bridge['value'].cat.set_categories(categories).cat.codes.to_numpy()
+
+    values = pd.Categorical.from_codes(np.concatenate([old_values, new_values]), categories=categories)
+    rows = np.concatenate([mapping[rows[selected]], added_bridge['row'].to_numpy() + n_kept]).astype(np.int32)
+    return rows, values.remove_unused_categories()
+
+
+def _delta(frame, bridges=None):
+    # Mały zbiór (dodane albo usunięte wiersze) tylko z tym, czego potrzebuje build_slice - bez kostki,
+    # osi czasu, indeksów faset, tekstu i wyszukiwania
+    if frame.empty:
+        return None
+    return Dataset(frame, bridges, cube={}, timeline={}, facets=FacetIndex(n_rows=len(frame)),
+                   text=TextIndex(n_rows=len(frame)), search={}, approximate=False)
+
+
+def _delta_cube(delta):
+    return {t: build_slice(delta, delta.type_mask(t)) for t in TYPES} if delta is not None else {}
+
+
+def apply_changes(data, raw, keep, source):
+    added = parse_catalog(raw, compact=False)
+    kept = data.df[keep]
+    removed = data.df[~keep].reset_index(drop=True)
+    df = _concat_like(kept.reset_index(drop=True), added)
+
+    show_index = _show_index(df)
+    added_bridges = {name: explode_column(added, column) for name, column in BRIDGE_COLUMNS.items()}
+    bridges = {}
+    for name in BRIDGE_COLUMNS:
+        rows, values = _merge_bridge(data.bridges[name], keep, len(kept), added_bridges[name])
+        bridges[name] = pd.DataFrame({'row': rows, 'show_id': _show_ids(df, rows, show_index), 'value': values})
+
+    # Kostka: stare liczniki + wycinki małych zbiorów (dodane, usunięte) - bez przeliczania całości
+    added_data = _delta(added, added_bridges)
+    added_cube, removed_cube = _delta_cube(added_data), _delta_cube(_delta(removed))
+    cube = {t: merge_slices(old, added_cube.get(t), removed_cube.get(t)) for t, old in data.cube.items()}
+
+    timeline = update_timeline(data.timeline, keep, added)
+    # Indeksy faset i tekstu: wpisy zachowanych wierszy z nowymi numerami + indeks dodanych wierszy;
+    # wyszukiwanie list wyboru: nowe liczniki, klucze normalizowane tylko dla nowych nazw
+    facets = data.facets.merge(keep, len(kept), FacetIndex(added_data) if added_data is not None else None)
+    text = data.text.merge(keep, len(kept), TextIndex.build(added) if added_data is not None else None)
+    search = update_search_index(data.search, bridges)
+    return Dataset(df, bridges, version=source['sha256'][:16], cube=cube, timeline=timeline, source=source,
+                   facets=facets, text=text, search=search)
+
+
+def reload_if_changed(store, path=CSV_PATH, cache_dir=CACHE_DIR):
+    data = store.get()
+    if data.df.empty or not data.cube:
+        fresh = load_and_process_data(path, cache_dir)
+        if not fresh.df.empty and fresh.version != data.version:
+            store.swap(fresh)
+            return fresh
+        return None
+
+    changes = read_changes(data, path)
+    if changes is None:
+        return None
+    raw, keep, source = changes
+    if source['sha256'][:16] == data.version:
+        data.source = source
+        return None
+
+    fresh = apply_changes(data, raw, keep, source)
+    store.swap(fresh)
+    try:
+        save_cache(fresh, cache_dir)
+    except (ImportError, OSError, ValueError) as e:
+        print(f"OSTRZEŻENIE: Nie udało się zapisać cache ({e}).")
+    return fresh
+
+
+def reattach_if_changed(store, root):
+    # Tryb pamięci współdzielonej: nowa migawka publikowana jest przez proces ładujący
+    from shared import attach_snapshot, current_version
+    if current_version(root) == store.get().version:
+        return None
+    fresh = attach_snapshot(root)
+    store.swap(fresh)
+    return fresh
+
+
+def start_watcher(store, interval, path=CSV_PATH, shared_root='', retry=None):
+    # retry: ponowne pierwsze ładowanie, gdy poprzednie się nie powiodło (store.error)
+    def loop():
+        while True:
+            time.sleep(interval)
+            if store.error is not None:
+                if retry is not None:
+                    retry()
+                continue
+            try:
+                if shared_root:
+                    fresh = reattach_if_changed(store, shared_root)
+                else:
+                    fresh = reload_if_changed(store, path)
+                if fresh is not None:
+                    print(f"Przeładowano dane: wersja {fresh.version}, {len(fresh.df)} tytułów.")
+            except Exception as e:
+                print(f"BŁĄD przeładowania danych: {e}")
+
+    thread = threading.Thread(target=loop, name='dataset-watcher', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,108 @@
+import bisect
+import unicodedata
+
+import numpy as np
+
+# Tabele pomostowe, po których można wyszukiwać w listach wyboru (kraje, aktorzy, reżyserzy)
+SEARCH_FACETS = ['country', 'cast', 'director']
+
+
+def normalize(text):
+    # Bez wielkości liter i znaków diakrytycznych: "bjo" znajduje "Björk"
+    text = str(text).casefold()
+    if not text.isascii():
+        text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    return ' '.join(text.split())
+
+
+def _keys(values):
+    # Klucz od początku każdego słowa: "united states", "states"; (klucze, numer nazwy)
+    keys = []
+    ids = []
+    for i, value in values:
+        key = normalize(value)
+        start = 0
+        while start >= 0:
+            keys.append(key[start:])
+            ids.append(i)
+            start = key.find(' ', start) + 1 or -1
+    return keys, ids
+
+
+class PrefixIndex:
+    # Spłaszczone trie: posortowana lista kluczy (każdy sufiks nazwy zaczynający się od słowa),
+    # więc prefiks to zakres [lo, hi) znaleziony dwoma wyszukiwaniami binarnymi.
+    # Wyniki rankingowane liczbą tytułów (malejąco), remisy alfabetycznie.
+    # Gotowe tablice (np. mapowane z migawki, patrz shared.py) podaje się wprost; build liczy je od zera.
+
+    def __init__(self, values, counts, keys, ids, ranking, rank):
+        self.values = list(values)
+        self.counts = counts
+        self.keys = keys
+        self.ids = ids
+        # Kolejność rankingu dla pustego zapytania (i do rozstrzygania remisów)
+        self.ranking = ranking
+        self.rank = rank
+
+    @classmethod
+    def build(cls, values, counts):
+        values = list(values)
+        keys, ids = _keys(enumerate(values))
+        return cls._sorted(values, counts, keys, ids)
+
+    @classmethod
+    def _sorted(cls, values, counts, keys, ids):
+        counts = np.asarray(counts, dtype=np.int64)
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        ranking = np.lexsort((np.arange(len(values)), -counts)).astype(np.int32)
+        rank = np.empty(len(values), dtype=np.int32)
+        rank[ranking] = np.arange(len(values), dtype=np.int32)
+        return cls(values, counts, [keys[k] for k in order], np.asarray(ids, dtype=np.int32)[order], ranking, rank)
+
+    def update(self, values, counts):
+        # Przeładowanie: klucze znanych nazw przenoszone (z nowymi numerami), normalizowane tylko nowe nazwy;
+        # posortowane stare klucze + krótki ogon nowych - sortowanie (timsort) prawie liniowe
+        values = list(values)
+        position = {value: i for i, value in enumerate(values)}
+        mapping = np.array([position.get(value, -1) for value in self.values], dtype=np.int64)
+        old_ids = mapping[np.asarray(self.ids, dtype=np.int64)]
+        kept = old_ids >= 0
+        keys = [key for key, ok in zip(self.keys, kept.tolist()) if ok]
+        known = set(self.values)
+        new_keys, new_ids = _keys((i, value) for i, value in enumerate(values) if value not in known)
+        return PrefixIndex._sorted(values, counts, keys + new_keys,
+                                   np.concatenate([old_ids[kept], np.asarray(new_ids, dtype=np.int64)]))
+
+    def search(self, prefix, limit=20):
+        prefix = normalize(prefix or '')
+        if not prefix:
+            ids = self.ranking[:limit]
+        else:
+            lo = bisect.bisect_left(self.keys, prefix)
+            hi = bisect.bisect_left(self.keys, prefix + '\uffff', lo)
+            # Jedna nazwa może pasować kilkoma słowami - unikalne, potem top-N po randze
+            ranks = np.unique(self.rank[self.ids[lo:hi]])[:limit]
+            ids = self.ranking[ranks]
+        return [(self.values[i], int(self.counts[i])) for i in ids]
+
+    def memory_bytes(self):
+        return sum(len(key) + 49 for key in self.keys) + self.ids.nbytes + self.counts.nbytes + 2 * self.rank.nbytes
+
+
+def _counts(bridges, name):
+    # Nazwa -> liczba tytułów z tabeli pomostowej
+    codes = bridges[name]['value'].cat.codes.to_numpy()
+    categories = bridges[name]['value'].cat.categories
+    return categories, np.bincount(codes[codes >= 0], minlength=len(categories))
+
+
+def build_search_index(data):
+    # Liczona przy ładowaniu danych
+    return {name: PrefixIndex.build(*_counts(data.bridges, name)) for name in SEARCH_FACETS if name in data.bridges}
+
+
+def update_search_index(search, bridges):
+    # Przeładowanie przyrostowe (patrz reload.apply_changes): nowe liczniki, klucze tylko dla nowych nazw
+    return {name: search[name].update(*_counts(bridges, name)) if name in search
+            else PrefixIndex.build(*_counts(bridges, name))
+            for name in SEARCH_FACETS if name in bridges}
@@ -0,0 +1,263 @@
+# Migawka przetworzonego katalogu w plikach mapowanych w pamięć (np. /dev/shm).
+# Jeden proces ładujący (master gunicorna, patrz gunicorn.conf.py) zapisuje migawkę,
+# workery podpinają ją bez kopiowania i tylko do odczytu:
+#   - kolumny liczbowe, kody kategorii, tabele pomostowe, bitmapy faset, wiersze indeksu tekstu,
+#     tablice indeksów prefiksowych list wyboru -> .npy (np.load(mmap_mode='r'))
+#   - kolumny tekstowe -> plik Arrow IPC otwierany przez pa.memory_map
+#   - małe struktury (kostka agregatów, okresy trendu, kategorie, słowa indeksu tekstu, klucze indeksów
+#     prefiksowych) -> meta.pkl
+import argparse
+import os
+import pickle
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import CSV_PATH, RELOAD_INTERVAL, SHARED_DATASET_DIR
+from data import Dataset, _show_ids, _show_index, load_and_process_data
+from facets import FacetIndex
+from search_index import PrefixIndex
+from text_index import TextIndex
+
+POINTER = 'CURRENT'
+
+
+def _save(directory, name, array):
+    np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(array))
+
+
+def _load(directory, name):
+    return np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+
+
+def _export_catalog(df, directory):
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    columns = []
+    strings = {}
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            _save(directory, f'col_{column}', values.cat.codes.to_numpy())
+            columns.append((column, 'category', values.cat.categories.tolist()))
+        elif values.dtype == object or isinstance(values.dtype, pd.StringDtype):
+            strings[column] = pa.array(values.astype(object), type=pa.large_string(), from_pandas=True)
+            columns.append((column, 'string', None))
+        elif pd.api.types.is_extension_array_dtype(values.dtype):
+            numpy_dtype = values.dtype.numpy_dtype
+            _save(directory, f'col_{column}', values.to_numpy(dtype=numpy_dtype, na_value=0))
+            _save(directory, f'mask_{column}', values.isna().to_numpy())
+            columns.append((column, 'nullable', None))
+        else:
+            _save(directory, f'col_{column}', values.to_numpy())
+            columns.append((column, 'numpy', None))
+
+    table = pa.table(strings) if strings else pa.table({'_empty': pa.array([], type=pa.int8())})
+    with ipc.new_file(os.path.join(directory, 'strings.arrow'), table.schema) as writer:
+        writer.write_table(table)
+    return columns
+
+
+def _attach_catalog(directory, columns):
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    strings = ipc.open_file(pa.memory_map(os.path.join(directory, 'strings.arrow'), 'r')).read_all()
+    frame = {}
+    for column, kind, categories in columns:
+        if kind == 'category':
+            frame[column] = pd.Categorical.from_codes(_load(directory, f'col_{column}'), categories=categories)
+        elif kind == 'string':
+            frame[column] = pd.arrays.ArrowStringArray(strings.column(column))
+        elif kind == 'nullable':
+            frame[column] = pd.arrays.IntegerArray(np.asarray(_load(directory, f'col_{column}')),
+                                                   np.asarray(_load(directory, f'mask_{column}')))
+        else:
+            frame[column] = _load(directory, f'col_{column}')
+    return pd.DataFrame(frame, copy=False)
+
+
+def _export_facets(facets, directory):
+    # Wszystkie kontenery w dwóch płaskich tablicach + (offset, długość) w meta
+    layout = {}
+    dense, sparse = [], []
+    dense_offset = sparse_offset = 0
+    for facet, containers in facets.facets.items():
+        entries = []
+        for value, container in containers.items():
+            if container.dtype == np.uint8:
+                entries.append((value, 'dense', dense_offset, len(container)))
+                dense.append(container)
+                dense_offset += len(container)
+            else:
+                entries.append((value, 'sparse', sparse_offset, len(container)))
+                sparse.append(container)
+                sparse_offset += len(container)
+        layout[facet] = entries
+    _save(directory, 'facets_dense', np.concatenate(dense) if dense else np.array([], dtype=np.uint8))
+    _save(directory, 'facets_sparse', np.concatenate(sparse) if sparse else np.array([], dtype=np.uint32))
+    return layout
+
+
+def _attach_facets(directory, layout, n_rows):
+    blobs = {'dense': _load(directory, 'facets_dense'), 'sparse': _load(directory, 'facets_sparse')}
+    facets = {facet: {value: blobs[kind][offset:offset + length] for value, kind, offset, length in entries}
+              for facet, entries in layout.items()}
+    return FacetIndex(n_rows=n_rows, facets=facets)
+
+
+def _export_search(search, directory):
+    # Worker nie normalizuje i nie sortuje nazw od nowa: tablice rankingu -> .npy, posortowane klucze -> meta
+    keys = {}
+    for name, index in search.items():
+        for array in ['counts', 'ids', 'ranking', 'rank']:
+            _save(directory, f'search_{name}_{array}', getattr(index, array))
+        keys[name] = index.keys
+    return keys
+
+
+def _attach_search(directory, keys, categories):
+    load = lambda name, array: _load(directory, f'search_{name}_{array}')
+    return {name: PrefixIndex(categories[name], load(name, 'counts'), name_keys, load(name, 'ids'),
+                              load(name, 'ranking'), load(name, 'rank'))
+            for name, name_keys in keys.items()}
+
+
+def export_snapshot(data, root):
+    target = os.path.join(root, data.version)
+    if not os.path.isdir(target):
+        tmp = f'{target}.tmp-{os.getpid()}'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        meta = {'version': data.version, 'source': data.source, 'n_rows': len(data.df), 'bridges': {}}
+        meta['columns'] = _export_catalog(data.df, tmp)
+        for name, bridge in data.bridges.items():
+            _save(tmp, f'bridge_{name}_row', bridge['row'].to_numpy())
+            _save(tmp, f'bridge_{name}_code', bridge['value'].cat.codes.to_numpy())
+            meta['bridges'][name] = data.categories(name).tolist()
+
+        timeline = data.timeline
+        if timeline is not None:
+            _save(tmp, 'timeline_day_index', timeline['day_index'])
+            _save(tmp, 'timeline_type_codes', timeline['type_codes'])
+            meta['timeline'] = {k: v for k, v in timeline.items() if k not in ('day_index', 'type_codes')}
+        else:
+            meta['timeline'] = None
+        meta['cube'] = data.cube
+        meta['facets'] = _export_facets(data.facets, tmp)
+        _save(tmp, 'text_offsets', data.text.offsets)
+        _save(tmp, 'text_rows', data.text.rows)
+        meta['text_terms'] = data.text.terms
+        meta['search'] = _export_search(data.search, tmp)
+
+        with open(os.path.join(tmp, 'meta.pkl'), 'wb') as f:
+            pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            os.replace(tmp, target)
+        except OSError:
+            # Inny proces opublikował tę samą wersję w międzyczasie
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    try:
+        previous = current_version(root)
+    except FileNotFoundError:
+        previous = None
+    pointer = os.path.join(root, POINTER)
+    with open(f'{pointer}.tmp-{os.getpid()}', 'w', encoding='utf-8') as f:
+        f.write(data.version)
+    os.replace(f'{pointer}.tmp-{os.getpid()}', pointer)
+    _prune(root, keep={data.version, previous})
+    return target
+
+
+def _prune(root, keep):
+    # Podpięte workery trzymają otwarte mapowania - usunięte pliki pozostają dla nich ważne.
+    # Poprzednia wersja zostaje do następnej publikacji: worker, który odczytał stary CURRENT,
+    # a jeszcze nie otworzył meta.pkl / .npy, nie dostanie FileNotFoundError
+    for entry in os.scandir(root):
+        if entry.is_dir() and entry.name not in keep and '.tmp-' not in entry.name:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def current_version(root):
+    with open(os.path.join(root, POINTER), encoding='utf-8') as f:
+        return f.read().strip()
+
+
+def attach_snapshot(root, version=None):
+    directory = os.path.join(root, version or current_version(root))
+    with open(os.path.join(directory, 'meta.pkl'), 'rb') as f:
+        meta = pickle.load(f)
+
+    df = _attach_catalog(directory, meta['columns'])
+    show_index = _show_index(df)
+    bridges = {}
+    for name, categories in meta['bridges'].items():
+        rows = _load(directory, f'bridge_{name}_row')
+        bridges[name] = pd.DataFrame({
+            'row': rows,
+            'show_id': _show_ids(df, rows, show_index),
+            'value': pd.Categorical.from_codes(_load(directory, f'bridge_{name}_code'), categories=categories),
+        }, copy=False)
+
+    timeline = meta['timeline']
+    if timeline is not None:
+        timeline = dict(timeline,
+                        day_index=_load(directory, 'timeline_day_index'),
+                        type_codes=_load(directory, 'timeline_type_codes'))
+    facets = _attach_facets(directory, meta['facets'], meta['n_rows'])
+    text = TextIndex(meta['text_terms'], _load(directory, 'text_offsets'), _load(directory, 'text_rows'),
+                     meta['n_rows'])
+    search = _attach_search(directory, meta['search'], meta['bridges'])
+    return Dataset(df, bridges, version=meta['version'], cube=meta['cube'], timeline=timeline, facets=facets,
+                   source=meta['source'], text=text, search=search)
+
+
+def publish_snapshot(root=SHARED_DATASET_DIR):
+    os.makedirs(root, exist_ok=True)
+    data = load_and_process_data()
+    if data.df.empty:
+        return None
+    return export_snapshot(data, root)
+
+
+def load_shared_dataset(root=SHARED_DATASET_DIR):
+    # Worker: podpina aktualną migawkę; gdy jej brak (np. uruchomienie bez gunicorna) - publikuje ją sam
+    try:
+        return attach_snapshot(root)
+    except FileNotFoundError:
+        if publish_snapshot(root) is None:
+            return Dataset(pd.DataFrame())
+        return attach_snapshot(root)
+
+
+def watch_and_publish(root=SHARED_DATASET_DIR, interval=RELOAD_INTERVAL, path=CSV_PATH):
+    # Proces publikujący (z mastera gunicorna, patrz gunicorn.conf.py, albo ręcznie --watch): przyrostowe
+    # przeładowanie CSV i nowa migawka - workery podpinają ją same (reload.reattach_if_changed)
+    from reload import DatasetStore, reload_if_changed
+    os.makedirs(root, exist_ok=True)
+    store = DatasetStore(load_and_process_data(path))
+    while True:
+        time.sleep(interval)
+        try:
+            fresh = reload_if_changed(store, path)
+            if fresh is not None:
+                export_snapshot(fresh, root)
+                print(f"Opublikowano migawkę: wersja {fresh.version}, {len(fresh.df)} tytułów.")
+        except Exception as e:
+            print(f"BŁĄD publikowania migawki: {e}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Publikuje migawkę danych dla workerów")
+    parser.add_argument('--root', default=SHARED_DATASET_DIR or '/dev/shm/netflix')
+    parser.add_argument('--watch', type=float, default=0, metavar='SEKUNDY',
+                        help="po publikacji sprawdzaj zmiany CSV co tyle sekund i publikuj nowe wersje")
+    args = parser.parse_args()
+    print(publish_snapshot(args.root))
+    if args.watch > 0:
+        watch_and_publish(args.root, args.watch)
@@ -0,0 +1,155 @@
+# Tryb przybliżony (NETFLIX_APPROXIMATE=1): szkice strumieniowe zamiast dokładnych liczników dla katalogów,
+# w których pełne value_counts po obsadzie / reżyserach się nie mieści albo trwa za długo.
+# - SpaceSaving: top-N najczęstszych wartości ze stałą liczbą liczników; dla każdej wartości znany jest
+#   maksymalny błąd (prawdziwa liczba leży w [count - error, count]).
+# - HyperLogLog: liczba unikalnych wartości (aktorzy, kraje) z błędem względnym ~1.04 / sqrt(2^precision).
+# Oba szkice budowane są jednym przebiegiem po tabelach pomostowych, porcjami (stała pamięć na porcję).
+import numpy as np
+import pandas as pd
+
+from aggregates import TYPES
+from config import SKETCH_CAPACITY, SKETCH_CHUNK_ROWS, SKETCH_HLL_PRECISION
+
+# Tabela pomostowa -> kolumna klucza w ramce top-N (jak aggregates.COUNT_TABLES)
+HEAVY_HITTERS = {'cast': 'actor', 'director': 'director', 'genre': 'genre'}
+DISTINCT = ['cast', 'director', 'country']
+
+
+class SpaceSaving:
+    # Liczniki (items, counts, errors) dla co najwyżej capacity wartości. Porcja danych jest liczona dokładnie
+    # i scalana ze szkicem: wartość spoza szkicu dostaje próg (floor) jako licznik startowy i jako błąd.
+    # Niezmiennik: wartość nieśledzona wystąpiła co najwyżej floor razy.
+
+    def __init__(self, capacity=SKETCH_CAPACITY):
+        self.capacity = capacity
+        self.items = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.errors = np.empty(0, dtype=np.int64)
+        self.total = 0
+
+    @property
+    def floor(self):
+        # Najmniejszy licznik pełnego szkicu = maksymalna liczba wystąpień wartości spoza szkicu
+        return int(self.counts.min()) if len(self.items) >= self.capacity else 0
+
+    def update(self, items):
+        batch, batch_counts = np.unique(np.asarray(items, dtype=np.int64), return_counts=True)
+        if not len(batch):
+            return
+        self.total += int(batch_counts.sum())
+        floor = self.floor
+        merged, inverse = np.unique(np.concatenate([self.items, batch]), return_inverse=True)
+        tracked = inverse[:len(self.items)]
+        counts = np.bincount(inverse, weights=np.concatenate([self.counts, batch_counts]),
+                             minlength=len(merged)).astype(np.int64)
+        errors = np.full(len(merged), floor, dtype=np.int64)
+        errors[tracked] = self.errors
+        counts[np.isin(np.arange(len(merged)), tracked, invert=True)] += floor
+        # Zostaje capacity największych liczników (remisy: mniejszy błąd, potem kod wartości)
+        keep = np.lexsort((merged, errors, -counts))[:self.capacity]
+        self.items, self.counts, self.errors = merged[keep], counts[keep], errors[keep]
+
+    def top(self, n):
+        # Szkic jest posortowany malejąco po update
+        return self.items[:n], self.counts[:n], self.errors[:n]
+
+    def memory_bytes(self):
+        return self.items.nbytes + self.counts.nbytes + self.errors.nbytes
+
+
+class HyperLogLog:
+
+    def __init__(self, precision=SKETCH_HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self):
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def update(self, values):
+        hashes = pd.util.hash_array(np.asarray(values))
+        if not len(hashes):
+            return
+        p = np.uint64(self.precision)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        # Pozycja pierwszej jedynki w pozostałych bitach (bit ograniczający: co najwyżej 64 - p + 1)
+        rest = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))
+        high = (rest >> np.uint64(32)).astype(np.float64)
+        low = (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        rank = np.where(high > 0, 32 - np.floor(np.log2(np.maximum(high, 1))),
+                        64 - np.floor(np.log2(np.maximum(low, 1)))).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # Mały zakres: liczenie liniowe po pustych rejestrach
+        if raw <= 2.5 * m and zeros:
+            return m * np.log(m / zeros)
+        return float(raw)
+
+    def memory_bytes(self):
+        return self.registers.nbytes
+
+
+class CatalogSketches:
+    # Szkice per wartość filtra typu: heavy[type][tabela] (SpaceSaving), distinct[type][tabela] (HyperLogLog).
+    # Kody w szkicach to kody kategorii tabel pomostowych; labels zamienia je z powrotem na nazwy.
+
+    def __init__(self, labels, capacity=SKETCH_CAPACITY, precision=SKETCH_HLL_PRECISION):
+        self.labels = labels
+        self.heavy = {t: {name: SpaceSaving(capacity) for name in HEAVY_HITTERS if name in labels} for t in TYPES}
+        self.distinct = {t: {name: HyperLogLog(precision) for name in DISTINCT if name in labels} for t in TYPES}
+
+    def update(self, name, types, codes):
+        # Porcja wpisów tabeli pomostowej: typ tytułu i kod wartości dla każdego wpisu
+        valid = codes >= 0
+        types, codes = types[valid], codes[valid]
+        for selected_type in TYPES:
+            selected = codes if selected_type == 'All' else codes[types == selected_type]
+            if name in self.heavy[selected_type]:
+                self.heavy[selected_type][name].update(selected)
+            if name in self.distinct[selected_type]:
+                self.distinct[selected_type][name].update(selected)
+
+    def top(self, name, selected_type, n):
+        # Ramka jak w wycinku kostki (klucz, count) + error: prawdziwa liczba w [count - error, count]
+        items, counts, errors = self.heavy[selected_type][name].top(n)
+        return pd.DataFrame({HEAVY_HITTERS[name]: np.asarray(self.labels[name], dtype=object)[items],
+                             'count': counts, 'error': errors})
+
+    def error_bound(self, name, selected_type):
+        # Maksymalny błąd dowolnego licznika (także wartości spoza szkicu)
+        sketch = self.heavy[selected_type][name]
+        return int(sketch.errors.max(initial=sketch.floor))
+
+    def distinct_count(self, name, selected_type):
+        hll = self.distinct[selected_type][name]
+        return int(round(hll.estimate())), hll.relative_error
+
+    def memory_bytes(self):
+        return sum(s.memory_bytes() for by_type in [*self.heavy.values(), *self.distinct.values()]
+                   for s in by_type.values())
+
+
+def build_sketches(data, chunk_rows=SKETCH_CHUNK_ROWS, capacity=SKETCH_CAPACITY, precision=SKETCH_HLL_PRECISION):
+    # Jeden przebieg po wpisach tabel pomostowych, porcjami po chunk_rows
+    names = [name for name in dict.fromkeys(list(HEAVY_HITTERS) + DISTINCT) if name in data.bridges]
+    sketches = CatalogSketches({name: data.categories(name) for name in names}, capacity, precision)
+    if data.df.empty:
+        return sketches
+    row_types = data.df['type'].to_numpy(dtype=object)
+    for name in names:
+        bridge = data.bridges[name]
+        rows = bridge['row'].to_numpy()
+        codes = bridge['value'].cat.codes.to_numpy()
+        for start in range(0, len(rows), chunk_rows):
+            end = start + chunk_rows
+            sketches.update(name, row_types[rows[start:end]], codes[start:end])
+    return sketches
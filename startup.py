@@ -0,0 +1,68 @@
+# Szybki start workera: fabryka aplikacji (app.create_app) rejestruje callbacki i /health od razu,
+# a katalog ładuje się w tle. Tutaj: leniwy import ciężkich modułów i raport czasów startu
+# (w /health i w logu po załadowaniu danych; pełny profil importów - benchmarks/bench_startup.py).
+import contextlib
+import importlib
+import threading
+import time
+
+
+class LazyModule:
+    # Moduł importowany przy pierwszym użyciu atrybutu (np. px.bar), nie przy imporcie modułu, który go trzyma.
+    # on_load (np. rejestracja szablonu) kończy się, zanim którykolwiek wątek dostanie moduł
+
+    def __init__(self, name, on_load=None):
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                module = importlib.import_module(self._name)
+                if self._on_load is not None:
+                    self._on_load()
+                self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._module or self._load(), attr)
+
+
+class StartupReport:
+    # Czasy startu w sekundach: punkty kontrolne liczone od początku procesu (started)
+    # i czasy trwania etapów (np. ładowanie danych w tle)
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.checkpoints = {}
+        self.phases = {}
+        self.error = None
+        self.lock = threading.Lock()
+
+    def checkpoint(self, name):
+        with self.lock:
+            self.checkpoints[name] = round(time.perf_counter() - self.started, 4)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.phases[name] = round(time.perf_counter() - start, 4)
+
+    def as_dict(self):
+        with self.lock:
+            return {'checkpoints': dict(self.checkpoints), 'phases': dict(self.phases), 'error': self.error}
+
+
+def format_report(report):
+    checkpoints, phases = report.checkpoints, report.phases
+    text = (f"Start: importy {checkpoints.get('imports', 0):.2f} s, /health po {checkpoints.get('app', 0):.2f} s, "
+            f"dane {phases.get('data', 0):.2f} s, gotowe po {checkpoints.get('ready', 0):.2f} s")
+    if report.error:
+        text += f", błąd: {report.error}"
+    return text
@@ -0,0 +1,24 @@
+# Testy uruchamiane z katalogu głównego repozytorium: python -m pytest -q
+# Moduły aplikacji leżą płasko w katalogu głównym - dopisujemy go do ścieżki importu
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import generate_catalog  # noqa: E402
+from data import load_and_process_data  # noqa: E402
+
+# Katalog syntetyczny o profilu prawdziwego (wystarczająco mały, żeby testy trwały sekundy)
+CATALOG_ROWS = 3000
+
+
+@pytest.fixture(scope='session')
+def catalog(tmp_path_factory):
+    # (Dataset, katalog cache Parquet) - z cache czytają silniki SQL (query_backend.py)
+    cache_dir = str(tmp_path_factory.mktemp('catalog'))
+    path = os.path.join(cache_dir, 'catalog.csv')
+    generate_catalog(CATALOG_ROWS, path=os.path.join(ROOT, 'netflix_titles.csv')).to_csv(path, index=False)
+    return load_and_process_data(path, cache_dir=cache_dir), cache_dir
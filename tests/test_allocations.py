@@ -0,0 +1,45 @@
+# Budżety szczytowej alokacji (tracemalloc) przy filtrach krzyżowych - te same co benchmarks/bench_allocations.py,
+# na katalogu syntetycznym w skali prawdziwego (budżet ścieżki danych liczony w bajtach na wiersz wejścia)
+import os
+import tracemalloc
+
+import pytest
+
+from aggregates import TYPES
+from benchmarks.bench_allocations import (DATA_BUDGET_PER_ROW, FIGURE_BUDGET_BYTES, data_path, input_rows, measure,
+                                          peak, selections)
+from benchmarks.synthetic import generate_catalog, scaled_size
+from data import Dataset, parse_catalog
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'netflix_titles.csv')
+
+
+@pytest.fixture(scope='module')
+def data():
+    data = Dataset(parse_catalog(generate_catalog(scaled_size(1, path=CSV_PATH), path=CSV_PATH)))
+    # Jednorazowe koszty (kody wierszy zbioru, bufory wątku) poza pomiarem - mierzymy stan ustalony
+    data_path(data, 'All', selections(data)[0])
+    return data
+
+
+@pytest.fixture
+def traced():
+    tracemalloc.start()
+    yield
+    tracemalloc.stop()
+
+
+@pytest.mark.parametrize('selected_type', TYPES)
+def test_data_path_within_budget(data, traced, selected_type):
+    budget = DATA_BUDGET_PER_ROW * input_rows(data)
+    for selection in selections(data):
+        size = peak(data_path, data, selected_type, selection)
+        assert size <= budget, f'{selection}: {size / input_rows(data):.2f} B/wiersz > {DATA_BUDGET_PER_ROW}'
+
+
+def test_callbacks_within_budget(data, traced):
+    pytest.importorskip('dash')
+    budget = DATA_BUDGET_PER_ROW * input_rows(data) + FIGURE_BUDGET_BYTES
+    over = {name: size for name, size in measure(data).items() if name != 'data_path' and size > budget}
+    assert not over, f'ponad budżet {budget / 1024:.0f} KB: ' + ', '.join(
+        f'{name} {size / 1024:.0f} KB' for name, size in over.items())
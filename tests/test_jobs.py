@@ -0,0 +1,68 @@
+# Deduplikacja zadań w tle (jobs.shared_job): identyczne zadania w toku liczy jeden proces,
+# a anulowanie procesu liczącego nie zostawia czekających bez wyniku
+import multiprocessing
+import os
+import time
+
+import pytest
+
+pytest.importorskip('diskcache')
+
+from jobs import shared_job  # noqa: E402
+
+# fork: funkcje zadań zdefiniowane w teście, jak procesy zadań DiskcacheManager
+context = multiprocessing.get_context('fork')
+
+
+def _counted(directory, seconds):
+    def heavy(set_progress, selected_type):
+        with open(os.path.join(directory, 'calls'), 'a') as f:
+            f.write(f'{os.getpid()}\n')
+        time.sleep(seconds)
+        return f'{selected_type}-figure'
+    return heavy
+
+
+def _calls(directory):
+    with open(os.path.join(directory, 'calls')) as f:
+        return f.read().split()
+
+
+def _run(job, args, results):
+    results.put(job(lambda percent: None, *args))
+
+
+def test_identical_jobs_run_once(tmp_path):
+    job = shared_job(_counted(str(tmp_path), 0.5), lambda: 'v1', directory=str(tmp_path))
+    results = context.Queue()
+    processes = [context.Process(target=_run, args=(job, ('Movie',), results)) for _ in range(3)]
+    for process in processes:
+        process.start()
+    values = [results.get(timeout=30) for _ in processes]
+    for process in processes:
+        process.join()
+    assert values == ['Movie-figure'] * 3
+    assert len(_calls(str(tmp_path))) == 1
+
+    # Inne wejścia albo nowa wersja danych - osobne zadanie
+    assert job(lambda percent: None, 'TV Show') == 'TV Show-figure'
+    assert shared_job(_counted(str(tmp_path), 0), lambda: 'v2', directory=str(tmp_path))(
+        lambda percent: None, 'Movie') == 'Movie-figure'
+    assert len(_calls(str(tmp_path))) == 3
+
+
+def test_cancelled_owner_is_taken_over(tmp_path):
+    job = shared_job(_counted(str(tmp_path), 1.0), lambda: 'v1', directory=str(tmp_path))
+    results = context.Queue()
+    owner = context.Process(target=_run, args=(job, ('All',), results))
+    owner.start()
+    while not os.path.exists(os.path.join(str(tmp_path), 'calls')):
+        time.sleep(0.01)
+    waiter = context.Process(target=_run, args=(job, ('All',), results))
+    waiter.start()
+    # Anulowanie zadania właściciela (DiskcacheManager.terminate_job zabija proces)
+    owner.kill()
+    owner.join()
+    assert results.get(timeout=30) == 'All-figure'
+    waiter.join()
+    assert len(_calls(str(tmp_path))) == 2
@@ -0,0 +1,69 @@
+# Zgodność silników agregacji SQL (query_backend.py) z wycinkami kostki pandas (Dataset.slice)
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import TYPES
+from benchmarks.bench_backends import differences, selections
+from data import Dataset, narrow_integers, save_cache
+from query_backend import create_query_backend
+
+# Silnik -> moduł, bez którego test jest pomijany
+BACKEND_MODULES = {'duckdb': 'duckdb', 'sqlite': 'sqlite3'}
+
+
+@pytest.fixture(scope='module', params=sorted(BACKEND_MODULES))
+def backend(request, catalog):
+    pytest.importorskip(BACKEND_MODULES[request.param])
+    return create_query_backend(request.param, cache_dir=catalog[1])
+
+
+@pytest.mark.parametrize('selected_type', TYPES)
+def test_slices_match_pandas(backend, catalog, selected_type):
+    data = catalog[0]
+    found = []
+    for selection in selections(data):
+        found += [f'{selection}: {diff}' for diff in differences(data.slice(selected_type, selection),
+                                                                  backend.slice(data, selected_type, selection))]
+    assert not found, '\n'.join(found)
+
+
+@pytest.mark.parametrize('selected_type', TYPES)
+def test_unfiltered_slice_comes_from_cube(backend, catalog, selected_type):
+    data = catalog[0]
+    # Bez filtrów krzyżowych gotowy wycinek kostki, bez zapytania; samo zapytanie SQL nadal zgodne z kostką
+    assert backend.slice(data, selected_type, {}) is data.cube[selected_type]
+    # build_slice z pominięciem kostki - silnik otwierany (widoki / plik SQLite) przez _ready
+    assert backend._ready(data)
+    assert not differences(data.cube[selected_type], backend.build_slice(data, selected_type, {}))
+
+
+@pytest.fixture(scope='module')
+def odd_durations(catalog, tmp_path_factory):
+    # Filmy z ujemnym i brakującym czasem trwania - poza przedziałami DURATION_BINS
+    df = catalog[0].df.copy()
+    movies = np.flatnonzero((df['type'] == 'Movie').to_numpy())
+    minutes = df['duration_min'].astype('Int64')
+    minutes.iloc[movies[:20]] = -5
+    minutes.iloc[movies[20:40]] = pd.NA
+    df['duration_min'] = narrow_integers(minutes)
+    cache_dir = str(tmp_path_factory.mktemp('odd-durations'))
+    data = Dataset(df, version='odd-durations', source={'size': 0, 'mtime_ns': 0, 'sha256': 'odd-durations'})
+    save_cache(data, cache_dir)
+    return data, cache_dir
+
+
+@pytest.mark.parametrize('name', sorted(BACKEND_MODULES))
+def test_durations_outside_bins_match_pandas(name, odd_durations):
+    pytest.importorskip(BACKEND_MODULES[name])
+    data, cache_dir = odd_durations
+    backend = create_query_backend(name, cache_dir=cache_dir)
+    assert backend._ready(data)
+    rating = data.df['rating'].value_counts().index[0]
+    found = []
+    for selected_type in TYPES:
+        for selection in [{}, {'rating': [rating]}]:
+            found += [f'{selected_type} {selection}: {diff}' for diff in
+                      differences(data.slice(selected_type, selection),
+                                  backend.build_slice(data, selected_type, selection))]
+    assert not found, '\n'.join(found)
@@ -0,0 +1,142 @@
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from config import TEXT_SEARCH_PREFIX
+
+# Kolumny przeszukiwane przez pole wyszukiwania (filtr krzyżowy 'text')
+TEXT_COLUMNS = ['title', 'description']
+TOKEN_PATTERN = r'\w+'
+# Znaki łączące po rozkładzie NFKD (akcenty) - "cafe" znajduje "Café"
+COMBINING = '[\u0300-\u036f]'
+
+
+def _normalize(values):
+    values = pd.Series(values, dtype=object).fillna('').astype(str).str.casefold()
+    return values.str.normalize('NFKD').str.replace(COMBINING, '', regex=True)
+
+
+def tokenize(text):
+    # Ta sama normalizacja co _normalize, bez narzutu pandas; słowa bez powtórzeń, w kolejności wystąpienia
+    text = re.sub(COMBINING, '', unicodedata.normalize('NFKD', str(text or '').casefold()))
+    return list(dict.fromkeys(re.findall(TOKEN_PATTERN, text)))
+
+
+def _column_pairs(values):
+    # Tokenizujemy tylko unikalne napisy (powtarzające się opisy, tytuły), potem rozwijamy na wiersze
+    # tak jak data.explode_column; zwraca (słowa, kod słowa, wiersz) dla każdego wystąpienia
+    codes, uniques = pd.factorize(values)
+    tokens = _normalize(uniques).str.findall(TOKEN_PATTERN).explode().dropna()
+    term_codes, terms = pd.factorize(tokens.to_numpy())
+    uid = tokens.index.to_numpy()
+
+    per_uid = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    order = np.argsort(codes, kind='stable')
+    starts = (codes < 0).sum() + np.cumsum(per_uid) - per_uid
+    repeat = per_uid[uid]
+    offsets = np.arange(repeat.sum()) - np.repeat(np.cumsum(repeat) - repeat, repeat)
+    rows = order[np.repeat(starts[uid], repeat) + offsets]
+    return list(terms), np.repeat(term_codes, repeat), rows
+
+
+class TextIndex:
+    # Indeks odwrócony w formacie CSR: posortowana lista słów (terms), dla słowa i numery wierszy
+    # rows[offsets[i]:offsets[i + 1]] (rosnąco, bez powtórzeń). Słowa o wspólnym prefiksie leżą obok siebie,
+    # więc wyszukiwanie prefiksu to jeden ciągły wycinek rows.
+
+    def __init__(self, terms=None, offsets=None, rows=None, n_rows=0):
+        self.terms = list(terms) if terms is not None else []
+        self.offsets = np.asarray(offsets if offsets is not None else [0], dtype=np.int64)
+        self.rows = np.asarray(rows if rows is not None else [], dtype=np.uint32)
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_pairs(cls, terms, codes, rows, n_rows):
+        # Pary (kod słowa, wiersz) -> CSR; słowa bez wierszy są pomijane
+        if len(codes) == 0:
+            return cls(n_rows=n_rows)
+        terms = np.asarray(terms, dtype=object)
+        order = np.argsort(terms, kind='stable')
+        rank = np.empty(len(terms), dtype=np.int64)
+        rank[order] = np.arange(len(terms))
+        keys = np.unique(rank[codes] * n_rows + np.asarray(rows, dtype=np.int64))
+        used, term_codes = np.unique(keys // n_rows, return_inverse=True)
+        offsets = np.searchsorted(term_codes, np.arange(len(used) + 1))
+        return cls(terms[order][used].tolist(), offsets, (keys % n_rows).astype(np.uint32), n_rows)
+
+    @classmethod
+    def build(cls, df):
+        n_rows = len(df)
+        columns = [c for c in TEXT_COLUMNS if c in df.columns]
+        if not n_rows or not columns:
+            return cls(n_rows=n_rows)
+        terms, codes, rows = [], [], []
+        for column in columns:
+            column_terms, column_codes, column_rows = _column_pairs(df[column].to_numpy(dtype=object))
+            codes.append(column_codes + len(terms))
+            terms.extend(column_terms)
+            rows.append(column_rows)
+        # To samo słowo w tytule i w opisie -> jeden kod
+        unique_codes, terms = pd.factorize(np.asarray(terms, dtype=object))
+        return cls.from_pairs(terms, unique_codes[np.concatenate(codes)], np.concatenate(rows), n_rows)
+
+    def postings(self):
+        # (kod słowa, wiersz) dla każdego wpisu - do scalania przy przeładowaniu
+        return np.repeat(np.arange(len(self.terms)), np.diff(self.offsets)), self.rows
+
+    def merge(self, keep, n_kept, added=None):
+        # Przeładowanie: wiersze zachowane (keep) dostają nowe numery, dodane idą na koniec
+        mapping = np.full(len(keep), -1, dtype=np.int64)
+        mapping[keep] = np.arange(n_kept)
+        codes, rows = self.postings()
+        selected = keep[rows]
+        terms, codes, rows = self.terms, codes[selected], mapping[rows[selected]]
+        n_rows = n_kept
+        if added is not None and added.n_rows:
+            added_codes, added_rows = added.postings()
+            terms = self.terms + added.terms
+            codes = np.concatenate([codes, added_codes + len(self.terms)])
+            rows = np.concatenate([rows, added_rows.astype(np.int64) + n_kept])
+            n_rows += added.n_rows
+            # To samo słowo w obu indeksach -> jeden kod
+            unique_codes, terms = pd.factorize(np.asarray(terms, dtype=object))
+            codes = unique_codes[codes]
+        return TextIndex.from_pairs(terms, codes, rows, n_rows)
+
+    def _range(self, word, prefix):
+        lo = bisect.bisect_left(self.terms, word)
+        if prefix:
+            return lo, bisect.bisect_left(self.terms, word + '\uffff', lo)
+        return lo, lo + 1 if lo < len(self.terms) and self.terms[lo] == word else lo
+
+    def query(self, text, prefix=TEXT_SEARCH_PREFIX):
+        # Wiersze zawierające wszystkie słowa zapytania; ostatnie słowo jako prefiks (wpisywanie na bieżąco).
+        # None = zapytanie bez słów (brak filtra)
+        words = tokenize(text)
+        if not words:
+            return None
+        postings = []
+        for i, word in enumerate(words):
+            lo, hi = self._range(word, prefix and i == len(words) - 1)
+            rows = self.rows[self.offsets[lo]:self.offsets[hi]]
+            postings.append(np.unique(rows) if hi - lo > 1 else rows)
+        # Przecięcia od najkrótszej listy
+        postings.sort(key=len)
+        result = postings[0]
+        for rows in postings[1:]:
+            result = np.intersect1d(result, rows, assume_unique=True)
+        return result
+
+    def mask(self, text):
+        rows = self.query(text)
+        if rows is None:
+            return None
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def memory_bytes(self):
+        return sum(len(term) + 49 for term in self.terms) + self.offsets.nbytes + self.rows.nbytes
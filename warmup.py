@@ -0,0 +1,300 @@
+# Rozgrzewanie cache wykresów: wszystkie kombinacje kontrolek (bez filtrów krzyżowych) budowane w puli procesów
+# i wstawiane do cache serwera, zanim zapyta o nie pierwszy użytkownik. Uruchamiane w tle przy starcie
+# i po każdym przeładowaniu danych. Procesy puli podpinają migawkę danych (shared.py) zamiast parsować CSV.
+# Przy współdzielonym backendzie cache wykresów wersję danych rozgrzewa jeden worker (plik-zgłoszenie w CACHE_DIR),
+# pozostałe czytają gotowe wpisy z backendu.
+# Ręcznie (raport czasu i pokrycia, pusty cache):
+#   python -m warmup --workers 4 [--client-side]
+import argparse
+import contextlib
+import itertools
+import multiprocessing
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import plotly.io as pio
+
+from aggregates import TYPES
+from config import CACHE_DIR, CLIENT_SIDE, SHARED_DATASET_DIR, SLIM_FIGURES, WARMUP_CLAIM_TTL, WARMUP_WORKERS
+from figure_cache import FigureCache, make_key
+
+# Przestrzeń wejść callbacków (wartości kontrolek z layout.py)
+MAP_TYPES = ['area', 'bubble']
+TREND_INTERVALS = ['M', 'Q', 'Y']
+TREND_VIEWS = ['total', 'split']
+TREND_AGGS = ['count', 'cumsum']
+TREND_OPTIONS = list(itertools.product(TREND_INTERVALS, TREND_VIEWS, TREND_AGGS))
+GENRE_TOP_N = [10, 15, 20]
+HIERARCHY_TYPES = ['treemap', 'sunburst']
+HIERARCHY_N = list(range(5, 51, 5))
+HIERARCHY_OPTIONS = list(itertools.product(HIERARCHY_TYPES, HIERARCHY_N))
+SLIDER_TOP_N = list(range(5, 31, 5))
+# Porównanie krajów ma kwadratowo wiele par - rozgrzewamy tylko domyślną
+DEFAULT_COUNTRIES = ('India', 'United States')
+
+CLAIM_DIR = os.path.join(CACHE_DIR, 'warmup')
+
+_worker = {}
+_lock = threading.Lock()
+_warmed = {'version': None}
+
+
+class _NoApp:
+    # register_callbacks poza serwerem Dash: dekoratory zwracają funkcje bez rejestracji
+
+    def callback(self, *args, **kwargs):
+        return lambda fn: fn
+
+    def clientside_callback(self, *args, **kwargs):
+        pass
+
+
+def plan(client_side=False):
+    # (budowniczy, argumenty) - dokładnie tak, jak wołają je callbacki przy pustym filtrze krzyżowym
+    calls = []
+    for selected_type in TYPES:
+        if client_side:
+            # Paczka agregatów zawiera też pojedyncze figury (trafiają do cache przy okazji)
+            calls.append(('client_payload', (selected_type, {})))
+        else:
+            calls += [('map_figure', (selected_type, map_type, {})) for map_type in MAP_TYPES]
+            calls += [('trend_figure', (selected_type,) + options + ({},)) for options in TREND_OPTIONS]
+            calls.append(('month_figure', (selected_type, {})))
+            calls += [('genre_bar_figure', (selected_type, n, {})) for n in GENRE_TOP_N]
+            calls += [('genre_hierarchy_figure', (selected_type,) + options + ({},)) for options in HIERARCHY_OPTIONS]
+            calls += [('duration_figure', (selected_type, {})), ('seasons_figure', (selected_type, {})),
+                      ('rating_figure', (selected_type, {}))]
+            calls += [('director_figure', (selected_type, n, {})) for n in SLIDER_TOP_N]
+            calls += [('cast_figure', (selected_type, n, {})) for n in SLIDER_TOP_N]
+        calls.append(('country_figure', (selected_type,) + DEFAULT_COUNTRIES + ({},)))
+    return calls
+
+
+def _init_worker(root, version, client_side, slim_figures):
+    from callbacks import register_callbacks
+    from reload import DatasetStore
+    from shared import attach_snapshot
+
+    cache = FigureCache(2 ** 40)
+    store = DatasetStore(attach_snapshot(root, version))
+    _worker['cache'] = cache
+    _worker['builders'] = register_callbacks(_NoApp(), store, cache, client_side=client_side,
+                                             slim_figures=slim_figures)
+
+
+def _build(call, render):
+    # Gotowe wpisy cache (klucz, JSON) - także figury zbudowane po drodze (np. w paczce klienckiej);
+    # z render - JSON samego wyniku budowniczego (eksport statyczny), cache procesu tylko opróżniany
+    name, args = call
+    result = _worker['builders'][name](*args)
+    entries = _worker['cache'].drain()
+    return pio.json.to_json_plotly(result).encode('utf-8') if render else entries
+
+
+def _snapshot(data):
+    # Migawka opublikowana już dla workerów gunicorna albo tymczasowa, tylko na czas budowania
+    from shared import export_snapshot
+    if SHARED_DATASET_DIR and os.path.isdir(os.path.join(SHARED_DATASET_DIR, data.version)):
+        return SHARED_DATASET_DIR, None
+    tmp = tempfile.mkdtemp(prefix='netflix-warmup-')
+    export_snapshot(data, tmp)
+    return tmp, tmp
+
+
+def build_views(data, views, workers=WARMUP_WORKERS, client_side=CLIENT_SIDE, slim_figures=SLIM_FIGURES,
+                render=False):
+    # views: {widok: (budowniczy, argumenty)}. Buduje je w puli procesów i zwraca (widok, wynik) w kolejności
+    # ukończenia; wynik to wpisy cache, z render - JSON figury, a przy błędzie budowniczego - wyjątek.
+    # Zamknięcie generatora (close) anuluje zadania, które jeszcze nie ruszyły
+    root, tmp = _snapshot(data)
+    try:
+        # spawn: bez dziedziczenia wątków serwera (fork przy działających wątkach grozi zakleszczeniem)
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(root, data.version, client_side, slim_figures)) as pool:
+            futures = {pool.submit(_build, call, render): view for view, call in views.items()}
+            try:
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        # Proces puli nie wystartował (np. brak migawki) - pozostałe zadania też się nie wykonają
+                        raise
+                    except Exception as e:
+                        result = e
+                    yield futures[future], result
+            finally:
+                pool.shutdown(cancel_futures=True)
+    finally:
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def warm_up(store, figure_cache, client_side=CLIENT_SIDE, workers=WARMUP_WORKERS, slim_figures=SLIM_FIGURES):
+    data = store.get()
+    if data.df.empty:
+        return None
+    start = time.perf_counter()
+    calls = plan(client_side)
+    report = {'version': data.version, 'workers': workers, 'planned': len(calls), 'built': 0, 'entries': 0,
+              'bytes': 0, 'errors': 0, 'stale': False}
+
+    views = build_views(data, dict(enumerate(calls)), workers, client_side, slim_figures)
+    with contextlib.closing(views):
+        for _, entries in views:
+            # Dane przeładowane w trakcie - wyniki dla starej wersji są już bezużyteczne
+            if store.get().version != data.version:
+                report['stale'] = True
+                break
+            if isinstance(entries, Exception):
+                report['errors'] += 1
+                report['last_error'] = repr(entries)
+                continue
+            for key, payload in entries:
+                figure_cache.set(key, payload)
+                report['bytes'] += len(payload)
+            report['entries'] += len(entries)
+            report['built'] += 1
+
+    # Pokrycie: ile zaplanowanych widoków faktycznie jest w cache (limit pamięci może część wyrzucić)
+    cached = sum(figure_cache.contains(make_key(name, data.version, args)) for name, args in calls)
+    report.update(cached=cached, coverage=round(cached / len(calls), 4),
+                  seconds=round(time.perf_counter() - start, 3))
+    return report
+
+
+def format_report(report):
+    text = (f"Rozgrzewanie cache (wersja {report['version']}): {report['cached']}/{report['planned']} widoków "
+            f"({report['coverage']:.0%}) w {report['seconds']:.1f} s, {report['workers']} procesy, "
+            f"{report['entries']} wpisów, {report['bytes'] / 2 ** 20:.1f} MB")
+    if report['errors']:
+        text += f", błędy: {report['errors']} ({report.get('last_error')})"
+    if report['stale']:
+        text += ", przerwane (nowa wersja danych)"
+    return text
+
+
+def _owner():
+    return f'{socket.gethostname()} {os.getpid()}'
+
+
+def _abandoned(path, ttl):
+    # Zgłoszenie porzucone: starsze niż ttl albo procesu z tego hosta już nie ma (zabity w trakcie rozgrzewania)
+    try:
+        with open(path, encoding='utf-8') as f:
+            host, pid, created = f.read().split()
+        if time.time() - float(created) > ttl:
+            return True
+        if host == socket.gethostname():
+            os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError):
+        # Nieczytelne (np. zapisywane właśnie) - decyduje wiek pliku
+        try:
+            return time.time() - os.path.getmtime(path) > ttl
+        except OSError:
+            return False
+    return False
+
+
+def claim(version, directory=CLAIM_DIR, ttl=WARMUP_CLAIM_TTL):
+    # Tylko pierwszy proces (O_EXCL) rozgrzewa daną wersję; w pliku host, pid i czas zgłoszenia.
+    # Zgłoszenie porzucone (_abandoned) jest przejmowane; zgłoszenia starszych wersji są usuwane
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, version)
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not _abandoned(path, ttl):
+                return False
+            # Przemianowanie jest atomowe - porzucone zgłoszenie usuwa tylko jeden z procesów
+            try:
+                os.rename(path, f'{path}.stale-{os.getpid()}')
+            except FileNotFoundError:
+                return False
+            continue
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(f'{_owner()} {time.time()}')
+        break
+    else:
+        return False
+    for entry in os.scandir(directory):
+        if entry.name != version:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+    return True
+
+
+def release(version, directory=CLAIM_DIR):
+    # Zwolnienie własnego zgłoszenia (nieudane rozgrzewanie) - inny proces może spróbować ponownie
+    path = os.path.join(directory, version)
+    try:
+        with open(path, encoding='utf-8') as f:
+            mine = f.read().rsplit(' ', 1)[0] == _owner()
+        if mine:
+            os.remove(path)
+    except OSError:
+        pass
+
+
+def start_warmup(store, figure_cache, **kwargs):
+    # W tle - serwer obsługuje żądania od razu; kolejne uruchomienia (przeładowania) czekają na poprzednie
+    def run():
+        with _lock:
+            version = store.get().version
+            if version == _warmed['version']:
+                return
+            # Cache tylko w pamięci procesu - każdy worker rozgrzewa sam; współdzielony - jeden na wersję
+            claimed = figure_cache.backend is not None
+            if claimed and not claim(version):
+                _warmed['version'] = version
+                return
+            report = None
+            try:
+                report = warm_up(store, figure_cache, **kwargs)
+            except Exception as e:
+                print(f"BŁĄD rozgrzewania cache: {e}")
+                return
+            finally:
+                # Nieudane rozgrzewanie nie blokuje wersji dla pozostałych workerów
+                if claimed and report is None:
+                    release(version)
+            if report is None:
+                return
+            if not report['stale']:
+                _warmed['version'] = report['version']
+            print(format_report(report))
+
+    thread = threading.Thread(target=run, name='figure-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    from data import load_and_process_data
+    from reload import DatasetStore
+
+    parser = argparse.ArgumentParser(description="Rozgrzewa cache wykresów i raportuje czas oraz pokrycie")
+    parser.add_argument('--workers', type=int, default=WARMUP_WORKERS)
+    parser.add_argument('--client-side', action='store_true')
+    args = parser.parse_args()
+
+    store = DatasetStore(load_and_process_data())
+    report = warm_up(store, FigureCache(2 ** 40), client_side=args.client_side, workers=args.workers)
+    print(format_report(report) if report else "Brak danych.")
+
+
+if __name__ == '__main__':
+    main()